@@ -1,92 +1,210 @@
-from abc import ABC, abstractmethod
-from StatusEffect import Poison, Stun, ExtraDefense
-
-# Base class for all actions.
-class Action(ABC):
-    @abstractmethod
-    def execute(self, attacker, target=None):
-        pass
-
-# Normal attack action.
-class AttackAction(Action):
-    def execute(self, attacker, target):
-        # Normal attack uses a 1.0x multiplier and factors in target defense.
-        damage = max(0, (attacker.attack_power * 1.0) - (target.defense * 0.5))
-        target.health -= damage
-        print(f"{attacker.name} attacks {target.name} for {damage:.1f} damage!")
-        if target.health <= 0:
-            print(f"{target.name} has been eliminated!")
-
-# Defend action: doubles the character's defense.
-class DefendAction(Action):
-    def execute(self, attacker, target=None):
-        attacker.defense *= 2
-        print(f"{attacker.name} is defending! Defense increased.")
-        attacker.name = attacker.name+(" (Defending) ")
-
-# Generic special move action with a 1.5x multiplier.
-class SpecialMoveAction(Action):
-    def execute(self, attacker, target):
-        if attacker.special_move_cooldown > 0:
-            print(f"{attacker.spec_move} is on cooldown for {attacker.special_move_cooldown} more turns!")
-            return
-        damage = max(10, attacker.attack_power * 1.5)
-        target.health -= damage
-        print(f"{attacker.name} uses {attacker.spec_move} on {target.name} for {damage:.1f} damage!")
-        attacker.special_move_cooldown = 3
-
-# Gladiator's special move: heavy damage with a 2.0x multiplier.
-class GladiatorSpecialMove(Action):
-    def execute(self, attacker, target):
-        if attacker.special_move_cooldown > 0:
-            print(f"{attacker.spec_move} is on cooldown for {attacker.special_move_cooldown} more turns!")
-            return
-        damage = max(10, attacker.attack_power * 2.0 - target.defense)
-        target.health -= damage
-        attacker.special_move_cooldown = 3
-        print(f"{attacker.name} uses Titan Smash on {target.name} for {damage:.1f} damage!")
-
-# Voidcaster's special move: magic attack with 1.5x multiplier and applies stun.
-class VoidcasterSpecialMove(Action):
-    def execute(self, attacker, target):
-        if attacker.special_move_cooldown > 0:
-            print(f"{attacker.spec_move} is on cooldown for {attacker.special_move_cooldown} more turns!")
-            return
-        damage = max(12, attacker.attack_power * 1.5)
-        target.health -= damage 
-        target.apply_status_effect(Stun(2))
-        attacker.special_move_cooldown = 4
-        print(f"{attacker.name} casts Arcane Blast on {target.name} for {damage:.1f} damage! {target.name} is now stunned!")
-
-# Stormstriker's special move: ranged attack with 1.5x multiplier.
-class StormstrikerSpecialMove(Action):
-    def execute(self, attacker, target):
-        if attacker.special_move_cooldown > 0:
-            print(f"{attacker.spec_move} is on cooldown for {attacker.special_move_cooldown} more turns!")
-            return
-        damage = max(12, attacker.attack_power * 1.5)
-        target.health -= damage
-        attacker.special_move_cooldown = 2
-        print(f"{attacker.name} uses Piercing Arrow on {target.name} for {damage:.1f} damage!")
-
-# Nightstalker's special move: attack with 1.5x multiplier plus poison.
-class NightstalkerSpecialMove(Action):
-    def execute(self, attacker, target):
-        if attacker.special_move_cooldown > 0:
-            print(f"{attacker.spec_move} is on cooldown for {attacker.special_move_cooldown} more turns!")
-            return
-        damage = max(10, attacker.attack_power * 1.5)
-        target.health -= damage
-        target.status_effects.append(Poison(3))
-        attacker.special_move_cooldown = 3
-        print(f"{attacker.name} uses Shadow Strike on {target.name} for {damage:.1f} damage! {target.name} is now poisoned!")
-
-# Stoneguard's special move: applies a defensive buff instead of dealing damage.
-class StoneguardSpecialMove(Action):
-    def execute(self, attacker, target=None):
-        if attacker.special_move_cooldown > 0:
-            print(f"{attacker.spec_move} is on cooldown for {attacker.special_move_cooldown} more turns!")
-            return
-        attacker.status_effects.append(ExtraDefense(10, 3))
-        attacker.special_move_cooldown = 3
-        print(f"{attacker.name} uses Iron Fortress, reducing all damage taken for 3 turns!")
+from abc import ABC, abstractmethod
+from collections import namedtuple
+from Display import show, enabled, ACTION
+
+# Chance-based combat from a ruleset's "combat" section: the chance to hit
+# (before the target's dodge), the chance and damage multiplier of a critical
+# hit, and damage variance as a fraction (0.1 is +/-10%). Rulesets without
+# rolls leave their actions' rules at None, so combat stays deterministic and
+# draws no random numbers.
+CombatRules = namedtuple("CombatRules", "accuracy crit_chance crit_multiplier variance",
+                         defaults=(1.0, 0.0, 2.0, 0.0))
+ROLLS_PER_HIT = 3  # Draws per hit: accuracy, critical hit, variance.
+
+# Damage of one hit after its rolls, from three uniform draws; None on a miss.
+def roll_damage(rules, damage, target, hit, critical, spread):
+    if hit >= rules.accuracy - target.dodge:
+        return None
+    if critical < rules.crit_chance:
+        damage *= rules.crit_multiplier
+    return damage * (1 + rules.variance * (2 * spread - 1))
+
+# Base class for all actions.
+# Actions hold no per-use state, so one shared instance of each is reused (see bottom of file).
+# rng is the battle's Rng.BattleRng; actions with combat rules roll with it,
+# and without one they always hit for their base damage.
+# Damage to a target goes through its effects' on_damage hooks when it has any.
+class Action(ABC):
+    __slots__ = ()
+
+    @abstractmethod
+    def execute(self, attacker, target=None, rng=None):
+        pass
+
+# Normal attack action.
+class AttackAction(Action):
+    __slots__ = ("rules",)
+
+    def __init__(self, rules=None):
+        self.rules = rules  # CombatRules, or None for deterministic attacks.
+
+    def execute(self, attacker, target, rng=None):
+        # Normal attack uses a 1.0x multiplier and factors in target defense.
+        damage = max(0, (attacker.attack_power * 1.0) - (target.defense * 0.5))
+        if self.rules is not None and rng is not None:
+            damage = roll_damage(self.rules, damage, target, rng.random(), rng.random(), rng.random())
+            if damage is None:
+                show("attack_miss", attacker.name, target.name)
+                return
+        effects = target.status_effects
+        if effects.guarded:
+            damage = effects.absorb(target, damage)
+        target.health -= damage
+        show("attack", attacker.name, target.name, damage)
+        if target.health <= 0:
+            show("eliminated", target.name)
+
+# Defend action: doubles the character's defense.
+class DefendAction(Action):
+    def execute(self, attacker, target=None, rng=None):
+        attacker.status_effects.scale("defense", 2)
+        show("defend", attacker.name)
+        attacker.name = attacker.name+(" (Defending) ")
+
+# Special move driven by ruleset data (see Ruleset.py). One class covers every
+# character: damage is max(minimum, attack * multiplier - target defense * defense_factor),
+# optionally followed by a status effect on the target or the attacker.
+# Area moves hit every enemy at once through execute_many().
+class SpecialMoveAction(Action):
+    __slots__ = ("name", "multiplier", "defense_factor", "minimum", "cooldown", "deals_damage", "needs_target",
+                 "effect", "effect_args", "effect_on_self", "announce", "message", "area", "rules")
+
+    # The defaults are the generic 1.5x special move.
+    def __init__(self, name=None, multiplier=1.5, defense_factor=0.0, minimum=10, cooldown=3, deals_damage=True,
+                 needs_target=True, effect=None, effect_args=None, effect_on_self=False, announce=False,
+                 message="{attacker} uses {move} on {target} for {damage:.1f} damage!", area=False, rules=None):
+        self.name = name  # Move name; None uses the attacker's spec_move.
+        self.multiplier = multiplier
+        self.defense_factor = defense_factor
+        self.minimum = minimum
+        self.cooldown = cooldown
+        self.deals_damage = deals_damage
+        self.needs_target = needs_target  # False for moves that only affect the attacker.
+        self.effect = effect  # StatusEffects subclass to apply, if any.
+        self.effect_args = effect_args or {}
+        self.effect_on_self = effect_on_self
+        self.announce = announce  # Apply through apply_status_effect, which prints a message.
+        self.message = message  # For area moves {target} is the list of names and {count} their number.
+        self.area = area  # Hits every enemy; BattleManager calls execute_many instead of asking for a target.
+        self.rules = rules  # CombatRules for damaging moves, or None for deterministic damage.
+
+    def execute(self, attacker, target=None, rng=None):
+        if attacker.special_move_cooldown > 0:
+            show("cooldown", attacker.spec_move, attacker.special_move_cooldown)
+            return
+        damage = 0
+        if self.deals_damage:
+            damage = max(self.minimum, attacker.attack_power * self.multiplier - target.defense * self.defense_factor)
+            if self.rules is not None and rng is not None:
+                damage = roll_damage(self.rules, damage, target, rng.random(), rng.random(), rng.random())
+                if damage is None:
+                    attacker.special_move_cooldown = self.cooldown
+                    show("special_miss", attacker.name, self.name or attacker.spec_move, target.name)
+                    return
+            effects = target.status_effects
+            if effects.guarded:
+                damage = effects.absorb(target, damage)
+            target.health -= damage
+        if self.effect is not None:
+            receiver = attacker if self.effect_on_self else target
+            effect = self.effect(**self.effect_args)
+            if self.announce:
+                receiver.apply_status_effect(effect)
+            else:
+                receiver.status_effects.apply(effect)
+        attacker.special_move_cooldown = self.cooldown
+        show("special", self.message, attacker.name, target.name if target is not None else "", int(target is not None),
+             self.name or attacker.spec_move, damage)
+
+    # Resolve the move against many targets in one pass: the attacker's side of
+    # the damage formula is computed once and the shared action is reused.
+    # With combat rules, the rolls for every target are drawn in one batch and
+    # targets that dodge take no damage and no effect.
+    def execute_many(self, attacker, targets, rng=None):
+        if attacker.special_move_cooldown > 0:
+            show("cooldown", attacker.spec_move, attacker.special_move_cooldown)
+            return
+        damage = 0
+        if self.deals_damage and self.rules is not None and rng is not None:
+            rules = self.rules
+            base = attacker.attack_power * self.multiplier
+            draws = rng.batch(ROLLS_PER_HIT * len(targets))
+            hit_targets = []
+            for index, target in enumerate(targets):
+                roll = ROLLS_PER_HIT * index
+                hit = roll_damage(rules, max(self.minimum, base - target.defense * self.defense_factor), target,
+                                  draws[roll], draws[roll + 1], draws[roll + 2])
+                if hit is not None:
+                    if target.status_effects.guarded:
+                        hit = target.status_effects.absorb(target, hit)
+                    target.health -= hit
+                    damage = max(damage, hit)
+                    hit_targets.append(target)
+            targets = hit_targets
+        elif self.deals_damage:
+            base = attacker.attack_power * self.multiplier
+            minimum = self.minimum
+            factor = self.defense_factor
+            if factor:
+                for target in targets:
+                    hit = max(minimum, base - target.defense * factor)
+                    if target.status_effects.guarded:
+                        hit = target.status_effects.absorb(target, hit)
+                    target.health -= hit
+                    damage = max(damage, hit)
+            else:
+                damage = max(minimum, base)
+                for target in targets:
+                    effects = target.status_effects
+                    target.health -= effects.absorb(target, damage) if effects.guarded else damage
+        if self.effect is not None:
+            effect_type = self.effect
+            arguments = self.effect_args
+            if self.effect_on_self:
+                targets = [attacker]
+            for target in targets:
+                if self.announce:
+                    target.apply_status_effect(effect_type(**arguments))
+                else:
+                    target.status_effects.apply(effect_type(**arguments))
+        attacker.special_move_cooldown = self.cooldown
+        if enabled(ACTION):
+            show("special", self.message, attacker.name, ", ".join(target.name for target in targets), len(targets),
+                 self.name or attacker.spec_move, damage)
+
+# A move from the default ruleset, looked up by the class's move name.
+class BuiltinSpecialMove(SpecialMoveAction):
+    __slots__ = ()
+    move = None
+
+    def __init__(self):
+        from Ruleset import default_ruleset  # Deferred: Ruleset builds SpecialMoveAction instances.
+        source = default_ruleset().move(self.move)
+        for attribute in SpecialMoveAction.__slots__:
+            setattr(self, attribute, getattr(source, attribute))
+
+# Built-in moves under their original class names.
+class GladiatorSpecialMove(BuiltinSpecialMove):
+    __slots__ = ()
+    move = "Titan Smash"
+
+class VoidcasterSpecialMove(BuiltinSpecialMove):
+    __slots__ = ()
+    move = "Arcane Blast"
+
+class StormstrikerSpecialMove(BuiltinSpecialMove):
+    __slots__ = ()
+    move = "Piercing Arrow"
+
+class NightstalkerSpecialMove(BuiltinSpecialMove):
+    __slots__ = ()
+    move = "Shadow Strike"
+
+class StoneguardSpecialMove(BuiltinSpecialMove):
+    __slots__ = ()
+    move = "Iron Fortress"
+
+# Shared stateless action instances. Character special moves come from the ruleset.
+ATTACK_ACTION = AttackAction()
+DEFEND_ACTION = DefendAction()
+SPECIAL_MOVE_ACTION = SpecialMoveAction()
@@ -0,0 +1,235 @@
+import copy
+import hashlib
+import json
+import math
+import os
+import random
+from collections import Counter, namedtuple
+from itertools import combinations
+import Ruleset
+from Simulation import run_match, worker_pool, DEFAULT_MAX_TURNS
+from Tournament import match_seed
+
+# Searches ruleset numbers (character health, attack and defense, and move
+# multipliers) for win-rate parity with an evolution strategy:
+# each generation samples candidates around a mean with one step size per
+# parameter, moves the mean towards the best of them and adapts the step sizes
+# to the spread of the winners. Every candidate plays the same seeded matches
+# for every roster (common random numbers), so differences between candidates
+# are not drowned in match noise. Evaluations are cached in a JSON file keyed
+# by the rounded parameter values, so a vector is never simulated twice, and a
+# later run warm-starts from the best cached candidate.
+CACHE_VERSION = 1
+
+# One tunable number: its path in the ruleset data, bounds and rounding step.
+Parameter = namedtuple("Parameter", "path low high step")
+
+# Tunable numbers of a ruleset: stats of every character within +/-50% of the
+# current values and the multiplier of every damaging move. Cooldowns are left
+# out: nothing in a battle counts them down, so every special move is usable
+# once per battle whatever its cooldown, and tuning them would only add noise.
+def default_parameters(data):
+    parameters = []
+    for name, spec in data["characters"].items():
+        for stat in ("health", "attack_power", "defense"):
+            value = spec[stat]
+            parameters.append(Parameter(("characters", name, stat), max(1, round(value * 0.5)), round(value * 1.5), 1))
+    for name, spec in data["moves"].items():
+        if "damage" in spec:
+            multiplier = spec["damage"].get("multiplier", 0.0)
+            parameters.append(Parameter(("moves", name, "damage", "multiplier"), round(multiplier * 0.5, 2),
+                                        round(multiplier * 2.0, 2), 0.05))
+    return parameters
+
+# Ruleset data with parameter values written in.
+def apply_values(data, parameters, values):
+    data = copy.deepcopy(data)
+    for parameter, value in zip(parameters, values):
+        node = data
+        for key in parameter.path[:-1]:
+            node = node[key]
+        node[parameter.path[-1]] = value
+    return data
+
+# Worker entry point: play one chunk of matches for a candidate and roster and count the winners.
+def _play_chunk(task):
+    candidate, data, combo_index, roster, start, count, policy, seed, max_turns = task
+    text = json.dumps(data, sort_keys=True)
+    rules = _compiled.get(text)
+    if rules is None:
+        rules = _compiled[text] = Ruleset.compile_ruleset(data, hashlib.sha256(text.encode()).hexdigest())
+    wins = Counter()
+    for match_index in range(start, start + count):
+        result = run_match(roster, policy, match_seed(seed, combo_index, match_index), max_turns, ruleset=rules)
+        wins[result.winner] += 1
+    return candidate, roster, count, wins
+
+_compiled = {}  # Ruleset JSON -> compiled ruleset, per worker process.
+
+# Evaluation of one parameter vector.
+Evaluation = namedtuple("Evaluation", "values loss win_rates")
+
+class BalanceTuner:
+    # base_path is the ruleset to tune; parameters defaults to default_parameters() of it.
+    # Each candidate plays matches_per_roster seeded matches of every team_size roster.
+    # population candidates are sampled per generation and the best `parents` recombined.
+    # cache_path is a JSON file of evaluations that is read at start and saved after every generation.
+    def __init__(self, base_path=Ruleset.DEFAULT_PATH, parameters=None, characters=None, team_size=3,
+                 matches_per_roster=200, policy="random", seed=0, population=8, parents=None, step=0.15,
+                 workers=None, chunk_size=50, cache_path=None, max_turns=DEFAULT_MAX_TURNS, start_method=None):
+        with open(base_path) as source:
+            self.data = json.load(source)
+        self.parameters = parameters if parameters is not None else default_parameters(self.data)
+        characters = characters if characters is not None else list(self.data["characters"])
+        self.characters = characters
+        self.rosters = list(combinations(characters, team_size))
+        self.parity = 1 / team_size
+        self.matches_per_roster = matches_per_roster
+        self.policy = policy
+        self.seed = seed
+        self.population = population
+        self.parents = parents if parents is not None else max(1, population // 2)
+        self.step = step  # Initial step size as a fraction of each parameter's range.
+        self.workers = workers
+        self.start_method = start_method  # See Simulation.worker_pool.
+        self.chunk_size = chunk_size
+        self.cache_path = cache_path
+        self.max_turns = max_turns
+        self.rng = random.Random(seed)
+        self.cache = {}  # Key of rounded values -> Evaluation.
+        self.simulated = 0  # Candidates actually simulated, not served from the cache.
+        if cache_path is not None:
+            self.load_cache()
+
+    # Settings an evaluation depends on; cached results from other settings are ignored.
+    def settings(self):
+        return {"version": CACHE_VERSION, "base": self.data, "characters": self.characters,
+                "rosters": len(self.rosters), "matches_per_roster": self.matches_per_roster,
+                "policy": self.policy, "seed": self.seed, "max_turns": self.max_turns,
+                "parameters": [list(parameter.path) for parameter in self.parameters]}
+
+    def load_cache(self):
+        try:
+            with open(self.cache_path) as source:
+                saved = json.load(source)
+        except (OSError, ValueError):
+            return  # Missing or unreadable: start empty.
+        if saved.get("settings") != json.loads(json.dumps(self.settings())):
+            return
+        for entry in saved["evaluations"]:
+            evaluation = Evaluation(tuple(entry["values"]), entry["loss"], entry["win_rates"])
+            self.cache[self.key(evaluation.values)] = evaluation
+
+    # Write the cache atomically, like Ruleset does for compiled rulesets.
+    def save_cache(self):
+        if self.cache_path is None:
+            return
+        evaluations = [evaluation._asdict() for evaluation in self.cache.values()]
+        temporary = f"{self.cache_path}.{os.getpid()}.tmp"
+        with open(temporary, "w") as cache:
+            json.dump({"settings": self.settings(), "evaluations": evaluations}, cache)
+        os.replace(temporary, self.cache_path)
+
+    def key(self, values):
+        return json.dumps(list(values))
+
+    # Parameter values for a point in the unit cube, rounded to each parameter's step.
+    def decode(self, point):
+        values = []
+        for parameter, x in zip(self.parameters, point):
+            value = parameter.low + min(1.0, max(0.0, x)) * (parameter.high - parameter.low)
+            value = round(round(value / parameter.step) * parameter.step, 6)
+            values.append(int(value) if isinstance(parameter.step, int) else value)
+        return tuple(values)
+
+    def encode(self, values):
+        return [(value - parameter.low) / (parameter.high - parameter.low) if parameter.high > parameter.low else 0.5
+                for parameter, value in zip(self.parameters, values)]
+
+    # Current values of the tuned numbers in the base ruleset.
+    def base_values(self):
+        values = []
+        for parameter in self.parameters:
+            node = self.data
+            for key in parameter.path:
+                node = node[key]
+            values.append(node)
+        return tuple(values)
+
+    # Best evaluation so far, or None.
+    def best(self):
+        return min(self.cache.values(), key=lambda evaluation: evaluation.loss, default=None)
+
+    # Evaluate parameter vectors, simulating only those not in the cache. All
+    # matches of all new candidates are dealt out to the pool together.
+    def evaluate(self, candidates, pool=None):
+        fresh = []
+        for values in candidates:
+            if self.key(values) not in self.cache and values not in fresh:
+                fresh.append(values)
+        tasks = []
+        for candidate, values in enumerate(fresh):
+            data = apply_values(self.data, self.parameters, values)
+            for combo_index, roster in enumerate(self.rosters):
+                for start in range(0, self.matches_per_roster, self.chunk_size):
+                    count = min(self.chunk_size, self.matches_per_roster - start)
+                    tasks.append((candidate, data, combo_index, roster, start, count, self.policy, self.seed,
+                                  self.max_turns))
+        wins = [Counter() for _ in fresh]
+        played = [Counter() for _ in fresh]
+        results = pool.imap_unordered(_play_chunk, tasks) if pool else map(_play_chunk, tasks)
+        for candidate, roster, count, roster_wins in results:
+            wins[candidate].update(roster_wins)
+            for name in roster:
+                played[candidate][name] += count
+        for candidate, values in enumerate(fresh):
+            rates = {name: wins[candidate][name] / played[candidate][name] for name in self.characters}
+            loss = sum((rate - self.parity) ** 2 for rate in rates.values())
+            self.cache[self.key(values)] = Evaluation(values, loss, rates)
+        self.simulated += len(fresh)
+        return [self.cache[self.key(values)] for values in candidates]
+
+    # Run the search and yield the best evaluation after every generation.
+    # Starts from the best cached candidate if there is one (warm start),
+    # otherwise from the base ruleset.
+    def stream(self, generations=20):
+        best = self.best()
+        start = best.values if best is not None else self.base_values()
+        mean = self.encode(start)
+        sigma = [self.step] * len(mean)
+        weights = [math.log(self.parents + 0.5) - math.log(rank + 1) for rank in range(self.parents)]
+        total = sum(weights)
+        weights = [weight / total for weight in weights]
+        pool = worker_pool(self.workers, self.start_method) if self.workers != 1 else None
+        try:
+            self.evaluate([start], pool)
+            for _ in range(generations):
+                points = [[min(1.0, max(0.0, m + s * self.rng.gauss(0, 1))) for m, s in zip(mean, sigma)]
+                          for _ in range(self.population)]
+                evaluations = self.evaluate([self.decode(point) for point in points], pool)
+                ranked = sorted(range(len(points)), key=lambda index: evaluations[index].loss)[:self.parents]
+                new_mean = [sum(weight * points[index][dim] for weight, index in zip(weights, ranked))
+                            for dim in range(len(mean))]
+                for dim in range(len(mean)):
+                    spread = math.sqrt(sum(weight * (points[index][dim] - mean[dim]) ** 2
+                                           for weight, index in zip(weights, ranked)))
+                    sigma[dim] = max(0.01, 0.7 * sigma[dim] + 0.3 * spread)
+                mean = new_mean
+                self.save_cache()
+                yield self.best()
+        finally:
+            if pool:
+                pool.terminate()
+                pool.join()
+
+    # Run every generation and return the best evaluation.
+    def run(self, generations=20):
+        for _ in self.stream(generations):
+            pass
+        return self.best()
+
+    # Write the ruleset with the best values found so far as JSON.
+    def write_ruleset(self, path, evaluation=None):
+        evaluation = evaluation or self.best()
+        with open(path, "w") as target:
+            json.dump(apply_values(self.data, self.parameters, evaluation.values), target, indent=2)
@@ -0,0 +1,344 @@
+from BattleManager import MatchResult
+from Character import Gladiator, Voidcaster, Stormstriker, Nightstalker, Stoneguard
+from CharacterFactory import CharacterFactory
+from Policy import ATTACK, DEFEND, SPECIAL, ACTION_LANE, TARGET_LANE
+from Rng import mix64_array, uniform_keyed_array
+from Simulation import DEFAULT_MAX_TURNS
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is only needed for the vectorized engine.
+    np = None
+
+# Special move kinds, one per character class.
+GLADIATOR, VOIDCASTER, STORMSTRIKER, NIGHTSTALKER, STONEGUARD = range(5)
+MOVE_KINDS = {Gladiator: GLADIATOR, Voidcaster: VOIDCASTER, Stormstriker: STORMSTRIKER,
+              Nightstalker: NIGHTSTALKER, Stoneguard: STONEGUARD}
+
+# Constants mirrored from StatusEffect.py and the default ruleset's effects.
+# ExtraDefense (Iron Fortress) changes no stats (see StatusEffect.py), so the
+# kernel has nothing to track for it.
+POISON_DAMAGE = 3  # Shadow Strike applies Poison(3).
+POISON_DURATION = 3
+STUN_DURATION = 2
+NO_ACTION = 0  # Choice of a stunned player.
+CHOICES = 4  # NO_ACTION, ATTACK, DEFEND and SPECIAL.
+
+# Move data indexed by kind * CHOICES + choice: (multiplier, defense factor,
+# minimum, deals damage, needs target, cooldown, special move kind). Attacks
+# and special moves share one damage formula, max(minimum, attack * multiplier
+# - target defense * defense_factor): an attack is multiplier 1.0, defense
+# factor 0.5 and minimum 0, and choices without a target are all zeros.
+# Special moves come from each class's compiled move.
+SPECIAL_MOVES = [cls.special_action for cls in sorted(MOVE_KINDS, key=MOVE_KINDS.get)]
+NO_MOVE = (0.0, 0.0, 0.0, 0.0, False, 0, -1)
+MOVES = []
+for _kind, _special in enumerate(SPECIAL_MOVES):
+    MOVES += [NO_MOVE, (1.0, 0.5, 0.0, 1.0, True, 0, -1), NO_MOVE,
+              (_special.multiplier, _special.defense_factor, float(_special.minimum), float(_special.deals_damage),
+               _special.needs_target, _special.cooldown, _kind)]
+del _kind, _special
+
+# Simulates many battles in lockstep with struct-of-arrays NumPy state.
+# Per-player arrays are (players, battles), so each slot is one contiguous row,
+# and each step plays one turn in every battle. The acting player and the
+# target of every battle are flat indices into those arrays, so a step reads
+# and writes them with take/put and branch-free arithmetic; boolean masks and
+# np.where are avoided because random masks make them several times slower.
+# Finished battles are retired in place, with nobody acting, until a quarter
+# of the batch has finished; then they are copied to the final_* arrays, which
+# are (battles, players), and compacted away in one pass. Turn
+# order, status effect timing and the RandomPolicy/GreedyPolicy decisions
+# follow BattleManager exactly, so results match the object engine seed for seed.
+class BattleKernel:
+    # Per-battle arrays that are compacted together as battles finish.
+    STATE = ("ids", "retired", "ended", "keys", "next_slot", "character", "health", "defense", "cooldown", "defending", "stun",
+             "poison_1", "poison_2", "poison_3", "damage_dealt", "damage_taken")
+
+    def __init__(self, rosters, seeds, policy="random", max_turns=DEFAULT_MAX_TURNS):
+        if np is None:
+            raise ImportError("BattleKernel requires NumPy")
+        if policy not in ("random", "greedy"):
+            raise ValueError(f"Unsupported policy for BattleKernel: {policy}")
+        if isinstance(seeds, range):  # np.asarray converts a range one int at a time.
+            self.seeds = np.arange(seeds.start, seeds.stop, seeds.step, dtype=np.uint64)
+        else:
+            self.seeds = np.asarray(seeds, dtype=np.uint64)
+        count = len(self.seeds)
+        # One template per distinct character, then a gather for the whole batch.
+        names = {}
+        if rosters and isinstance(rosters[0], str):
+            self.rosters = [tuple(rosters)] * count
+            distinct = {self.rosters[0]: 0} if count else {}
+            roster_index = np.zeros(count, dtype=np.int64)
+        else:
+            if len(rosters) != count:
+                raise ValueError("Need one roster per seed")
+            self.rosters = [tuple(roster) for roster in rosters]
+            distinct = {}
+            roster_index = np.array([distinct.setdefault(roster, len(distinct)) for roster in self.rosters],
+                                    dtype=np.int64)
+        roster_slots = np.array([[names.setdefault(name, len(names)) for name in roster] for roster in distinct],
+                                dtype=np.intp).reshape(len(distinct), -1).T
+        templates = []
+        moves = []  # Rows of MOVES for each character, with the attack multiplied in.
+        for name in names:
+            character = CharacterFactory.create_character(name)
+            templates.append((character.health, character.defense))
+            kind = MOVE_KINDS[type(character)]
+            for multiplier, *move in MOVES[kind * CHOICES:(kind + 1) * CHOICES]:
+                moves.append((character.attack_power * multiplier, *move))
+        templates = np.array(templates, dtype=np.float64).reshape(-1, 2)
+        # Move tables indexed by character * CHOICES + choice.
+        bases, self.defense_factors, self.minimums, self.damaging, self.targeted, cooldowns, kinds = \
+            (np.array(column) for column in zip(*moves)) if moves else [np.zeros(0)] * 7
+        self.bases = bases.astype(np.float64)
+        self.cooldowns = cooldowns.astype(np.int16)
+        self.kinds = kinds.astype(np.int8)
+        shape = (roster_slots.shape[0], count)
+        self.players = shape[0]
+        self.policy = policy
+        self.max_turns = max_turns
+        self.slots = np.arange(self.players, dtype=np.int8)[:, None]
+        self.keys = mix64_array(self.seeds)  # Policy draws are uniform(seed, turn, lane).
+        # Index of each player's template and move table rows.
+        self.character = roster_slots.astype(np.int8).take(roster_index, axis=1)
+        self.health = templates[roster_slots, 0].take(roster_index, axis=1)
+        self.defense = templates[roster_slots, 1].take(roster_index, axis=1)
+        self.cooldown = np.zeros(shape, dtype=np.int16)
+        self.defending = np.zeros(shape, dtype=np.int8)
+        self.stun = np.zeros(shape, dtype=np.int8)  # Remaining Stun duration, 0 when not stunned.
+        # Stacked poisons counted by remaining duration: poison_d holds stacks with d turns left.
+        self.poison_1 = np.zeros(shape, dtype=np.int8)
+        self.poison_2 = np.zeros(shape, dtype=np.int8)
+        self.poison_3 = np.zeros(shape, dtype=np.int8)
+        self.poisoned = False  # Whether any poison was ever applied; until then ticks are skipped.
+        self.damage_dealt = np.zeros(shape)
+        self.damage_taken = np.zeros(shape)
+        self.turn = 0  # Every live battle has played the same number of turns.
+        self.next_slot = np.zeros(count, dtype=np.int8)
+        self.ids = np.arange(count)
+        self.retired = np.zeros(count, dtype=bool)  # Finished battles waiting to be compacted away.
+        self.ended = np.zeros(count, dtype=np.int32)  # Turn each retired battle finished on.
+        self.rows = np.arange(count)
+        self.storage = {}  # STATE name: (flat storage in use, spare storage of the same size).
+        self.scratch = {}  # See _scratch.
+        # Final state of every battle, filled in as battles finish.
+        self.final_health = np.zeros(shape[::-1])
+        self.final_turns = np.zeros(count, dtype=np.int64)
+        self.final_damage_dealt = np.zeros(shape[::-1])
+        self.final_damage_taken = np.zeros(shape[::-1])
+        finished = (self.health > 0).sum(axis=0) <= 1
+        if max_turns is not None and max_turns <= 0:
+            finished[:] = True
+        self._retire(finished)
+
+    # Number of battles still being played.
+    def active(self):
+        return int((~self.retired).sum())
+
+    # Play every battle to the end.
+    def run(self):
+        while self.step():
+            pass
+        return self
+
+    # Play one turn in every unfinished battle; return False once all are done.
+    def step(self):
+        size = self.ids.size
+        if size == 0:
+            return False
+        # Battles that already finished are stepped until the next compaction with
+        # nobody acting, which leaves them unchanged.
+        players = np.int8(self.players)
+        health = self.health
+        slots = self.slots
+        # Next living player in turn order from the saved position: the living
+        # slot the fewest places after it.
+        distance = slots - self.next_slot
+        distance += players * (distance < 0)
+        distance += (players - distance) * (health <= 0)
+        actor = distance.min(axis=0)
+        actor += self.next_slot
+        actor -= players * (actor >= players)
+        self.next_slot = actor + 1
+        self.next_slot -= players * (self.next_slot >= players)
+        self.turn += 1
+        mask = slots == actor  # One-hot (players, battles) mask of the acting player.
+        mask &= ~self.retired
+        acts = np.multiply(actor, size, out=self._scratch("acts", np.intp), dtype=np.intp)
+        acts += self.rows  # Flat index of each battle's acting player.
+
+        # Status effects: poison ticks, every timer counts down.
+        if self.poisoned:
+            stacks = ((self.poison_1 + self.poison_2 + self.poison_3) * mask).sum(axis=0, dtype=np.int8)
+            if stacks.any():
+                before = health.take(acts, out=self._scratch("before"), mode="clip")
+                after = self._scratch("after")
+                after[:] = before
+                damage = self._scratch("damage")
+                for tick in range(int(stacks.max())):
+                    after -= np.multiply(stacks > tick, float(POISON_DAMAGE), out=damage)
+                health.ravel()[acts] = after
+                before -= after
+                before += self.damage_taken.take(acts, out=after, mode="clip")
+                self.damage_taken.ravel()[acts] = before
+                self.poison_1 += (self.poison_2 - self.poison_1) * mask
+                self.poison_2 += (self.poison_3 - self.poison_2) * mask
+                self.poison_3 *= ~mask
+        stun = self.stun * mask
+        self.stun -= (stun > 0).view(np.int8)
+
+        # Stunned players lose the rest of their turn.
+        acting = stun.sum(axis=0, dtype=np.int8) <= 1
+        acting &= ~self.retired
+        self._act(acts, mask, acting)
+
+        # A battle ends when one player is left or the turn limit is reached.
+        finished = (health > 0).sum(axis=0, dtype=np.int8) <= 1
+        if self.max_turns is not None and self.turn >= self.max_turns:
+            finished[:] = True
+        self._retire(finished)
+        return True
+
+    # Choose and apply actions for the acting players (flat indices `acts`,
+    # one-hot `mask`) of the battles where `acting` is set.
+    def _act(self, acts, mask, acting):
+        health = self.health
+        size = acts.size
+        cooldown = self.cooldown.take(acts, out=self._scratch("cooldown", np.int16), mode="clip")
+        ready = (cooldown == 0).view(np.int8)
+        if self.policy == "greedy":
+            choice = ATTACK + (SPECIAL - ATTACK) * ready
+        else:
+            # Legal options are always [1, 2] or [1, 2, 3].
+            draw = uniform_keyed_array(self.keys, self.turn, ACTION_LANE, out=self._scratch("draw"))
+            draw *= 2 + ready
+            choice = draw.astype(np.int8)
+            choice += 1
+        choice *= acting
+        move = np.sum(self.character * mask, axis=0, dtype=np.intp, out=self._scratch("move", np.intp))
+        move *= CHOICES
+        move += choice  # Row of the move tables.
+        needs_target = self.targeted.take(move)
+
+        # Candidates are the other living players in turn order.
+        candidates = health > 0
+        candidates &= ~mask
+        if self.policy == "greedy":
+            weakest = (~candidates) * 1e300
+            weakest += health
+            lowest = weakest.min(axis=0)
+            target = np.zeros(size, dtype=np.int8)
+            for slot in range(self.players - 1, -1, -1):
+                target += (slot - target) * (weakest[slot] == lowest)
+            has_target = needs_target & (lowest < 1e300)
+        else:
+            count = candidates.sum(axis=0, dtype=np.int8)
+            index = uniform_keyed_array(self.keys, self.turn, TARGET_LANE, out=self._scratch("draw"))
+            index *= count
+            index = index.astype(np.int8)
+            index += 1
+            target = np.zeros(size, dtype=np.int8)
+            seen = np.zeros(size, dtype=np.int8)
+            for slot in range(1, self.players):
+                seen += candidates[slot - 1]
+                target += seen < index
+            has_target = needs_target & (count > 0)
+        hits = np.multiply(target, size, out=self._scratch("hits", np.intp), dtype=np.intp)
+        hits += self.rows  # Flat index of each battle's target.
+
+        # Damage, applied and recorded the same way BattleManager does.
+        damage = self.bases.take(move, out=self._scratch("damage"), mode="clip")
+        shield = self.defense.take(hits, out=self._scratch("shield"), mode="clip")
+        factor = self._scratch("factor")
+        shield *= self.defense_factors.take(move, out=factor, mode="clip")
+        damage -= shield
+        np.maximum(damage, self.minimums.take(move, out=factor, mode="clip"), out=damage)
+        damage *= self.damaging.take(move, out=factor, mode="clip")
+        damage *= has_target
+        before = health.take(hits, out=self._scratch("before"), mode="clip")
+        np.subtract(before, damage, out=damage)
+        health.ravel()[hits] = damage
+        before -= damage  # Damage dealt.
+        total = self.damage_dealt.take(acts, out=shield, mode="clip")
+        total += before
+        self.damage_dealt.ravel()[acts] = total
+        total = self.damage_taken.take(hits, out=shield, mode="clip")
+        total += before
+        self.damage_taken.ravel()[hits] = total
+
+        # Defend doubles defense until the player's next turn, when it is halved
+        # again; both are exact as powers of two, so one ldexp does either.
+        change = mask * ((choice == DEFEND).view(np.int8) - self.defending)
+        if change.any():
+            np.ldexp(self.defense, change, out=self.defense)
+            self.defending += change
+
+        special = choice == SPECIAL
+        if special.any():
+            cooldown += (self.cooldowns.take(move) - cooldown) * special
+            self.cooldown.ravel()[acts] = cooldown
+            kind = self.kinds.take(move)
+            struck = self.slots == target
+            # Arcane Blast stuns unless the target is already stunned.
+            stunned = (kind == VOIDCASTER) & has_target
+            if stunned.any():
+                self.stun += (struck & stunned & (self.stun == 0)).view(np.int8) * np.int8(STUN_DURATION)
+            # Shadow Strike stacks a new poison on the target.
+            poisoned = (kind == NIGHTSTALKER) & has_target
+            if poisoned.any():
+                self.poison_3 += (struck & poisoned).view(np.int8)
+                self.poisoned = True
+
+    # Scratch array for this step's battles, reused across steps because a
+    # fresh temporary as large as the batch costs more in page faults than the
+    # arithmetic done in it.
+    def _scratch(self, name, dtype=float):
+        array = self.scratch.get(name)
+        if array is None:
+            array = self.scratch[name] = np.empty(self.seeds.size, dtype)
+        return array[:self.ids.size]
+
+    # Mark newly finished battles, and once enough have finished copy out their
+    # final state and compact them away.
+    def _retire(self, finished):
+        finished &= ~self.retired
+        self.ended += finished * np.int32(self.turn)
+        self.retired |= finished
+        retired = int(self.retired.sum())
+        if retired and (retired * 4 >= self.retired.size or retired == self.retired.size):
+            rows = np.flatnonzero(self.retired)
+            ids = self.ids[rows]
+            self.final_turns[ids] = self.ended.take(rows)
+            self.final_health[ids] = self.health.take(rows, axis=1).T
+            self.final_damage_dealt[ids] = self.damage_dealt.take(rows, axis=1).T
+            self.final_damage_taken[ids] = self.damage_taken.take(rows, axis=1).T
+            # Compact into the spare storage and keep the old storage as the next
+            # spare, so compacting allocates nothing after the first time.
+            keep = np.flatnonzero(~self.retired)
+            for name in self.STATE:
+                value = getattr(self, name)
+                storage, spare = self.storage.get(name) or (value.reshape(-1), np.empty(value.size, value.dtype))
+                compacted = spare[:value.size // value.shape[-1] * keep.size].reshape(value.shape[:-1] + keep.shape)
+                value.take(keep, axis=-1, out=compacted, mode="clip")
+                self.storage[name] = (spare, storage)
+                setattr(self, name, compacted)
+            self.rows = self.rows[:keep.size]
+
+    # Index of the winning slot per battle, -1 for draws.
+    def winners(self):
+        alive = self.final_health > 0
+        return np.where(alive.sum(axis=1) == 1, alive.argmax(axis=1), -1)
+
+    # Results as MatchResult objects, comparable with Simulation.run_match.
+    def results(self):
+        results = []
+        for row, (roster, winner) in enumerate(zip(self.rosters, self.winners())):
+            results.append(MatchResult(
+                winner=roster[winner] if winner >= 0 else None,
+                turns=int(self.final_turns[row]),
+                damage_dealt=dict(zip(roster, self.final_damage_dealt[row].tolist())),
+                damage_taken=dict(zip(roster, self.final_damage_taken[row].tolist())),
+            ))
+        return results
@@ -0,0 +1,344 @@
+import struct
+from bisect import bisect_right
+from CharacterFactory import CharacterFactory
+from StatusEffect import Poison, Stun, ExtraDefense, Fortify, Weaken, Ward
+
+# Event-sourced battle log.
+#
+# A BattleRecorder attached to a BattleManager turns every state change into
+# an event and appends it to a compact binary stream. Every few turns it
+# also writes a full snapshot. BattleLogReader indexes the snapshots and
+# rebuilds the state at any turn. It starts from the nearest earlier snapshot
+# and applies the recorded events, without re-running any game logic.
+#
+# Layout: header (magic, version, ruleset digest, roster), then records. Each record is one
+# type byte followed by a fixed payload. Snapshot records carry their own
+# payload length.
+MAGIC = b"BLOG"
+VERSION = 3
+DEFENDING_SUFFIX = " (Defending) "
+NO_PLAYER = 255  # Target byte for actions without a target, winner byte for draws.
+FLUSH_SIZE = 65536  # Buffered bytes that make BattleRecorder write to its stream at the next turn.
+
+# Record types.
+TURN_START = 1  # turn, actor
+ACTION = 2  # actor, choice, target
+HEALTH32 = 3  # player, new health as float32 (used when exact)
+HEALTH64 = 4  # player, new health as float64
+DEFENSE32 = 5  # player, defending flag, new defense as float32 (used when exact)
+DEFENSE64 = 6  # player, defending flag, new defense as float64
+COOLDOWN = 7  # player, special move cooldown
+STATUS_APPLIED = 8  # player, effect kind, lasting, value and extra value as float64
+STATUS_TICKED = 9  # player, effect index, lasting
+STATUS_EXPIRED = 10  # player, effect index
+ELIMINATED = 11  # player
+END = 12  # winner slot or NO_PLAYER
+SNAPSHOT = 13  # completed turns, payload length, payload
+ATTACK32 = 14  # player, new attack power as float32 (used when exact)
+ATTACK64 = 15  # player, new attack power as float64
+
+EVENT_NAMES = {TURN_START: "turn_start", ACTION: "action", HEALTH32: "health", HEALTH64: "health",
+               DEFENSE32: "defense", DEFENSE64: "defense", COOLDOWN: "cooldown",
+               STATUS_APPLIED: "status_applied", STATUS_TICKED: "status_ticked",
+               STATUS_EXPIRED: "status_expired", ELIMINATED: "eliminated", END: "end", SNAPSHOT: "snapshot",
+               ATTACK32: "attack_power", ATTACK64: "attack_power"}
+
+# Payload layouts for the fixed-size records.
+PAYLOADS = {
+    TURN_START: struct.Struct("<IB"),
+    ACTION: struct.Struct("<BBB"),
+    HEALTH32: struct.Struct("<Bf"),
+    HEALTH64: struct.Struct("<Bd"),
+    DEFENSE32: struct.Struct("<BBf"),
+    DEFENSE64: struct.Struct("<BBd"),
+    COOLDOWN: struct.Struct("<BB"),
+    STATUS_APPLIED: struct.Struct("<BBBdd"),
+    STATUS_TICKED: struct.Struct("<BBB"),
+    STATUS_EXPIRED: struct.Struct("<BB"),
+    ELIMINATED: struct.Struct("<B"),
+    END: struct.Struct("<B"),
+    ATTACK32: struct.Struct("<Bf"),
+    ATTACK64: struct.Struct("<Bd"),
+}
+SNAPSHOT_HEADER = struct.Struct("<II")
+PLAYER_STATE = struct.Struct("<dddBHB")  # health, attack_power, defense, defending, cooldown, effect count
+EFFECT_STATE = struct.Struct("<BBdd")  # kind, lasting, value, extra value
+FLOAT32 = struct.Struct("<f")
+
+# Effect classes with their kind code and the attributes holding their value
+# and extra value (Poison's spread).
+EFFECT_KINDS = {Poison: (0, "damage", "spread"), Stun: (1, None, None), ExtraDefense: (2, "defense_boost", None),
+                Fortify: (3, "defense_boost", None), Weaken: (4, "factor", None), Ward: (5, "amount", None)}
+# Rebuild an effect from its kind code, lasting, value and extra value.
+EFFECT_CONSTRUCTORS = {0: lambda lasting, value, extra: Poison(value, duration=lasting, spread=extra),
+                       1: lambda lasting, value, extra: Stun(lasting),
+                       2: lambda lasting, value, extra: ExtraDefense(value, lasting),
+                       3: lambda lasting, value, extra: Fortify(value, lasting),
+                       4: lambda lasting, value, extra: Weaken(value, lasting),
+                       5: lambda lasting, value, extra: Ward(value, lasting)}
+
+# True if a float survives a round trip through float32 unchanged.
+def fits_float32(value):
+    return FLOAT32.unpack(FLOAT32.pack(value))[0] == value
+
+# Kind code, value and extra value for an effect instance.
+def effect_record(effect):
+    kind, attribute, extra = EFFECT_KINDS[type(effect)]
+    return kind, getattr(effect, attribute) if attribute else 0, getattr(effect, extra) if extra else 0
+
+# Replayed state of one player.
+class PlayerState:
+    __slots__ = ("health", "attack_power", "defense", "defending", "cooldown", "effects")
+
+    def __init__(self, health, attack_power, defense, defending, cooldown, effects):
+        self.health = health
+        self.attack_power = attack_power
+        self.defense = defense
+        self.defending = defending
+        self.cooldown = cooldown
+        self.effects = effects  # List of [kind, lasting, value, extra value].
+
+# Replayed state of a whole battle after a given number of turns.
+class BattleState:
+    def __init__(self, names, turn, players, ruleset_digest=None):
+        self.names = names
+        self.turn = turn
+        self.players = players
+        self.ruleset_digest = ruleset_digest  # Digest of the battle's ruleset, None for the default one.
+
+    # Build Character objects matching this state, from `ruleset` or else the
+    # ruleset the log names. The recorded stats already include the effects' modifiers.
+    def to_characters(self, ruleset=None):
+        if ruleset is None and self.ruleset_digest is not None:
+            from Ruleset import by_digest  # Deferred, like CharacterFactory's default ruleset.
+            ruleset = by_digest(self.ruleset_digest)
+        characters = []
+        for name, state in zip(self.names, self.players):
+            character = CharacterFactory.create_character(name, ruleset)
+            character.health = state.health
+            character.attack_power = state.attack_power
+            character.defense = state.defense
+            character.special_move_cooldown = state.cooldown
+            if state.defending:
+                character.name += DEFENDING_SUFFIX
+            character.status_effects.extend_applied(EFFECT_CONSTRUCTORS[kind](lasting, value, extra)
+                                                    for kind, lasting, value, extra in state.effects)
+            characters.append(character)
+        return characters
+
+# Writes a battle's events to a binary stream as it is played. ruleset is the
+# Ruleset.Ruleset the characters were created from, None for the default one;
+# the header records its digest so replays create the same characters.
+class BattleRecorder:
+    def __init__(self, stream, snapshot_interval=8, flush_size=FLUSH_SIZE, ruleset=None):
+        self.stream = stream
+        self.snapshot_interval = snapshot_interval
+        self.flush_size = flush_size
+        self.ruleset = ruleset
+        self.buffer = bytearray()
+        self.events = 0
+
+    def _write(self, kind, *fields):
+        self.buffer.append(kind)
+        self.buffer += PAYLOADS[kind].pack(*fields)
+        self.events += 1
+
+    def _flush(self):
+        self.stream.write(self.buffer)
+        self.buffer = bytearray()
+
+    # Write the header and the initial snapshot.
+    def started(self, battle):
+        if len(battle.turn_order) >= NO_PLAYER:
+            raise ValueError(f"Battle logs support at most {NO_PLAYER - 1} players")
+        digest = self.ruleset.digest.encode() if self.ruleset is not None else b""
+        self.buffer += MAGIC + bytes([VERSION, len(digest)]) + digest + bytes([len(battle.turn_order)])
+        for name in battle.base_names:
+            encoded = name.encode()
+            self.buffer += bytes([len(encoded)]) + encoded
+        self._snapshot(battle, 0)
+
+    # Write a full snapshot of the battle after `completed` turns.
+    def _snapshot(self, battle, completed):
+        payload = bytearray()
+        for player in battle.turn_order:
+            effects = player.status_effects
+            payload += PLAYER_STATE.pack(player.health, player.attack_power, player.defense,
+                                         DEFENDING_SUFFIX in player.name, player.special_move_cooldown, len(effects))
+            for effect in effects:
+                kind, value, extra = effect_record(effect)
+                payload += EFFECT_STATE.pack(kind, effect.lasting, value, extra)
+        self.buffer.append(SNAPSHOT)
+        self.buffer += SNAPSHOT_HEADER.pack(completed, len(payload)) + payload
+        self.events += 1
+
+    # Mutable state of every player, used to diff a phase of the turn.
+    def capture(self, battle):
+        return [(p.health, p.attack_power, p.defense, DEFENDING_SUFFIX in p.name, p.special_move_cooldown,
+                 [(effect, effect.lasting) for effect in p.status_effects]) for p in battle.turn_order]
+
+    # A new turn is starting; battle.turn already counts it. The stream is
+    # appended to between turns, after each snapshot or once flush_size bytes
+    # are buffered, so a battle in progress is readable up to its last flush.
+    def turn_started(self, battle, player):
+        completed = battle.turn - 1
+        if completed and completed % self.snapshot_interval == 0:
+            self._snapshot(battle, completed)
+            self._flush()
+        elif len(self.buffer) >= self.flush_size:
+            self._flush()
+        self._write(TURN_START, battle.turn, battle.slots[player])
+        return self.capture(battle)
+
+    # An action is about to be performed.
+    def action_started(self, battle, player, choice, target):
+        self._write(ACTION, battle.slots[player], choice, NO_PLAYER if target is None else battle.slots[target])
+        return self.capture(battle)
+
+    # Write events for everything that changed since `before` was captured.
+    def record_changes(self, battle, before):
+        for slot, (player, captured) in enumerate(zip(battle.turn_order, before)):
+            health, attack_power, defense, defending, cooldown, effects = captured
+            if player.health != health:
+                self._write(HEALTH32 if fits_float32(player.health) else HEALTH64, slot, player.health)
+                if health > 0 >= player.health:
+                    self._write(ELIMINATED, slot)
+            if player.attack_power != attack_power:
+                self._write(ATTACK32 if fits_float32(player.attack_power) else ATTACK64, slot, player.attack_power)
+            now_defending = DEFENDING_SUFFIX in player.name
+            if player.defense != defense or now_defending != defending:
+                self._write(DEFENSE32 if fits_float32(player.defense) else DEFENSE64, slot, now_defending, player.defense)
+            if player.special_move_cooldown != cooldown:
+                self._write(COOLDOWN, slot, player.special_move_cooldown)
+            current = player.status_effects
+            if len(current) == len(effects) and all(e is c and e.lasting == lasting for (e, lasting), c in zip(effects, current)):
+                continue
+            remaining = set(map(id, current))
+            expired = []
+            for index, (effect, lasting) in enumerate(effects):
+                if id(effect) not in remaining:
+                    expired.append(index)
+                elif effect.lasting != lasting:
+                    self._write(STATUS_TICKED, slot, index, effect.lasting)
+            for index in reversed(expired):
+                self._write(STATUS_EXPIRED, slot, index)
+            known = set(id(effect) for effect, _ in effects)
+            for effect in current:
+                if id(effect) not in known:
+                    kind, value, extra = effect_record(effect)
+                    self._write(STATUS_APPLIED, slot, kind, effect.lasting, value, extra)
+
+    # The battle is over: write the end record and flush everything.
+    def finished(self, battle, result):
+        alive = battle.get_alive_players()
+        self._write(END, battle.slots[alive[0]] if result.winner is not None else NO_PLAYER)
+        self._flush()
+
+# Reads a recorded battle, indexing its snapshots for fast seeking.
+class BattleLogReader:
+    def __init__(self, data):
+        self.data = bytes(data)
+        if self.data[:4] != MAGIC:
+            raise ValueError("Not a battle log")
+        if self.data[4] != VERSION:
+            raise ValueError(f"Unsupported battle log version: {self.data[4]}")
+        length = self.data[5]
+        self.ruleset_digest = self.data[6:6 + length].decode() or None  # See BattleState.ruleset_digest.
+        count = self.data[6 + length]
+        offset = 7 + length
+        self.names = []
+        for _ in range(count):
+            length = self.data[offset]
+            self.names.append(self.data[offset + 1:offset + 1 + length].decode())
+            offset += 1 + length
+        self.start = offset
+        self.snapshot_turns = []
+        self.snapshot_offsets = []
+        self._index()
+
+    # Scan record headers once to find every snapshot; payloads are skipped, not decoded.
+    def _index(self):
+        data = self.data
+        offset = self.start
+        while offset < len(data):
+            kind = data[offset]
+            if kind == SNAPSHOT:
+                turn, length = SNAPSHOT_HEADER.unpack_from(data, offset + 1)
+                self.snapshot_turns.append(turn)
+                self.snapshot_offsets.append(offset)
+                offset += 1 + SNAPSHOT_HEADER.size + length
+            else:
+                offset += 1 + PAYLOADS[kind].size
+
+    # Yield (offset, kind, fields) for each record from an offset.
+    def records(self, offset=None):
+        data = self.data
+        offset = self.start if offset is None else offset
+        while offset < len(data):
+            kind = data[offset]
+            if kind == SNAPSHOT:
+                turn, length = SNAPSHOT_HEADER.unpack_from(data, offset + 1)
+                yield offset, kind, (turn, length)
+                offset += 1 + SNAPSHOT_HEADER.size + length
+            else:
+                payload = PAYLOADS[kind]
+                yield offset, kind, payload.unpack_from(data, offset + 1)
+                offset += 1 + payload.size
+
+    # Yield events as (name, fields) tuples.
+    def events(self):
+        for _, kind, fields in self.records():
+            yield EVENT_NAMES[kind], fields
+
+    # Decode the snapshot record at an offset.
+    def _decode_snapshot(self, offset):
+        turn, length = SNAPSHOT_HEADER.unpack_from(self.data, offset + 1)
+        position = offset + 1 + SNAPSHOT_HEADER.size
+        players = []
+        for _ in self.names:
+            health, attack_power, defense, defending, cooldown, count = PLAYER_STATE.unpack_from(self.data, position)
+            position += PLAYER_STATE.size
+            effects = []
+            for _ in range(count):
+                effects.append(list(EFFECT_STATE.unpack_from(self.data, position)))
+                position += EFFECT_STATE.size
+            players.append(PlayerState(health, attack_power, defense, bool(defending), cooldown, effects))
+        return BattleState(self.names, turn, players, self.ruleset_digest)
+
+    # Number of turns played in the recorded battle.
+    def turns(self):
+        last = 0
+        for _, kind, fields in self.records(self.snapshot_offsets[-1]):
+            if kind == TURN_START:
+                last = fields[0]
+        return max(last, self.snapshot_turns[-1])
+
+    # Rebuild the state after `turn` turns from the nearest earlier snapshot.
+    def state_at(self, turn):
+        index = bisect_right(self.snapshot_turns, turn) - 1
+        offset = self.snapshot_offsets[index]
+        state = self._decode_snapshot(offset)
+        for _, kind, fields in self.records(offset):
+            if kind == SNAPSHOT:
+                continue
+            if kind == TURN_START:
+                if fields[0] > turn:
+                    break
+                state.turn = fields[0]
+            elif kind in (HEALTH32, HEALTH64):
+                state.players[fields[0]].health = fields[1]
+            elif kind in (ATTACK32, ATTACK64):
+                state.players[fields[0]].attack_power = fields[1]
+            elif kind in (DEFENSE32, DEFENSE64):
+                player = state.players[fields[0]]
+                player.defending = bool(fields[1])
+                player.defense = fields[2]
+            elif kind == COOLDOWN:
+                state.players[fields[0]].cooldown = fields[1]
+            elif kind == STATUS_APPLIED:
+                state.players[fields[0]].effects.append(list(fields[1:]))
+            elif kind == STATUS_TICKED:
+                state.players[fields[0]].effects[fields[1]][1] = fields[2]
+            elif kind == STATUS_EXPIRED:
+                del state.players[fields[0]].effects[fields[1]]
+        return state
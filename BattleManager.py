@@ -1,168 +1,422 @@
-import time
-from Character import Gladiator, Voidcaster, Stormstriker, Nightstalker, Stoneguard
-from StatusEffect import Poison, Stun, ExtraDefense
-from CharacterFactory import CharacterFactory
-from Action import AttackAction, DefendAction, SpecialMoveAction, GladiatorSpecialMove, VoidcasterSpecialMove, StormstrikerSpecialMove, NightstalkerSpecialMove, StoneguardSpecialMove
-
-# Manages game flow and turn-based battle.
-class BattleManager:
-    # Initialize with a list of player objects.
-    def __init__(self, players):
-        self.players = players  # List of all players.
-        self.turn_order = list(players)  # Order of turns.
-
-    # Main battle loop until one player remains.
-    def start_battle(self):
-        print("\nLET THE BATTLE COMMENCE!")
-        time.sleep(2)
-        while len(self.get_alive_players()) > 1:
-            for player in self.turn_order[:]:  # Iterate over a copy to avoid modification issues.
-                if player.health <= 0:
-                    continue  # Skip dead players.
-                self.process_turn(player)
-                if len(self.get_alive_players()) == 1:
-                    break  # End battle if one player remains.
-        winner = self.get_alive_players()[0]
-        print(f"\nGame Over! {winner.name} is the winner!")
-
-    # Return a list of players that are still alive.
-    def get_alive_players(self):
-        return [player for player in self.players if player.health > 0]
-
-    # Process an individual player's turn.
-    def process_turn(self, player):
-        if player.health <= 0:
-            return  # Do nothing if the player is dead.
-        # Reset defense if defending.
-        if " (Defending) " in player.name:
-             player.defense /= 2
-             player.name = player.name.replace(" (Defending) ", "")
-        print(f"\n{player.name}'s turn!")
-        # Process status effects (which may modify behavior).
-        player.process_status_effects()
-        # Skip turn if stunned.
-        if any(isinstance(effect, Stun) for effect in player.status_effects):
-            return
-        # Display current battle status.
-        print("\nCurrent Battle Status:")
-        for p in self.players:
-            print(f"{p.name} - HP: {p.health}")
-        # Show available actions.
-        print("\nChoose an action:")
-        print("[1] Attack")
-        print("[2] Defend")
-        if player.special_move_cooldown == 0:
-            print("[3] Special Move")
-        else:
-            print(f"[3] Special Move (Cooldown: {player.special_move_cooldown} turns)")
-        # Get and validate player's choice.
-        while True:
-            try:
-                choice = int(input("Enter action (1, 2, or 3): ").strip())
-                if choice == 3 and player.special_move_cooldown > 0:
-                    print(f"{player.name}'s special move is on cooldown!")
-                    continue
-                if choice in [1, 2, 3]:
-                    break
-                else:
-                    print("Invalid choice. Please enter 1, 2, or 3.")
-            except ValueError:
-                print("Invalid input. Please enter a number.")
-        # Execute the chosen action.
-        if choice == 1:
-            target = self.choose_target(player)
-            player.attack_enemy(target)
-        elif choice == 2:
-            player.defend_yourself()
-        elif choice == 3:
-            if isinstance(player, Stoneguard):
-                action = StoneguardSpecialMove()
-                action.execute(player)  # Stoneguard's special move does not require a target.
-            else:
-                target = self.choose_target(player)
-                if isinstance(player, Gladiator):
-                    action = GladiatorSpecialMove()
-                elif isinstance(player, Voidcaster):
-                    action = VoidcasterSpecialMove()
-                elif isinstance(player, Stormstriker):
-                    action = StormstrikerSpecialMove()
-                elif isinstance(player, Nightstalker):
-                    action = NightstalkerSpecialMove()
-                else:
-                    action = SpecialMoveAction()  # Fallback if needed.
-                action.execute(player, target)
-        # Remove players that have been eliminated.
-        self.players = [p for p in self.players if p.health > 0]
-        time.sleep(2)
-
-    # Allow the player to choose a target from alive opponents.
-    def choose_target(self, player):
-        """Allows a player to choose a valid target from alive players."""
-        alive_players = [p for p in self.get_alive_players() if p != player]
-        if not alive_players:
-            return None  # No valid targets.
-        print("\nSelect a target:")
-        for idx, opponent in enumerate(alive_players):
-            print(f"[{idx+1}] {opponent.name} - HP: {opponent.health}")
-        while True:
-            try:
-                choice = int(input("Enter target number: ")) - 1
-                if 0 <= choice < len(alive_players):
-                    return alive_players[choice]
-            except ValueError:
-                pass
-            print("Invalid selection, try again.")
-
-# Main function to initialize and start the game.
-def main():
-    print("Initializing game...")
-    selected_characters = set()
-    total_players_allowed = 3
-    players = []
-    character_options = {
-        "1": "Gladiator",
-        "2": "Voidcaster",
-        "3": "Stormstriker",
-        "4": "Nightstalker",
-        "5": "Stoneguard"
-    }
-    character_descriptions = {
-        "1": "\nThe Gladiator is a generalist fighter with solid physical damage. \nTheir special move, Titan Smash, deals extra damage with a cooldown.",
-        "2": "\nThe Voidcaster has high attack power and deals heavy magic damage. \nTheir special move, Arcane Blast, hits both opponents and stuns them.",
-        "3": "\nThe Stormstriker deals solid ranged damage, but is weak up close. \nTheir special move, Piercing Arrow, ignores defense.",
-        "4": "\nThe Nightstalker deals very high physical damage and applies status effects, but is very frail. \nTheir special move, Shadow Strike, inflicts poison.",
-        "5": "\nThe Stoneguard is very defensive with low attack power. \nTheir special move, Iron Fortress, increases defense for 3 turns."
-    }
-    # Loop for character selection.
-    while len(players) < total_players_allowed:
-        print("\nChoose your character:")
-        for key, name in character_options.items():
-            print(f"[{key}] {name}")
-        user_in = input("Select a character: ").strip()
-        if user_in in character_options:
-            if user_in in selected_characters:
-                print("Character already chosen. Please select a different one.") #Cannot choose the same character
-                continue
-            character_name = character_options[user_in]
-            # Display character description.
-            print(character_descriptions[user_in])
-            # Confirm selection.
-            confirm = input(f"Confirm choosing {character_name}? \n[1] Return \n[2] Proceed \nSelect: ").strip()
-            if confirm == "1":
-                continue
-            elif confirm == "2":
-                player_character = CharacterFactory.create_character(character_name)
-                players.append(player_character)
-                selected_characters.add(user_in)
-                print(f"You have chosen {character_name}!")
-        else:
-            print("Invalid choice. Please select a valid number.")
-    print("\nLoading...")
-    time.sleep(3)
-    print("\nAll characters have been selected! The battle is about to begin!")
-    battle_manager = BattleManager(players)
-    battle_manager.start_battle()
-
-# Main Program
-if __name__ == "__main__":
-    main()
+import os
+import random
+import sys
+import time
+from StatusEffect import Poison, Stun, ExtraDefense, tick_all
+from CharacterFactory import CharacterFactory
+from Display import show, flush, enabled, DETAIL
+from Policy import HumanPolicy, ATTACK, DEFEND, SPECIAL
+from Instrumentation import ACTION_PHASES, now
+from TurnOrder import AliveIndex
+from Rng import BattleRng
+
+# Structured outcome of one battle.
+# A plain class with the dataclass's constructor, equality and repr: importing
+# dataclasses (and inspect behind it) was the largest part of the game's import time.
+class MatchResult:
+    __slots__ = ("winner", "turns", "damage_dealt", "damage_taken")
+    __hash__ = None  # Mutable and compared by value.
+
+    # winner: name of the last player standing (winning team label in team battles), None on a draw.
+    # turns: number of turns taken by living players.
+    # damage_dealt: damage dealt by each character's actions.
+    # damage_taken: damage received from actions and status effects.
+    def __init__(self, winner=None, turns=0, damage_dealt=None, damage_taken=None):
+        self.winner = winner
+        self.turns = turns
+        self.damage_dealt = damage_dealt if damage_dealt is not None else {}
+        self.damage_taken = damage_taken if damage_taken is not None else {}
+
+    def __eq__(self, other):
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return (self.winner, self.turns, self.damage_dealt, self.damage_taken) == \
+            (other.winner, other.turns, other.damage_dealt, other.damage_taken)
+
+    def __repr__(self):
+        return (f"MatchResult(winner={self.winner!r}, turns={self.turns!r}, damage_dealt={self.damage_dealt!r}, "
+                f"damage_taken={self.damage_taken!r})")
+
+# Manages game flow and turn-based battle.
+class BattleManager:
+    __slots__ = ("players", "turn_order", "slots", "policies", "delay", "max_turns", "turn", "position",
+                 "base_names", "damage_dealt", "damage_taken", "recorder", "instrumentation", "rng", "effect_timing",
+                 "round_slot")
+
+    # Initialize with a list of player objects.
+    # policy is a single Policy shared by every player or a list with one per player.
+    # delay is the pause in seconds after each turn; max_turns ends the battle in a draw.
+    # recorder is an optional BattleLog.BattleRecorder that logs every state change.
+    # instrumentation is an optional Instrumentation.Instrumentation that times each turn phase.
+    # initiative is an optional sort key for the turn order, e.g. lambda p: -p.attack_power;
+    # by default players act in the order given.
+    # teams is an optional list with one team label per player; teammates never target
+    # each other and the battle ends when one team is left. Without it, it is free-for-all.
+    # seed keys the battle's combat rolls (see Rng.BattleRng); None picks a random seed.
+    # effect_timing is "turn" to tick each player's status effects when their turn
+    # starts, or "round" to tick every living player's effects in one batched pass
+    # when a round starts (see tick_round).
+    def __init__(self, players, policy=None, delay=2, max_turns=None, recorder=None, instrumentation=None,
+                 initiative=None, teams=None, seed=None, effect_timing="turn"):
+        if effect_timing not in ("turn", "round"):
+            raise ValueError(f"Unknown effect timing: {effect_timing}")
+        self.turn_order = sorted(players, key=initiative) if initiative is not None else list(players)  # Order of turns.
+        if teams is not None:
+            team_of = dict(zip(players, teams))
+            teams = [team_of[player] for player in self.turn_order]
+        self.players = AliveIndex(self.turn_order, teams)  # Living players, updated on elimination or revival.
+        # Per-player data is kept in lists indexed by each player's slot in turn_order.
+        self.slots = {player: slot for slot, player in enumerate(self.turn_order)}
+        if policy is None:
+            policy = HumanPolicy()
+        if isinstance(policy, (list, tuple)):
+            chosen = dict(zip(players, policy))  # Policies are given in the caller's player order.
+            self.policies = [chosen[player] for player in self.turn_order]
+        else:
+            self.policies = [policy] * len(self.turn_order)
+        self.delay = delay
+        self.max_turns = max_turns
+        self.turn = 0  # Turns taken so far.
+        self.position = -1  # Turn order position of the last player to act.
+        self.base_names = [player.name for player in self.turn_order]
+        self.damage_dealt = [0] * len(self.turn_order)
+        self.damage_taken = [0] * len(self.turn_order)
+        self.recorder = recorder
+        self.instrumentation = instrumentation
+        self.rng = BattleRng(seed if seed is not None else random.getrandbits(64))  # Hit, crit and variance rolls.
+        self.effect_timing = effect_timing
+        self.round_slot = len(self.turn_order)  # Slot of the last player to start a turn under round timing.
+        if recorder is not None:
+            recorder.started(self)
+
+    # Main battle loop until one player remains.
+    def start_battle(self):
+        show("battle_start")
+        self.pause()
+        for player in self.turns():
+            self.process_turn(player)
+        if self.instrumentation is not None:
+            self.instrumentation.count("battles")
+        return self.finish()
+
+    # Yield each player whose turn it is until the battle is over.
+    # The caller plays the turn before asking for the next player.
+    # Living players take turns in initiative order, found through the alive index
+    # so dead players cost nothing to skip.
+    def turns(self):
+        alive = self.players
+        while alive.teams_alive > 1 and not self.turn_limit_reached():
+            self.position = alive.next_position(self.position)
+            yield self.turn_order[self.position]
+
+    # Announce the outcome and return the MatchResult.
+    def finish(self):
+        result = self.result()
+        if result.winner is None:
+            show("draw", self.turn)
+        elif self.players.teams is not None:
+            show("team_wins", result.winner)
+        else:
+            show("winner", self.get_alive_players()[0].name)
+        flush()
+        if self.recorder is not None:
+            self.recorder.finished(self, result)
+        return result
+
+    # Copy of the battle with cloned characters, for search and what-if play.
+    # The copy shares the policies but has no recorder and no delay.
+    def clone(self):
+        twins = {player: player.clone() for player in self.turn_order}
+        other = object.__new__(BattleManager)
+        other.turn_order = [twins[player] for player in self.turn_order]
+        other.players = AliveIndex(other.turn_order, self.players.teams)
+        other.slots = {twins[player]: slot for player, slot in self.slots.items()}
+        other.policies = self.policies
+        other.delay = 0
+        other.max_turns = self.max_turns
+        other.turn = self.turn
+        other.position = self.position
+        other.base_names = self.base_names
+        other.damage_dealt = list(self.damage_dealt)
+        other.damage_taken = list(self.damage_taken)
+        other.recorder = None
+        other.instrumentation = None
+        other.rng = BattleRng(self.rng.seed, self.rng.counter)
+        other.effect_timing = self.effect_timing
+        other.round_slot = self.round_slot
+        return other
+
+    # Immutable copy of the battle state for restore(), e.g. to roll back a
+    # predicted turn or to try several moves from one position. Much cheaper than
+    # clone(): nothing is copied but a few numbers per player and the status effects
+    # that changed since the last snapshot.
+    def snapshot(self):
+        return (self.turn, self.position, self.round_slot, self.rng.counter,
+                tuple(player.snapshot() for player in self.turn_order), tuple(self.damage_dealt), tuple(self.damage_taken))
+
+    # Return this battle to a state taken by snapshot(). A running turns() loop
+    # continues from the restored position.
+    def restore(self, snapshot):
+        self.turn, self.position, self.round_slot, self.rng.counter, players, damage_dealt, damage_taken = snapshot
+        for player, state in zip(self.turn_order, players):
+            player.restore(state)
+        self.damage_dealt[:] = damage_dealt
+        self.damage_taken[:] = damage_taken
+        self.players.refresh()
+
+    # Players that are still alive, in turn order (a live view, not a copy).
+    def get_alive_players(self):
+        return self.players
+
+    # Update the alive index after a player's health changed outside an action or
+    # status effect tick, e.g. a revival. Battle flow calls this itself.
+    def update_alive(self, player):
+        self.players.update(player)
+
+    # True once the optional turn limit has been used up.
+    def turn_limit_reached(self):
+        return self.max_turns is not None and self.turn >= self.max_turns
+
+    # Sleep between turns unless running without delays.
+    def pause(self):
+        if self.delay:
+            time.sleep(self.delay)
+
+    # Summarize the battle so far as a MatchResult.
+    def result(self):
+        alive = self.get_alive_players()
+        if alive.teams is not None:
+            winner = alive.team_of(alive[0]) if alive.teams_alive == 1 else None
+        else:
+            winner = self.base_names[self.slots[alive[0]]] if len(alive) == 1 else None
+        return MatchResult(
+            winner=winner,
+            turns=self.turn,
+            damage_dealt=dict(zip(self.base_names, self.damage_dealt)),
+            damage_taken=dict(zip(self.base_names, self.damage_taken)),
+        )
+
+    # Process an individual player's turn.
+    def process_turn(self, player):
+        if not self.begin_turn(player):
+            flush()
+            return
+        # Get the player's choice from its policy and execute it.
+        probe = self.instrumentation
+        if probe is not None:
+            start = now()
+        choice = self.policies[self.slots[player]].choose_action(self, player)
+        if probe is not None:
+            probe.record("choose_action", start)
+        target = None
+        if self.needs_target(player, choice):
+            target = self.choose_target(player)
+        self.perform_action(player, choice, target)
+        self.end_turn()
+
+    # Start a player's turn: reset defending, tick status effects and show the
+    # battle status. Returns False if the player cannot act this turn.
+    def begin_turn(self, player):
+        if player.health <= 0:
+            return False  # Do nothing if the player is dead.
+        self.turn += 1
+        probe = self.instrumentation
+        if probe is not None:
+            probe.count("turns")
+        if self.recorder is not None:
+            before = self.recorder.turn_started(self, player)
+        # Reset defense if defending.
+        if " (Defending) " in player.name:
+             player.status_effects.scale("defense", 0.5)
+             player.name = player.name.replace(" (Defending) ", "")
+        show("turn", player.name)
+        # Process status effects (which may modify behavior).
+        if self.effect_timing == "turn":
+            health = player.health
+            if probe is not None:
+                for effect in player.status_effects:
+                    probe.count(f"effect_tick.{effect.name}")
+                start = now()
+            player.process_status_effects(self.rng)
+            self.players.update(player)
+            if probe is not None:
+                probe.record("status_effects", start)
+            self.damage_taken[self.slots[player]] += health - player.health
+        else:
+            self.tick_round(player)
+        if self.recorder is not None:
+            self.recorder.record_changes(self, before)
+        if player.health <= 0 and self.effect_timing == "round":
+            return False  # Killed by the round's ticks (turn ticks let the player finish the turn).
+        # Skip turn if stunned.
+        if player.is_stunned:
+            if probe is not None:
+                probe.count("stunned_turns")
+            return False
+        # Display current battle status.
+        if enabled(DETAIL):
+            show("status_header")
+            for p in self.players:
+                show("status", p.name, p.health)
+        return True
+
+    # Round timing: when the turn order wraps around to start a new round, tick
+    # the effects of every living player in one batched pass (StatusEffect.tick_all).
+    def tick_round(self, player):
+        slot = self.slots[player]
+        new_round = slot <= self.round_slot
+        self.round_slot = slot
+        if not new_round:
+            return
+        ticking = list(self.players)
+        healths = [p.health for p in ticking]
+        probe = self.instrumentation
+        if probe is not None:
+            for p in ticking:
+                for effect in p.status_effects:
+                    probe.count(f"effect_tick.{effect.name}")
+            start = now()
+        for character, expired in tick_all(ticking, self.rng):
+            for effect in expired:
+                show("effect_ended", character.name, effect.name)
+        for p, health in zip(ticking, healths):
+            self.damage_taken[self.slots[p]] += health - p.health
+            self.players.update(p)
+        if probe is not None:
+            probe.record("status_effects", start)
+
+    # Finish the acting player's turn.
+    def end_turn(self):
+        # Eliminated players already left the alive index when they fell.
+        flush()
+        self.pause()
+
+    # True if the chosen action needs a target.
+    def needs_target(self, player, choice):
+        return choice == ATTACK or (choice == SPECIAL and player.special_action.needs_target)
+
+    # Living opponents (players on other teams in team battles) the player may target.
+    # Returns a live sequence view with O(log n) len() and indexing.
+    def targets_for(self, player):
+        team = self.players.team_of(player)
+        if team is None:
+            return self.players.view(exclude=player)
+        return self.players.enemies(team)
+
+    # Execute the chosen action and record the damage it dealt.
+    def perform_action(self, player, choice, target=None):
+        if self.recorder is not None:
+            before = self.recorder.action_started(self, player, choice, target)
+        probe = self.instrumentation
+        if probe is not None:
+            start = now()
+        health = target.health if target is not None else 0
+        if choice == ATTACK:
+            player.attack_enemy(target, self.rng)
+        elif choice == DEFEND:
+            player.defend_yourself()
+        elif choice == SPECIAL:
+            action = player.special_action
+            if action.area:
+                self.strike_all(player, action)
+            else:
+                action.execute(player, target, self.rng)  # Moves without a target get None.
+        if target is not None:
+            damage = health - target.health
+            self.damage_dealt[self.slots[player]] += damage
+            self.damage_taken[self.slots[target]] += damage
+            self.players.update(target)
+        self.players.update(player)
+        if probe is not None:
+            phase = ACTION_PHASES.get(choice, "action.other")
+            probe.record(phase, start)
+            probe.count(phase)
+        if self.recorder is not None:
+            self.recorder.record_changes(self, before)
+
+    # Resolve an area move against every living opponent in one batched call
+    # and account for the damage each of them took.
+    def strike_all(self, player, action):
+        targets = list(self.targets_for(player))
+        healths = [target.health for target in targets]
+        action.execute_many(player, targets, self.rng)
+        slot = self.slots[player]
+        dealt = 0
+        alive = self.players
+        for target, health in zip(targets, healths):
+            damage = health - target.health
+            dealt += damage
+            self.damage_taken[self.slots[target]] += damage
+            alive.update(target)
+        self.damage_dealt[slot] += dealt
+
+    # Allow the player to choose a target from alive opponents.
+    def choose_target(self, player):
+        """Allows a player to choose a valid target from alive players."""
+        alive_players = self.targets_for(player)
+        if not alive_players:
+            return None  # No valid targets.
+        probe = self.instrumentation
+        if probe is None:
+            return self.policies[self.slots[player]].choose_target(self, player, alive_players)
+        start = now()
+        target = self.policies[self.slots[player]].choose_target(self, player, alive_players)
+        probe.record("choose_target", start)
+        return target
+
+# Main function to initialize and start the game.
+# fast skips the artificial pauses (the loading screen and the delay after every
+# turn); python BattleManager.py --fast or BATTLE_FAST_START=1 turns it on.
+def main(fast=False):
+    print("Initializing game...")
+    selected_characters = set()
+    total_players_allowed = 3
+    players = []
+    character_options = {
+        "1": "Gladiator",
+        "2": "Voidcaster",
+        "3": "Stormstriker",
+        "4": "Nightstalker",
+        "5": "Stoneguard"
+    }
+    character_descriptions = {
+        "1": "\nThe Gladiator is a generalist fighter with solid physical damage. \nTheir special move, Titan Smash, deals extra damage with a cooldown.",
+        "2": "\nThe Voidcaster has high attack power and deals heavy magic damage. \nTheir special move, Arcane Blast, hits both opponents and stuns them.",
+        "3": "\nThe Stormstriker deals solid ranged damage, but is weak up close. \nTheir special move, Piercing Arrow, ignores defense.",
+        "4": "\nThe Nightstalker deals very high physical damage and applies status effects, but is very frail. \nTheir special move, Shadow Strike, inflicts poison.",
+        "5": "\nThe Stoneguard is very defensive with low attack power. \nTheir special move, Iron Fortress, increases defense for 3 turns."
+    }
+    # Loop for character selection.
+    while len(players) < total_players_allowed:
+        print("\nChoose your character:")
+        for key, name in character_options.items():
+            print(f"[{key}] {name}")
+        user_in = input("Select a character: ").strip()
+        if user_in in character_options:
+            if user_in in selected_characters:
+                print("Character already chosen. Please select a different one.") #Cannot choose the same character
+                continue
+            character_name = character_options[user_in]
+            # Display character description.
+            print(character_descriptions[user_in])
+            # Confirm selection.
+            confirm = input(f"Confirm choosing {character_name}? \n[1] Return \n[2] Proceed \nSelect: ").strip()
+            if confirm == "1":
+                continue
+            elif confirm == "2":
+                player_character = CharacterFactory.create_character(character_name)
+                players.append(player_character)
+                selected_characters.add(user_in)
+                print(f"You have chosen {character_name}!")
+        else:
+            print("Invalid choice. Please select a valid number.")
+    print("\nLoading...")
+    if not fast:
+        time.sleep(3)
+    print("\nAll characters have been selected! The battle is about to begin!")
+    battle_manager = BattleManager(players, delay=0 if fast else 2)
+    battle_manager.start_battle()
+
+# Main Program
+if __name__ == "__main__":
+    main(fast="--fast" in sys.argv[1:] or os.environ.get("BATTLE_FAST_START") == "1")
@@ -0,0 +1,298 @@
+import asyncio
+import json
+import struct
+import sys
+import time
+from collections import deque
+from BattleManager import BattleManager
+from CharacterFactory import CharacterFactory
+from Display import muted
+from Matchmaking import Matchmaker, Ratings
+from Policy import Policy, DEFEND
+from Simulation import DEFAULT_MAX_TURNS
+from Spectator import SpectatorFeed
+
+# Asyncio battle server: many concurrent BattleManager sessions in one process.
+#
+# Protocol: one JSON object per line over TCP.
+#   client -> {"type": "join", "name": ..., "character": ...}  (character optional)
+#             players wait until Matchmaking.Matchmaker groups them by rating,
+#             which the server keeps per name
+#   server -> {"type": "start", "you": slot, "players": [...], "session": id}
+#   server -> {"type": "choose", "turn": n, "actions": [...], "targets": [slots], "timeout": seconds}
+#   client -> {"type": "action", "turn": n, "action": 1|2|3, "target": slot}
+#   server -> {"type": "state", "turn": n, "player": slot, "health": [...]}
+#   server -> {"type": "end", "winner": name, "turns": n}
+#
+# Spectators watch a running session instead of joining one:
+#   client -> {"type": "watch", "session": id}  (session optional: the newest one)
+#   server -> {"type": "watching", "session": id, "players": [...]}
+#   server -> binary frames until the battle ends, each a 4-byte little-endian
+#             length and a Spectator.SpectatorFeed frame
+DEFAULT_TURN_TIMEOUT = 30.0  # Seconds a player has to answer before they defend automatically.
+PLAYERS_PER_MATCH = 3
+MATCHMAKING_INTERVAL = 0.5  # Seconds between retries of players whose rating window has widened.
+SPECTATOR_BUFFER_LIMIT = 64 * 1024  # Unsent bytes above which a spectator skips turns until it catches up.
+FRAME_LENGTH = struct.Struct("<I")
+
+# Encode one protocol message as a line of compact JSON.
+def encode(message):
+    return json.dumps(message, separators=(",", ":")).encode() + b"\n"
+
+# A connected client and the messages it has sent.
+class RemotePlayer:
+    __slots__ = ("writer", "name", "character", "inbox", "connected", "ticket")
+
+    def __init__(self, writer, name, character):
+        self.writer = writer
+        self.name = name
+        self.character = character
+        self.inbox = asyncio.Queue()
+        self.connected = True
+        self.ticket = None  # Matchmaking.Ticket while waiting for a match.
+
+    # Queue a message for the client without waiting for the socket.
+    def send(self, message):
+        if self.connected:
+            self.writer.write(encode(message))
+
+# Runs one battle, awaiting each remote player's action instead of input().
+class BattleSession:
+    def __init__(self, server, remotes, number=0):
+        self.server = server
+        self.remotes = remotes
+        self.number = number
+        players = [CharacterFactory.create_character(remote.character) for remote in remotes]
+        self.feed = SpectatorFeed()
+        self.updated = asyncio.Event()  # Set and cleared after every turn to wake the spectators.
+        self.battle = BattleManager(players, policy=Policy(), delay=0, max_turns=server.max_turns,
+                                    recorder=self.feed)
+
+    # Send a message to every player in the session.
+    def broadcast(self, message):
+        data = encode(message)
+        for remote in self.remotes:
+            if remote.connected:
+                remote.writer.write(data)
+
+    # Play the battle to the end.
+    async def run(self):
+        battle = self.battle
+        names = [remote.character for remote in self.remotes]
+        for slot, remote in enumerate(self.remotes):
+            remote.send({"type": "start", "you": slot, "players": names, "session": self.number})
+        for player in battle.turns():
+            started = time.perf_counter()
+            if battle.begin_turn(player):
+                remote = self.remotes[battle.slots[player]]
+                targets = battle.targets_for(player)
+                busy = time.perf_counter() - started
+                choice, target = await self.ask(remote, player, targets)
+                started = time.perf_counter()
+                battle.perform_action(player, choice, target)
+                battle.end_turn()
+            else:
+                busy = 0.0
+            self.broadcast({"type": "state", "turn": battle.turn, "player": battle.slots[player],
+                            "health": [p.health for p in battle.turn_order]})
+            self.server.turn_latencies.append(busy + time.perf_counter() - started)
+            self.updated.set()
+            self.updated.clear()
+        result = battle.finish()
+        self.updated.set()
+        self.broadcast({"type": "end", "winner": result.winner, "turns": result.turns})
+        for remote in self.remotes:
+            if remote.connected:
+                remote.writer.close()
+        self.server.completed += 1
+        self.server.rate(self.remotes, result)
+        return result
+
+    # Ask the acting player for an action and target, defending on timeout or disconnect.
+    async def ask(self, remote, player, targets):
+        battle = self.battle
+        actions = Policy.legal_actions(player)
+        target_slots = [battle.slots[p] for p in targets]
+        timeout = self.server.turn_timeout
+        remote.send({"type": "choose", "turn": battle.turn, "actions": actions, "targets": target_slots,
+                     "timeout": timeout})
+        deadline = asyncio.get_running_loop().time() + timeout
+        while remote.connected:
+            remaining = deadline - asyncio.get_running_loop().time()
+            try:
+                message = await asyncio.wait_for(remote.inbox.get(), max(remaining, 0))
+            except asyncio.TimeoutError:
+                break
+            if message is None:
+                break  # Disconnected.
+            if message.get("type") != "action" or message.get("turn") != battle.turn:
+                continue  # Stale or unrelated message.
+            choice = message.get("action")
+            if choice not in actions:
+                remote.send({"type": "error", "message": "Invalid action"})
+                continue
+            if not battle.needs_target(player, choice):
+                return choice, None
+            if message.get("target") in target_slots:
+                return choice, battle.turn_order[message["target"]]
+            remote.send({"type": "error", "message": "Invalid target"})
+        return DEFEND, None
+
+    # Stream the feed to one spectator until the battle ends. The spectator only
+    # reads the shared ring, so the battle never waits for it; while its socket
+    # is backed up it skips turns and the feed later resyncs it from a keyframe.
+    async def watch(self, writer):
+        feed = self.feed
+        subscriber = feed.subscribe()
+        writer.write(encode({"type": "watching", "session": self.number,
+                             "players": [remote.character for remote in self.remotes]}))
+        while not writer.is_closing():
+            if writer.transport.get_write_buffer_size() <= SPECTATOR_BUFFER_LIMIT:
+                frames = subscriber.poll()
+                if frames:
+                    writer.write(b"".join(FRAME_LENGTH.pack(len(frame)) + frame for frame in frames))
+                if subscriber.done():
+                    break
+            if feed.ended:
+                await writer.drain()  # Nothing more is coming; wait for room for the last frames.
+            else:
+                await self.updated.wait()
+        self.server.spectator_resyncs += subscriber.resyncs
+
+# Accepts connections, groups players into matches and runs sessions concurrently.
+class BattleServer:
+    def __init__(self, host="127.0.0.1", port=8765, turn_timeout=DEFAULT_TURN_TIMEOUT, max_turns=DEFAULT_MAX_TURNS):
+        self.host = host
+        self.port = port
+        self.turn_timeout = turn_timeout
+        self.max_turns = max_turns
+        self.matchmaker = Matchmaker(players_per_match=PLAYERS_PER_MATCH)
+        self.ratings = Ratings()  # Elo rating by player name.
+        self.matching = None  # Task retrying waiting players as their rating windows widen.
+        self.sessions = set()  # Running session tasks.
+        self.watchable = {}  # Running BattleSession by session number, for spectators.
+        self.started_sessions = 0
+        self.spectator_resyncs = 0
+        self.turn_latencies = deque(maxlen=100000)  # Seconds of server work per turn.
+        self.completed = 0
+        self.server = None
+
+    # Start listening; port 0 picks a free port.
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle_client, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        self.matching = asyncio.create_task(self.match_waiting())
+        return self
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+        self.matching.cancel()
+        for task in list(self.sessions):
+            task.cancel()
+
+    # Handle one connection: the join message, then actions until disconnect.
+    async def handle_client(self, reader, writer):
+        try:
+            join = json.loads(await reader.readline() or b"{}")
+        except ValueError:
+            join = {}
+        if join.get("type") == "watch":
+            await self.handle_spectator(join, writer)
+            return
+        character = join.get("character")
+        if join.get("type") != "join" or (character is not None and character not in CharacterFactory.character_names()):
+            writer.write(encode({"type": "error", "message": "Expected a join message with a valid character"}))
+            writer.close()
+            return
+        remote = RemotePlayer(writer, join.get("name", ""), character)
+        self.join_lobby(remote)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    remote.inbox.put_nowait(json.loads(line))
+                except ValueError:
+                    remote.send({"type": "error", "message": "Invalid JSON"})
+        except ConnectionError:
+            pass
+        finally:
+            remote.connected = False
+            remote.inbox.put_nowait(None)
+            if remote.ticket is not None:
+                self.matchmaker.cancel(remote.ticket)
+
+    # Stream a running session to a spectator, then close the connection.
+    async def handle_spectator(self, request, writer):
+        number = request.get("session")
+        if number is None and self.watchable:
+            number = max(self.watchable)
+        session = self.watchable.get(number)
+        if session is None:
+            writer.write(encode({"type": "error", "message": "No such session"}))
+        else:
+            try:
+                await session.watch(writer)
+            except ConnectionError:
+                pass
+        writer.close()
+
+    # Queue a player for matchmaking, starting a session if a match forms.
+    def join_lobby(self, remote):
+        remote.ticket, match = self.matchmaker.enqueue(remote, self.ratings.rating(remote.name), remote.character,
+                                                       time.monotonic())
+        if match is not None:
+            self.start_match(match)
+
+    # Retry waiting players every MATCHMAKING_INTERVAL seconds.
+    async def match_waiting(self):
+        while True:
+            await asyncio.sleep(MATCHMAKING_INTERVAL)
+            for match in self.matchmaker.poll(time.monotonic()):
+                self.start_match(match)
+
+    # Start a session for a formed match; players who joined without a
+    # character play the one the matchmaker gave them.
+    def start_match(self, match):
+        for ticket in match.tickets:
+            ticket.player.character = ticket.character
+            ticket.player.ticket = None
+        return self.start_session(match.players())
+
+    # Update the ratings of a finished session's players. Sessions whose players
+    # do not have distinct names are not rated.
+    def rate(self, remotes, result):
+        names = [remote.name for remote in remotes]
+        if len(set(names)) == len(names):
+            winner = names[[remote.character for remote in remotes].index(result.winner)] \
+                if result.winner is not None else None
+            self.ratings.update(names, winner)
+
+    # Run a group of players as a concurrent session task.
+    def start_session(self, remotes):
+        number = self.started_sessions
+        self.started_sessions += 1
+        session = self.watchable[number] = BattleSession(self, remotes, number)
+        task = asyncio.create_task(session.run())
+        self.sessions.add(task)
+        task.add_done_callback(self.sessions.discard)
+        task.add_done_callback(lambda _: self.watchable.pop(number, None))
+        return task
+
+    # Percentile of server-side turn processing time in seconds.
+    def latency_percentile(self, percent):
+        if not self.turn_latencies:
+            return 0.0
+        ordered = sorted(self.turn_latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+async def serve(port):
+    server = await BattleServer(port=port).start()
+    print(f"Battle server listening on {server.host}:{server.port}")
+    with muted():
+        await server.server.serve_forever()
+
+if __name__ == "__main__":
+    asyncio.run(serve(int(sys.argv[1]) if len(sys.argv) > 1 else 8765))
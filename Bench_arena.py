@@ -0,0 +1,56 @@
+import sys
+import time
+from BattleManager import BattleManager
+from CharacterFactory import CharacterFactory
+from Display import muted
+from Policy import RandomPolicy
+
+SIZES = [3, 10, 100, 500, 1000, 10000]
+
+# The previous layout: alive players found by rebuilding lists every turn.
+class RebuildingBattleManager(BattleManager):
+    __slots__ = ("roster",)
+
+    def __init__(self, players, **options):
+        super().__init__(players, **options)
+        self.roster = list(players)
+
+    def get_alive_players(self):
+        return [player for player in self.roster if player.health > 0]
+
+    def targets_for(self, player):
+        return [p for p in self.get_alive_players() if p != player]
+
+    def turns(self):
+        while len(self.get_alive_players()) > 1 and not self.turn_limit_reached():
+            for player in self.turn_order[:]:
+                if player.health <= 0:
+                    continue
+                yield player
+                if len(self.get_alive_players()) == 1 or self.turn_limit_reached():
+                    break
+
+    def end_turn(self):
+        self.roster = [p for p in self.roster if p.health > 0]
+        self.pause()
+
+# Free-for-all of `size` combatants cycling through the roster; plays `turns` turns.
+def arena(manager, size, turns):
+    names = CharacterFactory.character_names()
+    players = [CharacterFactory.create_character(names[index % len(names)]) for index in range(size)]
+    battle = manager(players, policy=RandomPolicy(size), delay=0, max_turns=turns)
+    start = time.perf_counter()
+    battle.start_battle()
+    return (time.perf_counter() - start) / battle.turn
+
+def main(turns=5000):
+    print(f"{'combatants':>10}{'indexed us/turn':>18}{'rebuilt us/turn':>18}{'speedup':>10}")
+    with muted():
+        arena(BattleManager, SIZES[0], turns)  # Warm up.
+        for size in SIZES:
+            indexed = arena(BattleManager, size, turns)
+            rebuilt = arena(RebuildingBattleManager, size, turns)
+            print(f"{size:>10,}{indexed * 1e6:>18.2f}{rebuilt * 1e6:>18.2f}{rebuilt / indexed:>9.1f}x")
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:2]])
@@ -0,0 +1,52 @@
+import sys
+import time
+from BattleManager import BattleManager
+from CharacterFactory import CharacterFactory
+from Display import muted
+from Policy import RandomPolicy
+from StatusEffect import Fortify, Poison, Ward, Weaken
+
+ROSTER = ["Gladiator", "Voidcaster", "Nightstalker"]
+LONG = 10 ** 6  # Duration that outlasts any battle.
+
+# Effects that change nothing but still run every hook: a quarter each of
+# ticking, modifying and guarding effects.
+def idle_effects(count):
+    kinds = [lambda: Poison(0, duration=LONG), lambda: Fortify(0, duration=LONG),
+             lambda: Weaken(1, duration=LONG), lambda: Ward(0, duration=LONG)]
+    return [kinds[index % len(kinds)]() for index in range(count)]
+
+# Battles with `effects` idle effects on every player.
+def battles(effects, timing, matches):
+    made = []
+    for seed in range(matches):
+        players = [CharacterFactory.create_character(name) for name in ROSTER]
+        for player in players:
+            for effect in idle_effects(effects):
+                player.status_effects.append(effect)
+        made.append(BattleManager(players, policy=RandomPolicy(seed), delay=0, max_turns=500, effect_timing=timing))
+    return made
+
+# Turns per second over freshly built battles, best of three rounds; building them is not timed.
+def turns_per_second(effects, timing, matches):
+    best = 0
+    for _ in range(3):
+        with muted():
+            pending = battles(effects, timing, matches)
+            turns = 0
+            start = time.perf_counter()
+            for battle in pending:
+                turns += battle.start_battle().turns
+        best = max(best, turns / (time.perf_counter() - start))
+    return best
+
+# Turn throughput as the number of active effects per player grows, with
+# per-turn ticks and with one batched tick per round.
+def main(matches=300):
+    for effects in (0, 4, 12, 24, 48):
+        rates = [turns_per_second(effects, timing, matches) for timing in ("turn", "round")]
+        print(f"{effects:3} effects/player: {rates[0]:10,.0f} turns/s per-turn ticks, "
+              f"{rates[1]:10,.0f} turns/s round ticks")
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:2]])
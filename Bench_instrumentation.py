@@ -0,0 +1,32 @@
+import sys
+import time
+from Instrumentation import Instrumentation
+from Simulation import run_matches
+
+ROSTER = ["Gladiator", "Voidcaster", "Nightstalker"]
+
+# Time the same seeded matches without and with instrumentation, then print
+# the per-phase report. An optional path also writes the snapshot to a file.
+def main(matches=2000, path=None):
+    for _ in run_matches(ROSTER, matches // 10, seed=0):
+        pass  # Warm up.
+    start = time.perf_counter()
+    for _ in run_matches(ROSTER, matches, seed=0):
+        pass
+    plain = time.perf_counter() - start
+    probe = Instrumentation()
+    start = time.perf_counter()
+    for _ in run_matches(ROSTER, matches, seed=0, instrumentation=probe):
+        pass
+    timed = time.perf_counter() - start
+    turns = probe.counters["turns"]
+    print(f"{matches} matches, {turns:,} turns")
+    print(f"disabled: {turns / plain:,.0f} turns/s   enabled: {turns / timed:,.0f} turns/s "
+          f"({timed / plain - 1:+.1%} overhead)")
+    print(probe.report())
+    if path:
+        probe.write(path)
+        print(f"wrote {path}")
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:2]], *sys.argv[2:3])
@@ -0,0 +1,27 @@
+import sys
+import time
+from BattleKernel import BattleKernel
+from Simulation import run_match
+
+ROSTER = ["Gladiator", "Voidcaster", "Nightstalker"]
+
+# Matches per second for a function playing `matches` matches, best of three rounds.
+def matches_per_second(function, matches):
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return matches / best
+
+# Compare matches per second of the object engine and the vectorized kernel.
+def main(matches=100000, object_matches=2000, policy="random"):
+    object_rate = matches_per_second(lambda: [run_match(ROSTER, policy, seed) for seed in range(object_matches)],
+                                     object_matches)
+    kernel_rate = matches_per_second(lambda: BattleKernel(ROSTER, range(matches), policy).run(), matches)
+
+    print(f"object engine: {object_rate:,.0f} matches/s")
+    print(f"BattleKernel:  {kernel_rate:,.0f} matches/s ({kernel_rate / object_rate:.1f}x)")
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:3]])
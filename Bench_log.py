@@ -0,0 +1,39 @@
+import io
+import sys
+import time
+from BattleLog import BattleRecorder, BattleLogReader
+from Simulation import run_match
+
+ROSTER = ["Gladiator", "Voidcaster", "Nightstalker"]
+
+# Measure log size per event, recording cost and replay speed.
+def main(matches=2000):
+    start = time.perf_counter()
+    for seed in range(matches):
+        run_match(ROSTER, "random", seed)
+    plain = time.perf_counter() - start
+
+    logs = []
+    events = 0
+    start = time.perf_counter()
+    for seed in range(matches):
+        stream = io.BytesIO()
+        recorder = BattleRecorder(stream)
+        run_match(ROSTER, "random", seed, recorder=recorder)
+        logs.append(stream.getvalue())
+        events += recorder.events
+    recorded = time.perf_counter() - start
+    size = sum(len(log) for log in logs)
+
+    readers = [BattleLogReader(log) for log in logs]
+    start = time.perf_counter()
+    for reader in readers:
+        reader.state_at(reader.turns())
+    seek = (time.perf_counter() - start) / matches
+
+    print(f"{events / matches:.1f} events and {size / matches:,.0f} bytes per match, {size / events:.2f} bytes per event")
+    print(f"recording overhead: {(recorded - plain) / events * 1e6:.2f} us per event")
+    print(f"replay to final turn: {seek * 1e6:,.1f} us per match vs {plain / matches * 1e6:,.1f} us to re-simulate")
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:2]])
@@ -0,0 +1,111 @@
+import random
+import sys
+import time
+from CharacterFactory import CharacterFactory
+from Matchmaking import Matchmaker, MAX_WINDOW, percentile
+
+NAMES = CharacterFactory.character_names()
+POPULARITY = [0.35, 0.25, 0.2, 0.12, 0.08]  # Share of players choosing each character.
+FLEXIBLE_SHARE = 0.15  # Players who take any character.
+ARRIVALS = 20000
+BASELINE_ARRIVALS = 200
+
+def rating(rng):
+    return rng.gauss(1500, 300)
+
+def character(rng):
+    return None if rng.random() < FLEXIBLE_SHARE else rng.choices(NAMES, POPULARITY)[0]
+
+# The queue without an index: every arrival scans all waiting players for the
+# nearest rating of each character it still needs.
+class LinearQueue:
+    def __init__(self, players_per_match=3, window=MAX_WINDOW):
+        self.players_per_match = players_per_match
+        self.window = window
+        self.waiting = []  # (rating, character)
+
+    def enqueue(self, player_rating, player_character):
+        best = {}
+        for index, (other_rating, other_character) in enumerate(self.waiting):
+            gap = abs(other_rating - player_rating)
+            if other_character != player_character and gap <= self.window and \
+                    (other_character not in best or gap < best[other_character][0]):
+                best[other_character] = (gap, index)
+        if len(best) < self.players_per_match - 1:
+            self.waiting.append((player_rating, player_character))
+            return False
+        chosen = sorted(best.values())[:self.players_per_match - 1]
+        for _, index in sorted(chosen, key=lambda item: -item[1]):
+            self.waiting.pop(index)
+        return True
+
+# A standing queue of `size` players who all chose the first character, then
+# ARRIVALS mixed arrivals, ten per simulated second. Returns microseconds per
+# arrival (polls included) and the matches formed.
+def standing_queue(size, seed=0):
+    rng = random.Random(seed)
+    matchmaker = Matchmaker()
+    for index in range(size):
+        matchmaker.enqueue(index, rating(rng), NAMES[0], now=-60.0)
+    matchmaker.poll(0.0)  # The standing players' windows are at their widest from here on.
+    arrivals = [(rating(rng), character(rng)) for _ in range(ARRIVALS)]
+    start = time.perf_counter()
+    for index, (player_rating, player_character) in enumerate(arrivals):
+        now = index / 10
+        matchmaker.poll(now)
+        matchmaker.enqueue(size + index, player_rating, player_character, now)
+    elapsed = time.perf_counter() - start
+    return elapsed / ARRIVALS * 1e6, matchmaker.matched
+
+def linear_queue(size, seed=0):
+    rng = random.Random(seed)
+    queue = LinearQueue()
+    queue.waiting = [(rating(rng), NAMES[0]) for _ in range(size)]
+    arrivals = [(rating(rng), rng.choice(NAMES[1:])) for _ in range(BASELINE_ARRIVALS)]
+    start = time.perf_counter()
+    for player_rating, player_character in arrivals:
+        queue.enqueue(player_rating, player_character)
+    return (time.perf_counter() - start) / BASELINE_ARRIVALS * 1e6
+
+# Poisson arrivals at `rate` players per second for `seconds` simulated
+# seconds. Returns waits, rating spreads, players still waiting and
+# microseconds of matchmaking per arrival.
+def arrival_load(rate, seconds=60, seed=0):
+    rng = random.Random(seed)
+    matchmaker = Matchmaker()
+    waits = []
+    spreads = []
+    now = 0.0
+    arrivals = 0
+    busy = 0.0
+    while now < seconds:
+        now += rng.expovariate(rate)
+        player_rating, player_character = rating(rng), character(rng)
+        start = time.perf_counter()
+        matches = matchmaker.poll(now)
+        match = matchmaker.enqueue(arrivals, player_rating, player_character, now)[1]
+        busy += time.perf_counter() - start
+        arrivals += 1
+        if match is not None:
+            matches.append(match)
+        for match in matches:
+            waits.extend(match.waits())
+            spreads.append(match.spread())
+    return waits, spreads, matchmaker.waiting, busy / arrivals * 1e6
+
+def main(size=100000):
+    print(f"standing queue of one character, {ARRIVALS:,} mixed arrivals:")
+    for count in (1000, 10000, size):
+        indexed, matched = standing_queue(count)
+        linear = linear_queue(count)
+        print(f"  {count:7,} waiting: bucketed {indexed:6.1f} us/arrival ({matched:,} matches), "
+              f"linear scan {linear:9.1f} us/arrival")
+    print("Poisson arrivals, 60 simulated seconds:")
+    for rate in (10, 100, 1000, 10000):
+        waits, spreads, waiting, cost = arrival_load(rate)
+        print(f"  {rate:6,}/s: wait p50 {percentile(waits, 50):5.2f}s p99 {percentile(waits, 99):5.2f}s, "
+              f"rating spread mean {sum(spreads) / len(spreads):5.0f} p99 {percentile(spreads, 99):4.0f}, "
+              f"{waiting:4} left waiting, {cost:5.1f} us/arrival")
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:2]])
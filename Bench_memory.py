@@ -0,0 +1,78 @@
+import sys
+import tracemalloc
+from BattleManager import BattleManager
+from CharacterFactory import CharacterFactory
+from Policy import RandomPolicy
+from StatusEffect import Poison, Stun
+
+ROSTER = ["Gladiator", "Voidcaster", "Nightstalker"]
+
+# Pre-slots layouts: the same attributes stored in a per-instance dict.
+class DictCharacter:
+    def __init__(self, name, health, abilities, spec_move, attack_power, defense):
+        self.name = name
+        self.health = health
+        self.status_effects = []
+        self.abilities = abilities
+        self.spec_move = spec_move
+        self.attack_power = attack_power
+        self.defense = defense
+        self.special_move_cooldown = 0
+
+class DictEffect:
+    def __init__(self, name, lasting, damage=None):
+        self.name = name
+        self.lasting = lasting
+        if damage is not None:
+            self.damage = damage
+
+class DictPolicy:
+    def __init__(self, seed):
+        self.seed = seed
+
+class DictBattle:
+    def __init__(self, players, policy):
+        self.players = players
+        self.turn_order = list(players)
+        self.policies = {player: policy for player in players}
+        self.delay = 0
+        self.max_turns = None
+        self.turn = 0
+        self.base_names = {player: player.name for player in players}
+        self.damage_dealt = {player: 0 for player in players}
+        self.damage_taken = {player: 0 for player in players}
+
+# A battle in the current compact layout: slotted characters, effects and manager.
+def compact_battle(seed):
+    players = [CharacterFactory.create_character(name) for name in ROSTER]
+    players[0].status_effects.append(Poison(3))
+    players[1].status_effects.append(Stun(2))
+    return BattleManager(players, policy=RandomPolicy(seed), delay=0)
+
+# The same battle in the previous dict-per-instance layout.
+def dict_battle(seed):
+    players = []
+    for name in ROSTER:
+        t = CharacterFactory.create_character(name)
+        players.append(DictCharacter(t.name, t.health, t.abilities, t.spec_move, t.attack_power, t.defense))
+    players[0].status_effects.append(DictEffect("Poison", 3, damage=3))
+    players[1].status_effects.append(DictEffect("Stun", 2))
+    return DictBattle(players, DictPolicy(seed))
+
+# Bytes allocated per live battle for a builder.
+def bytes_per_battle(builder, battles):
+    tracemalloc.start()
+    start, _ = tracemalloc.get_traced_memory()
+    live = [builder(seed) for seed in range(battles)]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return (current - start) / len(live)
+
+def main(battles=20000):
+    before = bytes_per_battle(dict_battle, battles)
+    after = bytes_per_battle(compact_battle, battles)
+    print(f"dict layout:    {before:,.0f} bytes per live battle")
+    print(f"compact layout: {after:,.0f} bytes per live battle ({after / before:.0%})")
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:2]])
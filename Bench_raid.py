@@ -0,0 +1,58 @@
+import sys
+import time
+import Ruleset
+from BattleManager import BattleManager
+from CharacterFactory import CharacterFactory
+from Display import muted
+from Policy import SPECIAL, RandomPolicy
+
+RAID = Ruleset.load_named("raid")
+HEROES = ["Gladiator", "Voidcaster", "Stormstriker", "Nightstalker", "Stoneguard"]
+
+def percentile(values, percent):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+def raid(heroes, seed):
+    players = [CharacterFactory.create_character("Colossus", RAID)]
+    players += [CharacterFactory.create_character(HEROES[index % len(HEROES)], RAID) for index in range(heroes)]
+    teams = ["raid boss"] + ["heroes"] * heroes
+    return BattleManager(players, policy=RandomPolicy(seed), delay=0, max_turns=5000, teams=teams)
+
+# Per-turn latency of 1 vs N raids, and one area move against N targets
+# batched versus resolved as N single-target moves.
+def main(heroes=50, raids=20):
+    latencies = []
+    wins = 0
+    with muted():
+        for seed in range(raids):
+            battle = raid(heroes, seed)
+            for player in battle.turns():
+                start = time.perf_counter()
+                battle.process_turn(player)
+                latencies.append(time.perf_counter() - start)
+            wins += battle.finish().winner == "heroes"
+        cataclysm = RAID.move("Cataclysm")
+        rounds = 2000
+        batched = single = 0.0
+        for _ in range(rounds):
+            battle = raid(heroes, 0)
+            boss, targets = battle.turn_order[0], list(battle.turn_order[1:])
+            start = time.perf_counter()
+            battle.perform_action(boss, SPECIAL)
+            batched += time.perf_counter() - start
+            boss.special_move_cooldown = 0
+            start = time.perf_counter()
+            for target in targets:
+                boss.special_move_cooldown = 0
+                cataclysm.execute(boss, target)
+                battle.update_alive(target)
+            single += time.perf_counter() - start
+    print(f"1 vs {heroes} raids: {len(latencies):,} turns, heroes won {wins}/{raids}")
+    print(f"turn latency p50 {percentile(latencies, 50) * 1e6:,.1f} us, p99 {percentile(latencies, 99) * 1e6:,.1f} us, "
+          f"max {max(latencies) * 1e6:,.1f} us")
+    print(f"area move on {heroes} targets: batched {batched / rounds * 1e6:,.1f} us, "
+          f"one target at a time {single / rounds * 1e6:,.1f} us")
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:3]])
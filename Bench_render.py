@@ -0,0 +1,38 @@
+import os
+import sys
+import time
+from BattleManager import BattleManager
+from CharacterFactory import CharacterFactory
+from Display import BufferedRenderer, NULL_RENDERER, StructuredRenderer, TerminalRenderer, rendering
+from Policy import RandomPolicy
+
+ROSTER = ["Gladiator", "Voidcaster", "Nightstalker"]
+
+# Turns per second for seeded matches played under a renderer, best of three rounds.
+def turns_per_second(renderer, matches):
+    best = 0
+    for _ in range(3):
+        turns = 0
+        start = time.perf_counter()
+        with rendering(renderer):
+            for seed in range(matches):
+                players = [CharacterFactory.create_character(name) for name in ROSTER]
+                battle = BattleManager(players, policy=RandomPolicy(seed), delay=0, max_turns=500)
+                turns += battle.start_battle().turns
+        best = max(best, turns / (time.perf_counter() - start))
+    return best
+
+# Play the same matches with every renderer, writing text to os.devnull.
+def main(matches=1000):
+    with open(os.devnull, "w") as devnull:
+        renderers = {
+            "null": NULL_RENDERER,
+            "structured": StructuredRenderer(sink=lambda events: None),
+            "buffered terminal": BufferedRenderer(stream=devnull),
+            "terminal": TerminalRenderer(stream=devnull),
+        }
+        for name, renderer in renderers.items():
+            print(f"{name:18} {turns_per_second(renderer, matches):10,.0f} turns/s")
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:2]])
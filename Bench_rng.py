@@ -0,0 +1,39 @@
+import random
+import sys
+import time
+import Ruleset
+from Rng import BattleRng, uniform
+from Simulation import run_matches
+
+ROSTER = ["Gladiator", "Voidcaster", "Nightstalker"]
+
+# Draws per second for a function producing `size` draws per call, best of five rounds.
+def draws_per_second(function, size, draws):
+    calls = max(1, draws // size)
+    best = float("inf")
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(calls):
+            function()
+        best = min(best, time.perf_counter() - start)
+    return calls * size / best
+
+# Compare draw throughput of random.random() with the counter-based battle RNG,
+# one draw at a time and in batches, then the cost of combat rolls per match.
+def main(draws=200000, matches=1000):
+    rng = BattleRng(1)
+    print(f"random.random():      {draws_per_second(random.random, 1, draws):12,.0f} draws/s")
+    print(f"Rng.uniform():        {draws_per_second(lambda: uniform(1, 7, 2), 1, draws):12,.0f} draws/s")
+    print(f"BattleRng.random():   {draws_per_second(rng.random, 1, draws):12,.0f} draws/s")
+    for size in (3, 48, 1024):
+        rate = draws_per_second(lambda: rng.batch(size), size, draws)
+        print(f"{f'BattleRng.batch({size}):':22}{rate:12,.0f} draws/s")
+    for name in ("default", "live"):
+        rules = Ruleset.load_named(name)
+        start = time.perf_counter()
+        for _ in run_matches(ROSTER, matches, seed=0, ruleset=rules):
+            pass
+        print(f"{name} ruleset: {matches / (time.perf_counter() - start):,.0f} matches/s")
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:3]])
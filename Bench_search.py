@@ -0,0 +1,47 @@
+import sys
+import time
+from BattleManager import BattleManager
+from CharacterFactory import CharacterFactory
+from Display import muted
+from Policy import GreedyPolicy, RandomPolicy
+from SearchAI import SearchPolicy
+
+ROSTER = ["Gladiator", "Voidcaster", "Nightstalker"]
+
+# Play battles with one searching player against a greedy and a random player,
+# rotating seats, and report search speed, move latency and win rate.
+def main(battles=30, budget_ms=5):
+    search = SearchPolicy(time_budget=budget_ms / 1000, seed=0)
+    latencies = []
+    wins = 0
+    with muted():
+        for index in range(battles):
+            names = ROSTER[index % 3:] + ROSTER[:index % 3]
+            players = [CharacterFactory.create_character(name) for name in names]
+            policies = [search, GreedyPolicy(), RandomPolicy(index)]
+            battle = BattleManager(players, policy=policies, delay=0, max_turns=300)
+            for player in battle.turns():
+                if battle.slots[player] == 0:
+                    if not battle.begin_turn(player):
+                        continue
+                    start = time.perf_counter()
+                    choice = search.choose_action(battle, player)
+                    latencies.append(time.perf_counter() - start)
+                    target = battle.choose_target(player) if battle.needs_target(player, choice) else None
+                    battle.perform_action(player, choice, target)
+                    battle.end_turn()
+                else:
+                    battle.process_turn(player)
+            wins += battle.finish().winner == names[0]
+    searching = sum(latencies)
+    latencies.sort()
+    table = search.table
+    print(f"{len(latencies)} searched moves at a {budget_ms} ms budget")
+    print(f"nodes/s: {search.nodes / searching:,.0f}   playouts/s: {search.playouts / searching:,.0f}")
+    print(f"move latency p50 {latencies[len(latencies) // 2] * 1e3:.2f} ms, "
+          f"p99 {latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1e3:.2f} ms")
+    print(f"transposition table: {len(table):,} nodes, hit rate {table.hits / max(1, table.hits + table.misses):.0%}")
+    print(f"win rate vs greedy + random: {wins / battles:.0%} (1/3 is an even share)")
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:3]])
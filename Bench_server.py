@@ -0,0 +1,66 @@
+import asyncio
+import json
+import random
+import sys
+import time
+from BattleServer import BattleServer, PLAYERS_PER_MATCH, encode
+from CharacterFactory import CharacterFactory
+from Display import muted
+
+# Simulated client: joins, answers every prompt with a random legal choice and
+# records the time from sending an action to seeing its turn resolved.
+async def client(port, character, seed, round_trips):
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(encode({"type": "join", "name": f"bot{seed}", "character": character}))
+    me = None
+    sent = None
+    while True:
+        line = await reader.readline()
+        if not line:
+            break
+        message = json.loads(line)
+        kind = message["type"]
+        if kind == "start":
+            me = message["you"]
+        elif kind == "choose":
+            reply = {"type": "action", "turn": message["turn"], "action": rng.choice(message["actions"])}
+            if message["targets"]:
+                reply["target"] = rng.choice(message["targets"])
+            sent = time.perf_counter()
+            writer.write(encode(reply))
+        elif kind == "state" and message["player"] == me and sent is not None:
+            round_trips.append(time.perf_counter() - sent)
+            sent = None
+        elif kind == "end":
+            break
+    writer.close()
+
+def percentile(values, percent):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))] if ordered else 0.0
+
+# Run concurrent sessions against a local server and report latency and throughput.
+async def run(sessions, turn_timeout=5.0):
+    server = await BattleServer(port=0, turn_timeout=turn_timeout).start()
+    names = CharacterFactory.character_names()
+    round_trips = []
+    start = time.perf_counter()
+    clients = [client(server.port, names[i % PLAYERS_PER_MATCH], i, round_trips) for i in range(sessions * PLAYERS_PER_MATCH)]
+    await asyncio.gather(*clients)
+    elapsed = time.perf_counter() - start
+    await server.stop()
+    turns = len(server.turn_latencies)
+    print(f"{server.completed} sessions, {turns} turns in {elapsed:.2f}s on one core")
+    print(f"sessions/s per core: {server.completed / elapsed:,.0f}   turns/s: {turns / elapsed:,.0f}")
+    print(f"server turn processing p50 {server.latency_percentile(50) * 1e6:,.0f} us, "
+          f"p99 {server.latency_percentile(99) * 1e6:,.0f} us")
+    print(f"client action round trip p50 {percentile(round_trips, 50) * 1e3:,.2f} ms, "
+          f"p99 {percentile(round_trips, 99) * 1e3:,.2f} ms")
+
+def main(sessions=1000):
+    with muted():
+        asyncio.run(run(sessions))
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:2]])
@@ -0,0 +1,65 @@
+import copy
+import sys
+import time
+import tracemalloc
+from BattleManager import BattleManager
+from CharacterFactory import CharacterFactory
+from Display import muted
+from Policy import RandomPolicy
+from StatusEffect import Poison, ExtraDefense
+
+ROSTER = ["Gladiator", "Voidcaster", "Nightstalker"]
+
+# A 3-player battle a few turns in, with effects on the store and one player defending.
+def midgame_battle():
+    players = [CharacterFactory.create_character(name) for name in ROSTER]
+    battle = BattleManager(players, policy=RandomPolicy(4), delay=0)
+    players[0].status_effects.append(Poison(3))
+    players[1].status_effects.append(ExtraDefense(5))
+    turns = battle.turns()
+    with muted():
+        for _ in range(6):
+            battle.process_turn(next(turns))
+    return battle
+
+# Microseconds per call, best of five rounds.
+def timed(function, rounds):
+    best = float("inf")
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            function()
+        best = min(best, time.perf_counter() - start)
+    return best / rounds * 1e6
+
+# Bytes allocated per live copy made by a function.
+def bytes_per_copy(function, copies):
+    tracemalloc.start()
+    start, _ = tracemalloc.get_traced_memory()
+    live = [function() for _ in range(copies)]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return (current - start) / len(live)
+
+# Fork a 3-player battle with copy.deepcopy, clone() and snapshot()/restore(),
+# then time a rollback loop: snapshot, play one turn, restore.
+def main(rounds=20000):
+    battle = midgame_battle()
+    snapshot = battle.snapshot()
+    print(f"deepcopy:  {timed(lambda: copy.deepcopy(battle), rounds // 10):8.2f} us  "
+          f"{bytes_per_copy(lambda: copy.deepcopy(battle), 2000):8,.0f} bytes per fork")
+    print(f"clone:     {timed(battle.clone, rounds):8.2f} us  "
+          f"{bytes_per_copy(battle.clone, 2000):8,.0f} bytes per fork")
+    print(f"snapshot:  {timed(battle.snapshot, rounds):8.2f} us  "
+          f"{bytes_per_copy(battle.snapshot, 2000):8,.0f} bytes per fork")
+    print(f"restore:   {timed(lambda: battle.restore(snapshot), rounds):8.2f} us")
+    player = battle.turn_order[battle.players.next_position(battle.position)]
+
+    def branch():
+        battle.process_turn(player)
+        battle.restore(snapshot)
+    with muted():
+        print(f"play one turn and roll back: {timed(branch, rounds):8.2f} us")
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:2]])
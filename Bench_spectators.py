@@ -0,0 +1,120 @@
+import asyncio
+import json
+import sys
+import time
+from BattleManager import BattleManager
+from BattleServer import BattleServer, FRAME_LENGTH, PLAYERS_PER_MATCH, encode
+from Bench_server import client
+from CharacterFactory import CharacterFactory
+from Display import muted
+from Policy import GreedyPolicy
+from Spectator import SpectatorFeed, SpectatorView
+
+ROSTER = ["Stoneguard", "Stoneguard", "Gladiator", "Voidcaster", "Nightstalker"]
+MATCHES = 20
+# Simulated subscribers: most poll after every turn, some every 20 turns, a few only at the end.
+SLOW_EVERY = 20
+SLOW_SHARE = 0.15
+STALLED_SHARE = 0.05
+
+# Full state as BattleServer's "state" message sends it, for comparison with delta frames.
+def full_state_bytes(battle, player):
+    return len(encode({"type": "state", "turn": battle.turn, "player": battle.slots[player],
+                       "health": [p.health for p in battle.turn_order]}))
+
+# Play MATCHES battles watched by `subscribers` in-process subscribers, timing
+# the game loop and the subscribers' polls separately.
+def fanout(subscribers):
+    game = polls = 0.0
+    turns = frames = published = full = resyncs = 0
+    for seed in range(MATCHES):
+        players = [CharacterFactory.create_character(name) for name in ROSTER]
+        feed = SpectatorFeed()
+        battle = BattleManager(players, policy=GreedyPolicy(), delay=0, max_turns=500, recorder=feed, seed=seed)
+        readers = [feed.subscribe() for _ in range(subscribers)]
+        slow = int(subscribers * (1 - SLOW_SHARE - STALLED_SHARE))
+        stalled = int(subscribers * (1 - STALLED_SHARE))
+        with muted():
+            for player in battle.turns():
+                start = time.perf_counter()
+                battle.process_turn(player)
+                game += time.perf_counter() - start
+                full += full_state_bytes(battle, player)
+                start = time.perf_counter()
+                for reader in readers[:slow]:
+                    frames += len(reader.poll())
+                if battle.turn % SLOW_EVERY == 0:
+                    for reader in readers[slow:stalled]:
+                        frames += len(reader.poll())
+                polls += time.perf_counter() - start
+            battle.finish()
+        start = time.perf_counter()
+        for reader in readers:
+            frames += len(reader.poll())
+            resyncs += reader.resyncs
+        polls += time.perf_counter() - start
+        turns += battle.turn
+        published += feed.published_bytes
+    return turns, game, frames, polls, resyncs, published, full
+
+# Check one frame stream decodes to the battle's final state.
+def check_view():
+    players = [CharacterFactory.create_character(name) for name in ROSTER]
+    feed = SpectatorFeed()
+    battle = BattleManager(players, policy=GreedyPolicy(), delay=0, max_turns=500, recorder=feed)
+    with muted():
+        battle.start_battle()
+    view = SpectatorView()
+    for frame in feed.subscribe().poll():
+        view.apply(frame)
+    return [p.health for p in view.state().players] == [p.health for p in battle.turn_order]
+
+# Spectator that reads frames until the battle ends, or never reads when stalled.
+async def spectator(port, received, stalled=False):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(encode({"type": "watch"}))
+    json.loads(await reader.readline())
+    while not stalled:
+        prefix = await reader.read(FRAME_LENGTH.size)
+        if not prefix:
+            break
+        prefix += await reader.readexactly(FRAME_LENGTH.size - len(prefix))
+        received.append(len(await reader.readexactly(FRAME_LENGTH.unpack(prefix)[0])))
+    if stalled:
+        await asyncio.sleep(0.5)
+    writer.close()
+
+# One server session played by bots while `watchers` spectators watch it over
+# TCP; every 20th spectator never reads. Returns the session's turns and wall
+# time, the p99 server turn time and the frames and bytes spectators received.
+async def served(watchers):
+    server = await BattleServer(port=0, turn_timeout=5.0).start()
+    names = CharacterFactory.character_names()
+    received = []
+    start = time.perf_counter()
+    bots = asyncio.gather(*[client(server.port, names[i], i, []) for i in range(PLAYERS_PER_MATCH)])
+    while not server.watchable and server.completed == 0:
+        await asyncio.sleep(0)
+    spectators = asyncio.gather(*[spectator(server.port, received, stalled=index % 20 == 0)
+                                  for index in range(watchers)])
+    await bots
+    elapsed = time.perf_counter() - start
+    await spectators
+    await server.stop()
+    return len(server.turn_latencies), elapsed, server.latency_percentile(99), len(received), sum(received)
+
+def main(subscribers=10000):
+    print("in-process fan-out:", "views decode correctly" if check_view() else "VIEW MISMATCH")
+    for count in (0, 100, 1000, subscribers):
+        turns, game, frames, polls, resyncs, published, full = fanout(count)
+        print(f"{count:6} subscribers: game loop {game / turns * 1e6:6.1f} us/turn, "
+              f"{frames / polls if polls else 0:12,.0f} frames/s delivered, {resyncs:5} resyncs, "
+              f"{published / turns:5.1f} bytes/turn in deltas vs {full / turns:5.1f} as full JSON state")
+    for watchers in (0, 50, 200):
+        with muted():
+            turns, elapsed, p99, frames, received = asyncio.run(served(watchers))
+        print(f"server, {watchers:3} TCP spectators: {turns} turns in {elapsed * 1e3:.0f} ms, "
+              f"p99 turn processing {p99 * 1e6:,.0f} us, {frames:,} frames / {received:,} bytes delivered")
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:2]])
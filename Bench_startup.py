@@ -0,0 +1,62 @@
+import os
+import subprocess
+import sys
+import time
+from Simulation import run_match, worker_pool
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+CHOICES = "1\n2\n2\n2\n3\n2\n"  # Gladiator, Voidcaster and Stormstriker, each confirmed.
+ROSTER = ["Gladiator", "Voidcaster", "Nightstalker"]
+HEADLESS = f"from Simulation import run_match; run_match({ROSTER!r}, 'random', 0, max_turns=1)"
+
+# Seconds from launching `python BattleManager.py` with scripted menu choices
+# until the first turn starts.
+def entry_point(fast):
+    command = [sys.executable, "BattleManager.py"] + (["--fast"] if fast else [])
+    start = time.perf_counter()
+    process = subprocess.Popen(command, cwd=HERE, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True,
+                               env=dict(os.environ, PYTHONUNBUFFERED="1"))
+    try:
+        process.stdin.write(CHOICES)
+        process.stdin.flush()
+        for line in process.stdout:
+            if line.rstrip().endswith("'s turn!"):
+                return time.perf_counter() - start
+        raise RuntimeError("The game ended before its first turn")
+    finally:
+        process.kill()
+        process.wait()
+
+# Seconds for a short-lived process that plays one headless turn and exits.
+def headless_process():
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", HEADLESS], cwd=HERE, check=True)
+    return time.perf_counter() - start
+
+# Seconds from creating a worker pool until a worker has played one turn.
+def pool_first_turn(start_method, workers):
+    start = time.perf_counter()
+    pool = worker_pool(workers, start_method)
+    try:
+        pool.apply(run_match, (ROSTER, "random", 0, 1))
+        return time.perf_counter() - start
+    finally:
+        pool.terminate()
+        pool.join()
+
+def best(measure, *args, runs=7):
+    return min(measure(*args) for _ in range(runs))
+
+# Time to first turn for the game, a headless process and pool workers.
+def main(workers=2):
+    print(f"python BattleManager.py          {entry_point(False) * 1000:8.1f} ms  (loading and turn pauses)")
+    print(f"python BattleManager.py --fast   {best(entry_point, True) * 1000:8.1f} ms")
+    print(f"headless one-turn process        {best(headless_process) * 1000:8.1f} ms")
+    for start_method in ("fork", "spawn"):
+        print(f"{start_method + ' pool':33}{best(pool_first_turn, start_method, workers) * 1000:8.1f} ms")
+    # The first forkserver pool starts the server and preloads Prewarm; later pools reuse it.
+    print(f"forkserver pool, cold server     {pool_first_turn('forkserver', workers) * 1000:8.1f} ms")
+    print(f"forkserver pool, warm server     {best(pool_first_turn, 'forkserver', workers) * 1000:8.1f} ms")
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:2]])
@@ -0,0 +1,55 @@
+import os
+import sys
+import tempfile
+import time
+from itertools import combinations
+from CharacterFactory import CharacterFactory
+from MatchStore import MatchStats, MatchStore
+from Simulation import run_match
+
+# Play a pool of matches once, then store them over and over: ingestion rate
+# for several batch sizes, then query latency once the store holds `total` matches.
+def main(total=200000, pool_size=2000):
+    rosters = list(combinations(CharacterFactory.character_names(), 3))
+    played = []
+    for index in range(pool_size):
+        roster = rosters[index % len(rosters)]
+        stats = MatchStats()
+        played.append((roster, run_match(roster, seed=index, recorder=stats), stats.poisoned, index))
+    directory = tempfile.mkdtemp()
+    for batch_size in (1, 100, 2000):
+        path = os.path.join(directory, f"batch{batch_size}.db")
+        count = min(total, 20000 if batch_size > 1 else 2000)
+        with MatchStore(path, batch_size=batch_size) as store:
+            start = time.perf_counter()
+            for index in range(count):
+                store.add(*played[index % pool_size])
+            store.flush()
+            elapsed = time.perf_counter() - start
+        print(f"batch size {batch_size:5}: {count / elapsed:10,.0f} matches/s ingested")
+    path = os.path.join(directory, "history.db")
+    with MatchStore(path) as store:
+        start = time.perf_counter()
+        for index in range(total):
+            store.add(*played[index % pool_size])
+        store.flush()
+        print(f"stored {total:,} matches in {time.perf_counter() - start:.1f} s "
+              f"({os.path.getsize(path) / total:.0f} bytes per match)")
+        queries = {
+            "win_rate(Nightstalker vs Stoneguard)": lambda: store.win_rate("Nightstalker", against=["Stoneguard"]),
+            "  ... poisoned before turn 3": lambda: store.win_rate("Nightstalker", against=["Stoneguard"],
+                                                                   poisoned_before=3),
+            "count(Gladiator, 10-20 turns)": lambda: store.count(["Gladiator"], min_turns=10, max_turns=20),
+            "turn_histogram(Voidcaster wins)": lambda: store.turn_histogram(["Voidcaster"], winner="Voidcaster"),
+            "matches(Stoneguard wins, 100 rows)": lambda: store.matches(["Stoneguard"], winner="Stoneguard"),
+        }
+        for name, query in queries.items():
+            best = float("inf")
+            for _ in range(20):
+                start = time.perf_counter()
+                query()
+                best = min(best, time.perf_counter() - start)
+            print(f"{name:38} {best * 1000:8.3f} ms")
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:3]])
@@ -1,85 +1,161 @@
-from abc import ABC, abstractmethod
-from StatusEffect import Poison, Stun, ExtraDefense
-from Action import AttackAction, DefendAction, GladiatorSpecialMove, VoidcasterSpecialMove, StormstrikerSpecialMove, NightstalkerSpecialMove, StoneguardSpecialMove
-
-# Base class for all characters in the game.
-class Character(ABC):
-    # Initialize character with attributes.
-    def __init__(self, name: str, health: int, abilities: str, spec_move: str, attack_power: int, defense: int):
-        self.name = name
-        self.health = health
-        self.status_effects = []  # List of active status effects.
-        self.abilities = abilities
-        self.spec_move = spec_move
-        self.attack_power = attack_power
-        self.defense = defense
-        self.special_move_cooldown = 0  # Cooldown counter for special move.
-
-    # Abstract method for performing a special move.
-    @abstractmethod
-    def do_special_moves(self, opponent):
-        pass
-
-    # Execute a normal attack on an opponent.
-    def attack_enemy(self, opponent):
-        action = AttackAction()
-        action.execute(self, opponent)
-
-    # Execute a defend action.
-    def defend_yourself(self):
-        action = DefendAction()
-        action.execute(self)
-
-    # Apply a status effect if not already present.
-    def apply_status_effect(self, effect):
-        if not any(isinstance(e, type(effect)) for e in self.status_effects):
-            self.status_effects.append(effect)
-            print(f"{self.name} is now affected by {effect.name}!")
-
-    # Process all active status effects at the start of a turn.
-    def process_status_effects(self):
-        active_effects = []
-        for effect in self.status_effects[:]:
-            effect.exec_turn(self)  # Execute effect logic and print its message.
-            if effect.lasting > 0:
-                active_effects.append(effect)
-            else:
-                print(f"{self.name} is no longer affected by {effect.name}.")
-        self.status_effects = active_effects  # Update active effects list.
-
-    # Check if the special move is ready.
-    def special_move_ready(self):
-        return self.special_move_cooldown == 0
-
-    # Decrement cooldown counters and process status effects.
-    def decrement_cooldowns(self):
-        if self.special_move_cooldown > 0:
-            self.special_move_cooldown -= 1
-        self.process_status_effects()
-
-# Concrete character classes with their specific special moves.
-class Gladiator(Character):
-    def do_special_moves(self, opponent):
-        action = GladiatorSpecialMove()
-        action.execute(self, opponent)
-
-class Voidcaster(Character):
-    def do_special_moves(self, opponent):
-        action = VoidcasterSpecialMove()
-        action.execute(self, opponent)
-
-class Stormstriker(Character):
-    def do_special_moves(self, opponent):
-        action = StormstrikerSpecialMove()
-        action.execute(self, opponent)
-
-class Nightstalker(Character):
-    def do_special_moves(self, opponent):
-        action = NightstalkerSpecialMove()
-        action.execute(self, opponent)
-
-class Stoneguard(Character):
-    def do_special_moves(self, opponent):
-        action = StoneguardSpecialMove()
-        action.execute(self)
-
+from abc import ABC, abstractmethod
+from StatusEffect import Poison, Stun, ExtraDefense, StatusEffectStore
+from Action import ATTACK_ACTION, DEFEND_ACTION, SPECIAL_MOVE_ACTION
+from Display import show
+
+# Base class for all characters in the game.
+# Attributes live in __slots__ so a character has no per-instance dict.
+class Character(ABC):
+    __slots__ = ("name", "health", "status_effects", "abilities", "spec_move", "attack_power", "defense",
+                 "special_move_cooldown")
+    special_action = SPECIAL_MOVE_ACTION  # Shared action used by the special move.
+    attack_action = ATTACK_ACTION  # Shared action used by normal attacks; rulesets with combat rolls replace it.
+    dodge = 0.0  # Chance subtracted from an attacker's accuracy when combat rolls are on.
+
+    # Initialize character with attributes.
+    def __init__(self, name: str, health: int, abilities: str, spec_move: str, attack_power: int, defense: int):
+        self.name = name
+        self.health = health
+        self.abilities = abilities
+        self.spec_move = spec_move
+        self.attack_power = attack_power  # Effective values: status effect modifiers are included.
+        self.defense = defense
+        self.status_effects = StatusEffectStore(owner=self)  # Active status effects, indexed by type.
+        self.special_move_cooldown = 0  # Cooldown counter for special move.
+
+    # True while an effect that blocks actions, like Stun, is active.
+    @property
+    def is_stunned(self):
+        return self.status_effects.blocking > 0
+
+    # Abstract method for performing a special move.
+    @abstractmethod
+    def do_special_moves(self, opponent):
+        pass
+
+    # Execute a normal attack on an opponent, rolling with rng if the ruleset has combat rolls.
+    def attack_enemy(self, opponent, rng=None):
+        self.attack_action.execute(self, opponent, rng)
+
+    # Execute a defend action.
+    def defend_yourself(self):
+        DEFEND_ACTION.execute(self)
+
+    # Apply a status effect following its type's stacking policy
+    # (by default it is ignored if an effect of that type is already present).
+    def apply_status_effect(self, effect):
+        if self.status_effects.apply(effect):
+            show("effect_applied", self.name, effect.name)
+
+    # Process all active status effects at the start of a turn.
+    def process_status_effects(self, rng=None):
+        for effect in self.status_effects.tick(self, rng):
+            show("effect_ended", self.name, effect.name)
+
+    # Independent copy with its own status effects, for search and what-if play.
+    def clone(self):
+        other = object.__new__(type(self))
+        for attribute in Character.__slots__:
+            setattr(other, attribute, getattr(self, attribute))
+        other.status_effects = self.status_effects.clone(other)
+        return other
+
+    # Immutable copy of the state a battle changes, for restore(). Status effects
+    # are shared with the store's previous snapshot while they are unchanged.
+    def snapshot(self):
+        return (self.name, self.health, self.attack_power, self.defense, self.special_move_cooldown,
+                self.status_effects.snapshot())
+
+    # Return to a state taken by snapshot(), undoing Defend's name and defense changes too.
+    def restore(self, snapshot):
+        (self.name, self.health, self.attack_power, self.defense, self.special_move_cooldown, effects) = snapshot
+        self.status_effects.restore(effects)
+
+    # Hashable summary of everything that affects how the battle plays out.
+    def state_key(self):
+        return (self.health, self.defense, self.special_move_cooldown, self.name,
+                tuple(effect.state_key() for effect in self.status_effects))
+
+    # Check if the special move is ready.
+    def special_move_ready(self):
+        return self.special_move_cooldown == 0
+
+    # Decrement cooldown counters and process status effects.
+    def decrement_cooldowns(self):
+        if self.special_move_cooldown > 0:
+            self.special_move_cooldown -= 1
+        self.process_status_effects()
+
+# Special move of a built-in character class, taken from the default ruleset
+# the first time it is looked up. The move then replaces this placeholder on
+# the class, so importing the characters loads no ruleset and later lookups
+# cost nothing extra.
+class DefaultMove:
+    __slots__ = ("character", "owner", "attribute")
+
+    def __init__(self, character):
+        self.character = character
+
+    def __set_name__(self, owner, attribute):
+        self.owner = owner
+        self.attribute = attribute
+
+    def __get__(self, instance, owner=None):
+        from Ruleset import default_ruleset  # Deferred: Ruleset imports Action and StatusEffect.
+        move = default_ruleset().move_for(self.character)
+        setattr(self.owner, self.attribute, move)
+        return move
+
+# Concrete character classes with their special moves from the default ruleset.
+
+class Gladiator(Character):
+    __slots__ = ()
+    special_action = DefaultMove("Gladiator")
+
+    def do_special_moves(self, opponent):
+        action = self.special_action
+        action.execute(self, opponent)
+
+class Voidcaster(Character):
+    __slots__ = ()
+    special_action = DefaultMove("Voidcaster")
+
+    def do_special_moves(self, opponent):
+        action = self.special_action
+        action.execute(self, opponent)
+
+class Stormstriker(Character):
+    __slots__ = ()
+    special_action = DefaultMove("Stormstriker")
+
+    def do_special_moves(self, opponent):
+        action = self.special_action
+        action.execute(self, opponent)
+
+class Nightstalker(Character):
+    __slots__ = ()
+    special_action = DefaultMove("Nightstalker")
+
+    def do_special_moves(self, opponent):
+        action = self.special_action
+        action.execute(self, opponent)
+
+class Stoneguard(Character):
+    __slots__ = ()
+    special_action = DefaultMove("Stoneguard")
+
+    def do_special_moves(self, opponent):
+        action = self.special_action
+        action.execute(self)
+
+# Character defined only in a ruleset; its class is generated by CharacterFactory.
+class RulesetCharacter(Character):
+    __slots__ = ()
+
+    def do_special_moves(self, opponent):
+        action = self.special_action
+        action.execute(self, opponent if action.needs_target else None)
+
+# Built-in character classes by ruleset name.
+CHARACTER_TYPES = {"Gladiator": Gladiator, "Voidcaster": Voidcaster, "Stormstriker": Stormstriker,
+                   "Nightstalker": Nightstalker, "Stoneguard": Stoneguard}
@@ -1,17 +1,71 @@
-from Character import Gladiator, Voidcaster, Stormstriker, Nightstalker, Stoneguard
-
-# Factory class to create character objects.
-class CharacterFactory:
-    @staticmethod
-    def create_character(character_name):
-        character_classes = {
-            "Gladiator": lambda: Gladiator("Gladiator", 100, "Close Combat, Big Physical Damage", "Titan Smash", 25, 12),
-            "Voidcaster": lambda: Voidcaster("Voidcaster", 85, "High Magic Damage", "Arcane Blast", 30, 8),
-            "Stormstriker": lambda: Stormstriker("Stormstriker", 90, "Fast, Ranged Attacker", "Piercing Arrow", 22, 10),
-            "Nightstalker": lambda: Nightstalker("Nightstalker", 75, "High Physical Damage, Stealth", "Shadow Strike", 35, 6),
-            "Stoneguard": lambda: Stoneguard("Stoneguard", 140, "High Defense, Low Attack", "Iron Fortress", 18, 25),
-        }
-        if character_name in character_classes:
-            return character_classes[character_name]()
-        else:
-            raise ValueError(f"Invalid character type: {character_name}")
+from Character import CHARACTER_TYPES, DefaultMove, RulesetCharacter
+
+# Character class for one character in a ruleset, with its constructor
+# arguments. Built-in characters keep their classes; a ruleset that gives one a
+# different move gets a subclass carrying that move (and the ruleset's attack
+# and dodge chance when it has combat rolls), and characters that exist only in
+# the ruleset get a generated class.
+def build_character_class(ruleset, name):
+    spec = ruleset.characters[name]
+    base = CHARACTER_TYPES.get(name, RulesetCharacter)
+    move = ruleset.moves[spec.move]
+    # Read through vars(): base.special_action would resolve a DefaultMove and
+    # load the default ruleset. Until something else loads it, a built-in class
+    # is treated as having a different move, which only costs a subclass.
+    current = vars(base).get("special_action")
+    if isinstance(current, DefaultMove):
+        from Ruleset import loaded_default_ruleset
+        default = loaded_default_ruleset()
+        current = default.move_for(current.character) if default is not None else None
+    if current is not move or ruleset.combat is not None:
+        attributes = {"__slots__": (), "special_action": move}
+        if ruleset.combat is not None:
+            attributes.update(attack_action=ruleset.attack_action, dodge=spec.dodge)
+        base = type(name, (base,), attributes)
+    return base, (spec.name, spec.health, spec.abilities, spec.spec_move, spec.attack_power, spec.defense)
+
+# The default ruleset. Ruleset is imported on first use, so importing the game
+# loads no ruleset (and none of the hashing and pickling modules behind it).
+def default_ruleset():
+    from Ruleset import default_ruleset
+    return default_ruleset()
+
+# Factory class to create character objects.
+# The registry is lazy: nothing is loaded at import, and a character's class is
+# built the first time a character of that name is created from a ruleset.
+class CharacterFactory:
+    _rulesets = {}  # Ruleset digest -> {name: (class, constructor arguments)} for the names used so far.
+    _default = None  # The default ruleset's entry in _rulesets once it is loaded.
+
+    # Create a character by name, from the default ruleset unless another is given.
+    @staticmethod
+    def create_character(character_name, ruleset=None):
+        cls, args = CharacterFactory.resolve(character_name, ruleset)
+        return cls(*args)
+
+    # Class and constructor arguments for a character, built on first use.
+    @staticmethod
+    def resolve(character_name, ruleset=None):
+        classes = CharacterFactory._default if ruleset is None else CharacterFactory._rulesets.get(ruleset.digest)
+        if classes is not None and character_name in classes:
+            return classes[character_name]
+        if ruleset is None:
+            ruleset = default_ruleset()
+            classes = CharacterFactory._default = CharacterFactory._rulesets.setdefault(ruleset.digest, {})
+        else:
+            classes = CharacterFactory._rulesets.setdefault(ruleset.digest, {})
+        if character_name not in ruleset.characters:
+            raise ValueError(f"Invalid character type: {character_name}")
+        entry = classes[character_name] = build_character_class(ruleset, character_name)
+        return entry
+
+    # Names of every character the factory can create.
+    @staticmethod
+    def character_names(ruleset=None):
+        return (ruleset if ruleset is not None else default_ruleset()).character_names()
+
+    # Character classes for a ruleset, resolving every character in it.
+    @staticmethod
+    def classes_for(ruleset=None):
+        ruleset = ruleset if ruleset is not None else default_ruleset()
+        return {name: CharacterFactory.resolve(name, ruleset) for name in ruleset.characters}
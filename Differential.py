@@ -0,0 +1,472 @@
+import io
+import json
+import random
+import sys
+import time
+from collections import namedtuple
+from BattleKernel import BattleKernel, np
+from BattleLog import BattleLogReader, BattleRecorder, DEFENDING_SUFFIX, effect_record
+from BattleManager import BattleManager
+from CharacterFactory import CharacterFactory
+from Display import muted
+from Policy import Policy, GreedyPolicy, RandomPolicy
+from Ruleset import load_named
+from Simulation import worker_pool
+
+# Differential testing of engine variants against the reference BattleManager.
+#
+# A variant is another way to play a battle (rollback, cloning, replaying a
+# log, batched or vectorized resolution, ...) that must reach exactly the same
+# state after every turn. Cases are generated from a run seed and a case index,
+# so workers build their own cases and only counts and divergences travel back.
+# Each worker plays the reference once per case and then every variant; the
+# first turn where a variant's state differs is a Divergence. shrink() reduces
+# a divergent case to a small one that still diverges, and write_log() saves it
+# as a battle log with a JSON description that replay() plays again.
+RULESETS = ("default", "live", "raid")
+POLICIES = ("random", "random", "greedy", "scripted")  # Seeded random play is the most common case.
+DEFAULT_MAX_TURNS = 200
+
+# One generated battle. moves holds one (action draw, target draw) pair per turn
+# for the "scripted" policy and is empty otherwise.
+Case = namedtuple("Case", "ruleset roster seed policy moves max_turns")
+
+# First difference between a variant and the reference: the turn after which
+# the states differ (past the last turn when only the results differ) and the
+# expected and actual state or result.
+Divergence = namedtuple("Divergence", "variant case turn expected actual")
+
+_rulesets = {}
+
+# Ruleset shipped in rulesets/ by name, loaded once per process.
+def ruleset(name):
+    if name not in _rulesets:
+        _rulesets[name] = load_named(name)
+    return _rulesets[name]
+
+# Plays fixed draws: the draws for turn t pick the action and the target the
+# way RandomPolicy's draws do, so a seeded random battle is the scripted battle
+# of its own draws. Draws are looked up by battle.turn, so unlike
+# Policy.ScriptedPolicy it keeps no position and survives clone() and restore().
+# Turns past the end of the moves pick the first option.
+class DrawPolicy(Policy):
+    __slots__ = ("moves",)
+
+    def __init__(self, moves):
+        self.moves = moves
+
+    def _move(self, battle):
+        return self.moves[battle.turn - 1] if battle.turn <= len(self.moves) else (0.0, 0.0)
+
+    def choose_action(self, battle, player):
+        options = self.legal_actions(player)
+        return options[int(self._move(battle)[0] * len(options))]
+
+    def choose_target(self, battle, player, candidates):
+        return candidates[int(self._move(battle)[1] * len(candidates))]
+
+# Wraps a policy and writes its choices down as draws for DrawPolicy.
+class RecordingPolicy(Policy):
+    __slots__ = ("policy", "moves")
+
+    def __init__(self, policy):
+        self.policy = policy
+        self.moves = {}
+
+    def choose_action(self, battle, player):
+        action = self.policy.choose_action(battle, player)
+        options = self.legal_actions(player)
+        self.moves[battle.turn] = [(options.index(action) + 0.5) / len(options), 0.0]
+        return action
+
+    def choose_target(self, battle, player, candidates):
+        target = self.policy.choose_target(battle, player, candidates)
+        index = next(index for index, candidate in enumerate(candidates) if candidate is target)
+        self.moves[battle.turn][1] = (index + 0.5) / len(candidates)
+        return target
+
+# Case number `index` of the run seeded with `seed`.
+def make_case(seed, index, rulesets=RULESETS, max_players=5, max_turns=DEFAULT_MAX_TURNS):
+    rng = random.Random(f"{seed}/{index}")
+    name = rng.choice(rulesets)
+    names = CharacterFactory.character_names(ruleset(name))
+    roster = tuple(rng.choice(names) for _ in range(rng.randint(2, max_players)))
+    policy = rng.choice(POLICIES)
+    moves = tuple((rng.random(), rng.random()) for _ in range(max_turns)) if policy == "scripted" else ()
+    return Case(name, roster, rng.getrandbits(48), policy, moves, max_turns)
+
+# The case's policy for every player.
+def case_policy(case):
+    if case.policy == "random":
+        return RandomPolicy(case.seed)
+    if case.policy == "greedy":
+        return GreedyPolicy()
+    return DrawPolicy(case.moves)
+
+# A fresh battle for a case.
+def build(case, battle_type=BattleManager, policy=None, recorder=None):
+    rules = ruleset(case.ruleset)
+    players = [CharacterFactory.create_character(name, rules) for name in case.roster]
+    return battle_type(players, policy=policy or case_policy(case), delay=0, max_turns=case.max_turns,
+                       recorder=recorder, seed=case.seed)
+
+# Play the next turn the way BattleManager.turns() does; False once the battle is over.
+def play_turn(battle):
+    alive = battle.players
+    if alive.teams_alive <= 1 or battle.turn_limit_reached():
+        return False
+    battle.position = alive.next_position(battle.position)
+    battle.process_turn(battle.turn_order[battle.position])
+    return True
+
+# State of every player as a battle log records it: health, attack power,
+# defense, defending, cooldown and (kind, lasting, value, extra value) for each effect.
+def battle_state(battle):
+    state = []
+    for player in battle.turn_order:
+        effects = []
+        for effect in player.status_effects:
+            kind, value, extra = effect_record(effect)
+            effects.append((kind, effect.lasting, value, extra))
+        state.append((player.health, player.attack_power, player.defense, DEFENDING_SUFFIX in player.name,
+                      player.special_move_cooldown, tuple(effects)))
+    return tuple(state)
+
+# The reference: states after every turn and the result of a plain BattleManager battle.
+def reference(case, battle_type=BattleManager):
+    battle = build(case, battle_type)
+    states = []
+    with muted():
+        while play_turn(battle):
+            states.append(battle_state(battle))
+        return states, battle.finish()
+
+# Snapshot before every turn, play it, roll back and play it again.
+def play_rollback(case):
+    battle = build(case)
+    states = []
+    with muted():
+        while True:
+            snapshot = battle.snapshot()
+            if not play_turn(battle):
+                break
+            battle.restore(snapshot)
+            play_turn(battle)
+            states.append(battle_state(battle))
+        return states, battle.finish()
+
+# Play every turn on a fresh clone of the battle so far.
+def play_clone(case):
+    battle = build(case)
+    states = []
+    with muted():
+        while True:
+            battle = battle.clone()
+            if not play_turn(battle):
+                break
+            states.append(battle_state(battle))
+        return states, battle.finish()
+
+# Record the battle and rebuild the state after every turn from the log.
+def play_log(case):
+    stream = io.BytesIO()
+    battle = build(case, recorder=BattleRecorder(stream, ruleset=ruleset(case.ruleset)))
+    with muted():
+        while play_turn(battle):
+            pass
+        result = battle.finish()
+    reader = BattleLogReader(stream.getvalue())
+    states = []
+    for turn in range(1, reader.turns() + 1):
+        states.append(tuple((player.health, player.attack_power, player.defense, player.defending, player.cooldown,
+                             tuple(tuple(effect) for effect in player.effects))
+                            for player in reader.state_at(turn).players))
+    return states, result
+
+# Resolves area moves one target at a time with execute() instead of one
+# batched execute_many() call.
+class PerTargetBattle(BattleManager):
+    __slots__ = ()
+
+    def strike_all(self, player, action):
+        if player.special_move_cooldown > 0:
+            action.execute(player, None, self.rng)  # Shows the cooldown message and does nothing else.
+            return
+        dealt = 0
+        for target in list(self.targets_for(player)):
+            health = target.health
+            player.special_move_cooldown = 0  # Each execute() puts the move on cooldown.
+            action.execute(player, target, self.rng)
+            damage = health - target.health
+            dealt += damage
+            self.damage_taken[self.slots[target]] += damage
+            self.players.update(target)
+        self.damage_dealt[self.slots[player]] += dealt
+
+def play_per_target(case):
+    return reference(case, PerTargetBattle)
+
+# Health of every player: all that BattleKernel keeps of a battle.
+def healths(state):
+    return tuple(player[0] for player in state)
+
+# One BattleKernel row played turn by turn, for locating divergences.
+def play_kernel(case):
+    kernel = BattleKernel([case.roster], [case.seed], case.policy, case.max_turns)
+    states = []
+    while kernel.active():
+        kernel.step()
+        health = kernel.health[:, 0] if kernel.ids.size else kernel.final_health[0]
+        states.append(tuple(health.tolist()))
+    return states, kernel.results()[0]
+
+# Many cases in as few BattleKernel batches as their shapes allow.
+def play_kernel_many(cases):
+    groups = {}
+    for index, case in enumerate(cases):
+        groups.setdefault((case.policy, case.max_turns, len(case.roster)), []).append(index)
+    results = [None] * len(cases)
+    for (policy, max_turns, _), indexes in groups.items():
+        kernel = BattleKernel([cases[index].roster for index in indexes], [cases[index].seed for index in indexes],
+                              policy, max_turns)
+        for index, result in zip(indexes, kernel.run().results()):
+            results[index] = result
+    return results
+
+def kernel_supports(case):
+    return np is not None and case.ruleset == "default" and case.policy in ("random", "greedy")
+
+# An engine variant. play(case) returns (states after every turn, MatchResult);
+# project(state) is the part of a reference state the variant keeps; supports(case)
+# is False for cases the variant cannot play. play_many(cases), if given, returns
+# only the results of many cases at once, and play() is used just to find the
+# divergent turn of a case whose result differs.
+class Variant:
+    def __init__(self, name, play, project=None, supports=None, play_many=None):
+        self.name = name
+        self.play = play
+        self.project = project
+        self.supports = supports
+        self.play_many = play_many
+
+    def __repr__(self):
+        return f"Variant({self.name!r})"
+
+VARIANTS = {variant.name: variant for variant in [
+    Variant("rollback", play_rollback),
+    Variant("clone", play_clone),
+    Variant("log", play_log),
+    Variant("per_target", play_per_target),
+    Variant("kernel", play_kernel, project=healths, supports=kernel_supports, play_many=play_kernel_many),
+]}
+
+# Variant objects for a list of names or Variant objects; None means all of VARIANTS.
+def resolve(variants):
+    if variants is None:
+        return list(VARIANTS.values())
+    return [VARIANTS[variant] if isinstance(variant, str) else variant for variant in variants]
+
+# First difference between a variant's outcome and the reference outcome, or None.
+def compare(variant, case, expected, actual):
+    expected_states, expected_result = expected
+    states, result = actual
+    project = variant.project
+    for turn, (state, other) in enumerate(zip(expected_states, states), 1):
+        if project is not None:
+            state = project(state)
+        if state != other:
+            return Divergence(variant.name, case, turn, state, other)
+    if len(states) != len(expected_states) or result != expected_result:
+        return Divergence(variant.name, case, min(len(states), len(expected_states)) + 1, expected_result, result)
+    return None
+
+# Play one case with the reference and a variant and compare them.
+def check_case(variant, case):
+    if variant.supports is not None and not variant.supports(case):
+        return None
+    return compare(variant, case, reference(case), variant.play(case))
+
+# Worker entry point: play a chunk of cases with the reference and every variant.
+# Returns the number of cases, the turns checked per variant and the divergences.
+def _check_chunk(task):
+    seed, start, count, variants, rulesets, max_players, max_turns = task
+    cases = [make_case(seed, index, rulesets, max_players, max_turns) for index in range(start, start + count)]
+    expected = [reference(case) for case in cases]
+    turns = {}
+    divergences = []
+    for variant in variants:
+        indexes = [index for index, case in enumerate(cases) if variant.supports is None or variant.supports(case)]
+        if variant.play_many is not None:
+            results = variant.play_many([cases[index] for index in indexes])
+            for index, result in zip(indexes, results):
+                if result != expected[index][1]:
+                    divergence = compare(variant, cases[index], expected[index], variant.play(cases[index]))
+                    divergences.append(divergence or Divergence(variant.name, cases[index],
+                                                                len(expected[index][0]) + 1, expected[index][1], result))
+        else:
+            for index in indexes:
+                divergence = compare(variant, cases[index], expected[index], variant.play(cases[index]))
+                if divergence is not None:
+                    divergences.append(divergence)
+        turns[variant.name] = sum(len(expected[index][0]) for index in indexes)
+    return count, turns, divergences
+
+# Counts and divergences of a differential run so far.
+class DifferentialReport:
+    def __init__(self, variants):
+        self.cases = 0
+        self.turns = {variant.name: 0 for variant in variants}  # Turns compared with the reference, per variant.
+        self.divergences = []
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+
+    # Fold one chunk result into the report.
+    def add(self, count, turns, divergences):
+        self.cases += count
+        for name, checked in turns.items():
+            self.turns[name] += checked
+        self.divergences.extend(divergences)
+        self.elapsed = time.perf_counter() - self.started
+
+    # Variant turns checked in total.
+    def total_turns(self):
+        return sum(self.turns.values())
+
+    def turns_per_second(self):
+        return self.total_turns() / self.elapsed if self.elapsed else 0.0
+
+# Checks generated cases against every variant across a process pool.
+# Cases are dealt out in rounds of chunk_size * round_chunks; the report is
+# streamed after every chunk. Case i of a run is the same for any number of
+# workers, so a divergence found with a pool is reproduced by make_case alone.
+class DifferentialTester:
+    def __init__(self, variants=None, seed=0, workers=None, chunk_size=50, round_chunks=16, rulesets=RULESETS,
+                 max_players=5, max_turns=DEFAULT_MAX_TURNS, start_method=None):
+        self.variants = resolve(variants)
+        self.seed = seed
+        self.workers = workers
+        self.start_method = start_method  # See Simulation.worker_pool.
+        self.chunk_size = chunk_size
+        self.round_chunks = round_chunks
+        self.rulesets = tuple(rulesets)
+        self.max_players = max_players
+        self.max_turns = max_turns
+
+    # Yield the report after every chunk until `cases` cases or `turns` variant
+    # turns have been checked; without either, run until the caller stops.
+    def stream(self, cases=None, turns=None):
+        report = DifferentialReport(self.variants)
+        pool = worker_pool(self.workers, self.start_method) if self.workers != 1 else None
+        start = 0
+        try:
+            while (cases is None or start < cases) and (turns is None or report.total_turns() < turns):
+                tasks = []
+                for _ in range(self.round_chunks):
+                    count = self.chunk_size if cases is None else min(self.chunk_size, cases - start)
+                    if count <= 0:
+                        break
+                    tasks.append((self.seed, start, count, self.variants, self.rulesets, self.max_players,
+                                  self.max_turns))
+                    start += count
+                results = pool.imap_unordered(_check_chunk, tasks) if pool else map(_check_chunk, tasks)
+                for result in results:
+                    report.add(*result)
+                    yield report
+        finally:
+            if pool:
+                pool.terminate()
+                pool.join()
+
+    # Run to the end and return the final report.
+    def run(self, cases=None, turns=None):
+        report = DifferentialReport(self.variants)
+        for report in self.stream(cases, turns):
+            pass
+        return report
+
+# The case with its seeded policy written out as draws, played identically.
+def scripted(case):
+    recording = RecordingPolicy(case_policy(case))
+    battle = build(case, policy=recording)
+    with muted():
+        battle.start_battle()
+    moves = tuple(tuple(recording.moves.get(turn, (0.0, 0.0))) for turn in range(1, case.max_turns + 1))
+    return case._replace(policy="scripted", moves=moves)
+
+# Smaller versions of a case, simplest first.
+def simplifications(case, turn):
+    if case.max_turns > turn:
+        yield case._replace(max_turns=turn, moves=case.moves[:turn])
+    if len(case.roster) > 2:
+        for index in range(len(case.roster)):
+            yield case._replace(roster=case.roster[:index] + case.roster[index + 1:])
+    if case.policy != "scripted":
+        yield scripted(case)
+    for index, move in enumerate(case.moves):
+        if move != (0.0, 0.0):
+            yield case._replace(moves=case.moves[:index] + ((0.0, 0.0),) + case.moves[index + 1:])
+    if case.seed != 0:
+        yield case._replace(seed=0)
+
+# Reduce a divergence to a small case that still diverges: a turn limit at the
+# divergent turn, fewer players, the policy written out as draws and as many
+# draws and the seed set to zero as keep the divergence. variants resolves the
+# divergence's variant name.
+def shrink(divergence, variants=None):
+    variant = {candidate.name: candidate for candidate in resolve(variants)}[divergence.variant]
+    best = divergence
+    changed = True
+    while changed:
+        changed = False
+        for case in simplifications(best.case, best.turn):
+            found = check_case(variant, case)
+            if found is not None:
+                best = found
+                changed = True
+                break
+    return best
+
+# Save a divergence as a battle log of the reference battle at `path` and a
+# JSON description of the case and the difference at path + ".json".
+def write_log(divergence, path):
+    case = divergence.case
+    with open(path, "wb") as stream:
+        battle = build(case, recorder=BattleRecorder(stream, ruleset=ruleset(case.ruleset)))
+        with muted():
+            battle.start_battle()
+    description = {"variant": divergence.variant, "turn": divergence.turn, "case": case._asdict(),
+                   "expected": repr(divergence.expected), "actual": repr(divergence.actual)}
+    with open(path + ".json", "w") as handle:
+        json.dump(description, handle, indent=1)
+
+# Play a case saved by write_log() again; returns its Divergence or None once fixed.
+def replay(path, variants=None):
+    with open(path + ".json") as handle:
+        description = json.load(handle)
+    fields = description["case"]
+    case = Case(fields["ruleset"], tuple(fields["roster"]), fields["seed"], fields["policy"],
+                tuple(tuple(move) for move in fields["moves"]), fields["max_turns"])
+    variant = {candidate.name: candidate for candidate in resolve(variants)}[description["variant"]]
+    return check_case(variant, case)
+
+# Check variant turns until `turns` have passed, printing throughput, then
+# shrink every divergence into a log in the current directory.
+def main(turns=1_000_000, workers=None, seed=0):
+    tester = DifferentialTester(seed=seed, workers=workers)
+    report = None
+    shown = 0
+    for report in tester.stream(turns=turns):
+        if report.total_turns() >= shown + turns // 20:
+            shown = report.total_turns()
+            print(f"{report.cases:9,} cases {shown:12,} turns {report.turns_per_second():10,.0f} turns/s "
+                  f"{len(report.divergences)} divergences")
+    print(", ".join(f"{name}: {checked:,}" for name, checked in report.turns.items()))
+    for number, divergence in enumerate(report.divergences[:10]):
+        small = shrink(divergence)
+        path = f"divergence-{number}.battlelog"
+        write_log(small, path)
+        print(f"{small.variant} diverges after turn {small.turn} of {small.case.roster}: {path}")
+    return report
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:3]])
@@ -0,0 +1,173 @@
+import sys
+from contextlib import contextmanager
+
+# Presentation layer for all game text.
+#
+# Game code never formats text itself: it calls show() with an event kind and
+# the raw values, and the current renderer decides what to do with them. Each
+# kind has a level; the renderer only receives events at or below its level,
+# so a NullRenderer (used by muted()) costs one comparison per event and no
+# string is ever built. Text is formatted from the MESSAGES templates only by
+# the terminal renderers.
+RESULT = 0  # Battle start and outcome.
+ACTION = 1  # Actions, status effects and eliminations.
+DETAIL = 2  # Turn headers and the status block.
+
+# Event kind -> (level, template, field names). A None template means the
+# first value is the template, e.g. a special move's message from the ruleset.
+MESSAGES = {
+    "battle_start": (RESULT, "\nLET THE BATTLE COMMENCE!", ()),
+    "draw": (RESULT, "\nGame Over! The battle ended in a draw after {turns} turns.", ("turns",)),
+    "team_wins": (RESULT, "\nGame Over! Team {team} wins!", ("team",)),
+    "winner": (RESULT, "\nGame Over! {winner} is the winner!", ("winner",)),
+    "turn": (DETAIL, "\n{player}'s turn!", ("player",)),
+    "status_header": (DETAIL, "\nCurrent Battle Status:", ()),
+    "status": (DETAIL, "{player} - HP: {health}", ("player", "health")),
+    "attack": (ACTION, "{attacker} attacks {target} for {damage:.1f} damage!", ("attacker", "target", "damage")),
+    "attack_miss": (ACTION, "{attacker} attacks {target} but misses!", ("attacker", "target")),
+    "eliminated": (ACTION, "{target} has been eliminated!", ("target",)),
+    "defend": (ACTION, "{attacker} is defending! Defense increased.", ("attacker",)),
+    "cooldown": (ACTION, "{move} is on cooldown for {turns} more turns!", ("move", "turns")),
+    "special": (ACTION, None, ("attacker", "target", "count", "move", "damage")),
+    "special_miss": (ACTION, "{attacker}'s {move} misses {target}!", ("attacker", "move", "target")),
+    "effect_applied": (ACTION, "{target} is now affected by {effect}!", ("target", "effect")),
+    "effect_ended": (ACTION, "{target} is no longer affected by {effect}.", ("target", "effect")),
+    "poisoned": (ACTION, "{target} is poisoned! Losing {damage} HP this turn.", ("target", "damage")),
+    "poison_ended": (ACTION, "{target} is no longer poisoned.", ("target",)),
+    "stunned": (ACTION, "{target} is stunned and cannot act!", ("target",)),
+    "defense_up": (ACTION, "{target} gains +{boost} defense for {turns} turns!", ("target", "boost", "turns")),
+    "defense_ended": (ACTION, "{target}'s extra defense has worn off.", ("target",)),
+    "warded": (ACTION, "{target}'s {effect} blocks {damage:.1f} damage!", ("target", "effect", "damage")),
+}
+
+# Same template with field names replaced by positions, which formats faster.
+def positional(template, names):
+    for index, name in enumerate(names):
+        template = template.replace("{" + name, "{" + str(index))
+    return template
+
+TEXT = {kind: None if template is None else positional(template, names)
+        for kind, (_, template, names) in MESSAGES.items()}
+
+# Text of one event.
+def format_event(kind, values):
+    template = TEXT[kind]
+    if template is None:
+        return values[0].format_map(dict(zip(MESSAGES[kind][2], values[1:])))
+    return template.format(*values)
+
+# Fields of one event as a dict, e.g. {"event": "attack", "attacker": "Gladiator", ...}.
+def event_fields(kind, values):
+    _, template, names = MESSAGES[kind]
+    fields = {"event": kind}
+    if template is None:
+        fields["message"], values = values[0], values[1:]
+    fields.update(zip(names, values))
+    return fields
+
+# Base renderer: receives events up to `level` and flushes at the end of every turn.
+class Renderer:
+    level = DETAIL
+
+    def event(self, kind, values):
+        pass
+
+    def flush(self):
+        pass
+
+# Drops everything; show() never calls it.
+class NullRenderer(Renderer):
+    level = -1
+
+# Prints every event as it happens, for interactive play.
+# stream defaults to whatever sys.stdout is at the time of printing.
+class TerminalRenderer(Renderer):
+    def __init__(self, level=DETAIL, stream=None):
+        self.level = level
+        self.stream = stream
+
+    def event(self, kind, values):
+        template = TEXT[kind]
+        text = template.format(*values) if template is not None else format_event(kind, values)
+        print(text, file=self.stream or sys.stdout)
+
+# Collects the text of a turn and writes it in one call when the turn ends.
+class BufferedRenderer(Renderer):
+    def __init__(self, level=DETAIL, stream=None):
+        self.level = level
+        self.stream = stream
+        self.lines = []
+
+    def event(self, kind, values):
+        template = TEXT[kind]
+        self.lines.append(template.format(*values) if template is not None else format_event(kind, values))
+
+    def flush(self):
+        if self.lines:
+            (self.stream or sys.stdout).write("\n".join(self.lines) + "\n")
+            self.lines = []
+
+# Keeps events as dicts for clients that draw their own interface. At the
+# end of every turn the turn's events are passed to `sink` if one is given.
+class StructuredRenderer(Renderer):
+    def __init__(self, level=DETAIL, sink=None):
+        self.level = level
+        self.sink = sink
+        self.events = []
+
+    def event(self, kind, values):
+        self.events.append(event_fields(kind, values))
+
+    def flush(self):
+        if self.sink is not None and self.events:
+            self.sink(self.events)
+            self.events = []
+
+LEVELS = {kind: level for kind, (level, _, _) in MESSAGES.items()}
+NULL_RENDERER = NullRenderer()
+_renderer = TerminalRenderer()
+_level = _renderer.level  # Level of the current renderer, read when it is set.
+
+# Send a game event to the current renderer if its level lets it through.
+def show(kind, *values):
+    if LEVELS[kind] <= _level:
+        _renderer.event(kind, values)
+
+# End of a turn: buffered renderers write out what they collected.
+def flush():
+    if _level >= 0:
+        _renderer.flush()
+
+# True if the current renderer wants events of this level; guards code that
+# would otherwise gather values nobody sees.
+def enabled(level):
+    return level <= _level
+
+def get_renderer():
+    return _renderer
+
+# Make a renderer current; returns the previous one.
+def set_renderer(renderer):
+    global _renderer, _level
+    previous = _renderer
+    _renderer = renderer
+    _level = renderer.level
+    return previous
+
+# Context manager that renders game text with `renderer` for the duration of the block.
+@contextmanager
+def rendering(renderer):
+    previous = set_renderer(renderer)
+    try:
+        yield renderer
+    finally:
+        renderer.flush()
+        set_renderer(previous)
+
+# Return True if game text is currently muted.
+def is_muted():
+    return _level < 0
+
+# Context manager that silences game text for the duration of the block.
+def muted():
+    return rendering(NULL_RENDERER)
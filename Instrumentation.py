@@ -0,0 +1,98 @@
+import time
+from collections import Counter
+from Policy import ATTACK, DEFEND, SPECIAL
+
+# Opt-in timers and counters for the turn loop. BattleManager only calls into
+# an Instrumentation when one is passed in, so disabled runs pay a single
+# `is not None` check per phase.
+#
+# Phases timed per turn:
+#   status_effects   ticking the acting player's effects (begin_turn)
+#   choose_action    the policy's action choice
+#   choose_target    the policy's target choice
+#   action.<kind>    executing attack, defend or special
+# Counters: turns, battles, stunned turns, actions by kind and effect ticks by
+# effect name. Target selections show up as choose_target calls.
+now = time.perf_counter
+ACTION_PHASES = {ATTACK: "action.attack", DEFEND: "action.defend", SPECIAL: "action.special"}
+
+class Instrumentation:
+    def __init__(self):
+        self.seconds = Counter()  # Phase -> total seconds.
+        self.calls = Counter()  # Phase -> number of timed calls.
+        self.counters = Counter()  # Event name -> count.
+
+    # Add the time since `start` to a phase and return the current time so calls can be chained.
+    def record(self, phase, start):
+        end = now()
+        self.seconds[phase] += end - start
+        self.calls[phase] += 1
+        return end
+
+    def count(self, name, amount=1):
+        self.counters[name] += amount
+
+    def reset(self):
+        self.seconds.clear()
+        self.calls.clear()
+        self.counters.clear()
+
+    # Add another instance's snapshot, e.g. from a worker process.
+    def merge(self, snapshot):
+        for phase, stats in snapshot["phases"].items():
+            self.seconds[phase] += stats["seconds"]
+            self.calls[phase] += stats["calls"]
+        self.counters.update(snapshot["counters"])
+
+    # Plain-dict view of everything recorded so far. turns_per_second is how
+    # many turns per second the phase alone would allow.
+    def snapshot(self):
+        turns = self.counters["turns"]
+        phases = {}
+        for phase in sorted(self.seconds):
+            seconds = self.seconds[phase]
+            calls = self.calls[phase]
+            phases[phase] = {
+                "seconds": seconds,
+                "calls": calls,
+                "mean_us": seconds / calls * 1e6 if calls else 0.0,
+                "turns_per_second": turns / seconds if seconds else None,
+            }
+        return {"phases": phases, "counters": dict(sorted(self.counters.items()))}
+
+    def to_json(self):
+        import json  # Deferred: battles import this module, and few of them export JSON.
+        return json.dumps(self.snapshot(), indent=2)
+
+    # Prometheus text exposition format.
+    def to_prometheus(self, prefix="battle"):
+        lines = [
+            f"# HELP {prefix}_phase_seconds_total Time spent in each turn phase.",
+            f"# TYPE {prefix}_phase_seconds_total counter",
+        ]
+        lines += [f'{prefix}_phase_seconds_total{{phase="{phase}"}} {self.seconds[phase]:.9f}' for phase in sorted(self.seconds)]
+        lines += [
+            f"# HELP {prefix}_phase_calls_total Timed calls of each turn phase.",
+            f"# TYPE {prefix}_phase_calls_total counter",
+        ]
+        lines += [f'{prefix}_phase_calls_total{{phase="{phase}"}} {self.calls[phase]}' for phase in sorted(self.calls)]
+        lines += [
+            f"# HELP {prefix}_events_total Turn loop events.",
+            f"# TYPE {prefix}_events_total counter",
+        ]
+        lines += [f'{prefix}_events_total{{event="{name}"}} {self.counters[name]}' for name in sorted(self.counters)]
+        return "\n".join(lines) + "\n"
+
+    # Write to a file: Prometheus text for .prom/.txt, JSON otherwise.
+    def write(self, path):
+        text = self.to_prometheus() if path.endswith((".prom", ".txt")) else self.to_json()
+        with open(path, "w") as output:
+            output.write(text)
+
+    # One line per phase for terminal reports.
+    def report(self):
+        lines = [f"{'phase':<24}{'calls':>10}{'mean us':>10}{'turns/s':>14}"]
+        for phase, stats in self.snapshot()["phases"].items():
+            rate = stats["turns_per_second"]
+            lines.append(f"{phase:<24}{stats['calls']:>10,}{stats['mean_us']:>10.2f}{rate or 0:>14,.0f}")
+        return "\n".join(lines)
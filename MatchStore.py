@@ -0,0 +1,204 @@
+import sqlite3
+from collections import Counter, namedtuple
+from StatusEffect import Poison
+from Simulation import run_match, DEFAULT_MAX_TURNS
+
+# SQLite-backed history of played matches.
+#
+# Every match is one row in `matches` (roster, winner, turns, turn of the
+# first poisoning) plus one row per player in `participants` (damage dealt
+# and taken, turn they were first poisoned). Rows are buffered and written in
+# batches, one transaction per batch. Alongside the raw rows, `outcomes` keeps
+# a match count per (roster, winner, turns, first poison turn); it is updated
+# with the same batch, so win-rate and turn-count questions are answered from
+# a table whose size depends on the number of distinct outcomes, not on the
+# number of matches. Rosters are stored once in `rosters` and referred to by id.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rosters (id INTEGER PRIMARY KEY, names TEXT NOT NULL UNIQUE);
+CREATE TABLE IF NOT EXISTS matches (
+    id INTEGER PRIMARY KEY, roster INTEGER NOT NULL, winner TEXT, turns INTEGER NOT NULL,
+    first_poison INTEGER, seed INTEGER);
+CREATE INDEX IF NOT EXISTS matches_outcome ON matches (roster, winner, turns);
+CREATE TABLE IF NOT EXISTS participants (
+    match INTEGER NOT NULL, slot INTEGER NOT NULL, character TEXT NOT NULL, damage_dealt REAL, damage_taken REAL,
+    poisoned INTEGER, PRIMARY KEY (match, slot)) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS outcomes (
+    roster INTEGER NOT NULL, winner TEXT NOT NULL, turns INTEGER NOT NULL, first_poison INTEGER NOT NULL,
+    matches INTEGER NOT NULL, PRIMARY KEY (roster, winner, turns, first_poison)) WITHOUT ROWID;
+"""
+DRAW = ""  # Winner of a drawn match in `outcomes`; `matches` stores NULL.
+NEVER = 0  # first_poison in `outcomes` for matches without poison; turns start at 1.
+DEFAULT_BATCH_SIZE = 2000
+
+# Wins of one character out of the matches that matched a query.
+WinRate = namedtuple("WinRate", "wins matches rate")
+
+# Recorder for BattleManager that notes the turn each player was first
+# poisoned. It only checks for Poison after actions, so it is much cheaper
+# than a full BattleLog.BattleRecorder.
+class MatchStats:
+    __slots__ = ("poisoned",)
+
+    def __init__(self):
+        self.poisoned = None  # Turn each player (by slot) was first poisoned, or None.
+
+    def started(self, battle):
+        self.poisoned = [None] * len(battle.turn_order)
+
+    def turn_started(self, battle, player):
+        return None
+
+    def action_started(self, battle, player, choice, target):
+        return None
+
+    def record_changes(self, battle, before):
+        poisoned = self.poisoned
+        for slot, player in enumerate(battle.turn_order):
+            if poisoned[slot] is None and player.status_effects.has(Poison):
+                poisoned[slot] = battle.turn
+
+    def finished(self, battle, result):
+        pass
+
+class MatchStore:
+    # path is an SQLite database file, or ":memory:".
+    def __init__(self, path, batch_size=DEFAULT_BATCH_SIZE):
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+        self.batch_size = batch_size
+        self.rosters = {tuple(names.split(",")): roster_id
+                        for roster_id, names in self.connection.execute("SELECT id, names FROM rosters")}
+        self.next_id = self.connection.execute("SELECT coalesce(max(id), 0) + 1 FROM matches").fetchone()[0]
+        self._matches = []
+        self._participants = []
+        self._outcomes = Counter()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.flush()
+        self.connection.close()
+
+    # Id of a roster (character names in seat order), adding it if new.
+    def roster_id(self, names):
+        names = tuple(names)
+        roster_id = self.rosters.get(names)
+        if roster_id is None:
+            cursor = self.connection.execute("INSERT INTO rosters (names) VALUES (?)", (",".join(names),))
+            roster_id = self.rosters[names] = cursor.lastrowid
+        return roster_id
+
+    # Buffer one match. names are the players' names in seat order, poisoned
+    # the turn each was first poisoned (see MatchStats), or None if unknown.
+    def add(self, names, result, poisoned=None, seed=None):
+        match_id = self.next_id
+        self.next_id += 1
+        roster = self.roster_id(names)
+        poisoned = poisoned or [None] * len(names)
+        first_poison = min((turn for turn in poisoned if turn is not None), default=None)
+        self._matches.append((match_id, roster, result.winner, result.turns, first_poison, seed))
+        for slot, (name, turn) in enumerate(zip(names, poisoned)):
+            self._participants.append((match_id, slot, name, result.damage_dealt.get(name),
+                                       result.damage_taken.get(name), turn))
+        winner = DRAW if result.winner is None else result.winner
+        self._outcomes[roster, winner, result.turns, NEVER if first_poison is None else first_poison] += 1
+        if len(self._matches) >= self.batch_size:
+            self.flush()
+
+    # Write buffered matches in one transaction.
+    def flush(self):
+        if not self._matches:
+            return
+        with self.connection:
+            self.connection.executemany("INSERT INTO matches VALUES (?, ?, ?, ?, ?, ?)", self._matches)
+            self.connection.executemany("INSERT INTO participants VALUES (?, ?, ?, ?, ?, ?)", self._participants)
+            self.connection.executemany(
+                "INSERT INTO outcomes VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT DO UPDATE SET matches = matches + excluded.matches",
+                [key + (count,) for key, count in self._outcomes.items()])
+        self._matches = []
+        self._participants = []
+        self._outcomes = Counter()
+
+    # Simulate matches with consecutive seeds and store them; returns the number stored.
+    def simulate(self, character_names, count, policy="random", seed=0, max_turns=DEFAULT_MAX_TURNS, ruleset=None):
+        for index in range(count):
+            stats = MatchStats()
+            result = run_match(character_names, policy, seed + index, max_turns, recorder=stats, ruleset=ruleset)
+            self.add(character_names, result, stats.poisoned, seed + index)
+        return count
+
+    # Ids of stored rosters that include every one of the characters.
+    def _roster_ids(self, characters):
+        wanted = set(characters)
+        return [roster_id for names, roster_id in self.rosters.items() if wanted <= set(names)]
+
+    # WHERE clause shared by `outcomes` and `matches` (whose draws and
+    # unpoisoned matches hold NULL, which BETWEEN and = never match).
+    def _where(self, characters, winner, min_turns, max_turns, poisoned_before):
+        roster_ids = self._roster_ids(characters)
+        clauses = [f"roster IN ({','.join('?' * len(roster_ids))})"]
+        arguments = list(roster_ids)
+        if winner is not None:
+            clauses.append("winner = ?")
+            arguments.append(winner)
+        if min_turns is not None:
+            clauses.append("turns >= ?")
+            arguments.append(min_turns)
+        if max_turns is not None:
+            clauses.append("turns <= ?")
+            arguments.append(max_turns)
+        if poisoned_before is not None:
+            clauses.append("first_poison BETWEEN 1 AND ?")
+            arguments.append(poisoned_before - 1)
+        return " AND ".join(clauses), arguments
+
+    # Number of stored matches with all the characters in the roster and the
+    # given winner, turn range and first poisoning before a turn.
+    def count(self, characters=(), winner=None, min_turns=None, max_turns=None, poisoned_before=None):
+        self.flush()
+        where, arguments = self._where(characters, winner, min_turns, max_turns, poisoned_before)
+        return self.connection.execute(f"SELECT coalesce(sum(matches), 0) FROM outcomes WHERE {where}",
+                                       arguments).fetchone()[0]
+
+    # Win rate of a character in matches against the given opponents, e.g.
+    # win_rate("Nightstalker", against=["Stoneguard"], poisoned_before=3).
+    def win_rate(self, character, against=(), min_turns=None, max_turns=None, poisoned_before=None):
+        self.flush()
+        where, arguments = self._where([character, *against], None, min_turns, max_turns, poisoned_before)
+        matches, wins = self.connection.execute(
+            f"SELECT coalesce(sum(matches), 0), coalesce(sum(CASE WHEN winner = ? THEN matches END), 0) "
+            f"FROM outcomes WHERE {where}", [character, *arguments]).fetchone()
+        return WinRate(wins, matches, wins / matches if matches else 0.0)
+
+    # Number of matches per turn count.
+    def turn_histogram(self, characters=(), winner=None):
+        self.flush()
+        where, arguments = self._where(characters, winner, None, None, None)
+        return dict(self.connection.execute(
+            f"SELECT turns, sum(matches) FROM outcomes WHERE {where} GROUP BY turns ORDER BY turns", arguments))
+
+    # Raw rows (id, roster names, winner, turns, first poison turn, seed) of
+    # matching matches, read through the (roster, winner, turns) index in its order.
+    def matches(self, characters=(), winner=None, min_turns=None, max_turns=None, poisoned_before=None, limit=100):
+        self.flush()
+        where, arguments = self._where(characters, winner, min_turns, max_turns, poisoned_before)
+        names = {roster_id: names for names, roster_id in self.rosters.items()}
+        rows = self.connection.execute(
+            f"SELECT id, roster, winner, turns, first_poison, seed FROM matches WHERE {where} LIMIT ?",
+            arguments + [limit])
+        return [(match_id, names[roster], winner, turns, first_poison, seed)
+                for match_id, roster, winner, turns, first_poison, seed in rows]
+
+    # Per-player rows (slot, character, damage dealt, damage taken, poisoned turn) of one match.
+    def participants(self, match_id):
+        self.flush()
+        return self.connection.execute(
+            "SELECT slot, character, damage_dealt, damage_taken, poisoned FROM participants WHERE match = ? "
+            "ORDER BY slot", (match_id,)).fetchall()
@@ -0,0 +1,341 @@
+import math
+import random
+import sys
+from collections import deque
+from itertools import islice
+from CharacterFactory import CharacterFactory
+from Simulation import run_match, DEFAULT_MAX_TURNS
+
+# Matchmaking: queued players are grouped into 3-player battles by rating and
+# chosen character, and every result updates their Elo ratings.
+#
+# The queue is indexed by rating bucket, then by character: each bucket keeps
+# one FIFO deque of tickets per character, plus one for players who will play
+# any character. A new ticket looks for partners in its own bucket and then in
+# the buckets either side of it, nearest first, taking the longest-waiting
+# ticket of each character it still needs. That is at most a fixed number of
+# deque heads however long the queue is, so forming a match costs the same
+# with ten waiting players or a hundred thousand. Matched and cancelled tickets
+# stay in their deques and are dropped when they reach the head.
+#
+# The rating gap a ticket accepts starts at base_window and widens with its
+# waiting time up to max_window. A ticket that finds no match is retried each
+# time its window has grown by another bucket, so each ticket is retried a
+# bounded number of times instead of the whole queue being rescanned.
+DEFAULT_RATING = 1500.0
+DEFAULT_K = 32.0
+PROVISIONAL_GAMES = 10  # Games played with double K, so new ratings settle quickly.
+PLAYERS_PER_MATCH = 3
+BUCKET_WIDTH = 50.0
+BASE_WINDOW = 100.0  # Rating gap accepted straight away.
+WIDEN_PER_SECOND = 25.0  # Extra gap accepted per second waited.
+MAX_WINDOW = 600.0
+
+# Probability that a player rated `rating` beats one rated `other`.
+def expected_score(rating, other):
+    return 1.0 / (1.0 + 10.0 ** ((other - rating) / 400.0))
+
+# Elo ratings by player. A free-for-all battle counts as one game between each
+# pair of its players: the winner beats everyone, the losers draw with each
+# other, and a drawn battle is a draw for every pair. Each player's change is
+# scaled by 1 / (players - 1), so one battle moves a rating about as far as
+# one game of chess.
+class Ratings:
+    def __init__(self, k=DEFAULT_K, initial=DEFAULT_RATING, provisional_games=PROVISIONAL_GAMES):
+        self.k = k
+        self.initial = initial
+        self.provisional_games = provisional_games
+        self.ratings = {}
+        self.games = {}
+
+    def rating(self, player):
+        return self.ratings.get(player, self.initial)
+
+    # Update the players of one battle; winner is one of them, or None on a draw.
+    # Returns each player's rating change.
+    def update(self, players, winner):
+        ratings = [self.rating(player) for player in players]
+        scale = 1.0 / (len(players) - 1)
+        changes = []
+        for player, rating in zip(players, ratings):
+            score = expected = 0.0
+            for other, other_rating in zip(players, ratings):
+                if other is player:
+                    continue
+                score += 1.0 if player == winner else 0.0 if other == winner else 0.5
+                expected += expected_score(rating, other_rating)
+            games = self.games.get(player, 0)
+            k = self.k * 2 if games < self.provisional_games else self.k
+            changes.append(k * scale * (score - expected))
+            self.games[player] = games + 1
+        for player, rating, change in zip(players, ratings, changes):
+            self.ratings[player] = rating + change
+        return changes
+
+    # The best-rated players as (player, rating), highest first.
+    def leaderboard(self, count=10):
+        return sorted(self.ratings.items(), key=lambda item: -item[1])[:count]
+
+# One queued player. character is None for a player who will play any
+# character; it is filled in when the ticket is matched.
+class Ticket:
+    __slots__ = ("player", "character", "rating", "enqueued", "bucket", "active")
+
+    def __init__(self, player, character, rating, enqueued, bucket):
+        self.player = player
+        self.character = character
+        self.rating = rating
+        self.enqueued = enqueued
+        self.bucket = bucket
+        self.active = True  # False once matched or cancelled.
+
+# Tickets grouped into one battle, with the time the match was formed.
+class Match:
+    __slots__ = ("tickets", "formed")
+
+    def __init__(self, tickets, formed):
+        self.tickets = tickets
+        self.formed = formed
+
+    def players(self):
+        return [ticket.player for ticket in self.tickets]
+
+    def characters(self):
+        return [ticket.character for ticket in self.tickets]
+
+    # Gap between the highest and lowest rating in the match.
+    def spread(self):
+        ratings = [ticket.rating for ticket in self.tickets]
+        return max(ratings) - min(ratings)
+
+    # Seconds each player waited in the queue.
+    def waits(self):
+        return [self.formed - ticket.enqueued for ticket in self.tickets]
+
+# Rating- and character-indexed queue of players waiting for a battle.
+# Times are seconds on any clock the caller likes, passed in as `now`.
+class Matchmaker:
+    def __init__(self, characters=None, players_per_match=PLAYERS_PER_MATCH, bucket_width=BUCKET_WIDTH,
+                 base_window=BASE_WINDOW, widen_per_second=WIDEN_PER_SECOND, max_window=MAX_WINDOW):
+        self.characters = list(characters) if characters is not None else CharacterFactory.character_names()
+        if players_per_match > len(self.characters):
+            raise ValueError("A match needs a different character for every player")
+        self.players_per_match = players_per_match
+        self.bucket_width = bucket_width
+        self.base_window = base_window
+        self.widen_per_second = widen_per_second
+        self.max_window = max_window
+        self.reach = math.ceil(max_window / bucket_width) + 1  # Buckets searched either side.
+        self.buckets = {}  # Bucket number -> {character or None: deque of tickets}.
+        self.retries = deque()  # (time, ticket) for tickets whose window widens by a bucket then.
+        self.waiting = 0
+        self.matched = 0
+
+    # Rating gap a ticket accepts at time now.
+    def window(self, ticket, now):
+        return min(self.max_window, self.base_window + self.widen_per_second * (now - ticket.enqueued))
+
+    # Queue a player and try to match them straight away.
+    # Returns (ticket, match), where match is None if the player is still waiting.
+    def enqueue(self, player, rating, character=None, now=0.0):
+        if character is not None and character not in self.characters:
+            raise ValueError(f"Invalid character: {character}")
+        ticket = Ticket(player, character, rating, now, int(rating // self.bucket_width))
+        match = self._match(ticket, now)
+        if match is None:
+            self._wait(ticket, now)
+        return ticket, match
+
+    # Take a waiting player out of the queue.
+    def cancel(self, ticket):
+        if ticket.active:
+            ticket.active = False
+            self.waiting -= 1
+
+    # Retry the tickets whose windows have widened since they were last tried.
+    # Returns the matches formed.
+    def poll(self, now):
+        matches = []
+        retries = self.retries
+        while retries and retries[0][0] <= now:
+            _, ticket = retries.popleft()
+            if not ticket.active:
+                continue
+            match = self._match(ticket, now)
+            if match is None:
+                self._schedule(ticket, now)
+            else:
+                self.waiting -= 1
+                matches.append(match)
+        return matches
+
+    def _wait(self, ticket, now):
+        by_character = self.buckets.get(ticket.bucket)
+        if by_character is None:
+            by_character = self.buckets[ticket.bucket] = {}
+        queue = by_character.get(ticket.character)
+        if queue is None:
+            queue = by_character[ticket.character] = deque()
+        queue.append(ticket)
+        self.waiting += 1
+        self._schedule(ticket, now)
+
+    # Retry the ticket once its window has grown by one more bucket.
+    def _schedule(self, ticket, now):
+        if self.window(ticket, now) < self.max_window and self.widen_per_second > 0:
+            self.retries.append((now + self.bucket_width / self.widen_per_second, ticket))
+
+    # Bucket numbers within reach of a bucket, nearest first.
+    def _nearby(self, bucket):
+        yield bucket
+        for distance in range(1, self.reach):
+            yield bucket - distance
+            yield bucket + distance
+
+    # Find partners for a ticket, nearest buckets first, and form the match if
+    # there are enough. Adding a partner must keep the match's rating spread
+    # within the window of either the ticket or the partner, whichever is wider,
+    # so partners are checked against each other as well as the ticket.
+    def _match(self, ticket, now):
+        needed = self.players_per_match - 1
+        taken = set() if ticket.character is None else {ticket.character}
+        window = self.window(ticket, now)
+        partners = []
+        low = high = ticket.rating  # Rating range of the ticket and the partners picked so far.
+        buckets = self.buckets
+        for number in self._nearby(ticket.bucket):
+            by_character = buckets.get(number)
+            if by_character is None:
+                continue
+            for character, queue in by_character.items():
+                if character in taken:
+                    continue
+                while queue and not queue[0].active:
+                    queue.popleft()
+                if not queue:
+                    continue
+                if character is None:
+                    # Players who take any character may fill every seat left.
+                    wanted = needed - len(partners)
+                    candidates = [other for other in islice(queue, 4 * (wanted + 1))
+                                  if other.active and other is not ticket and other not in partners][:wanted]
+                else:
+                    candidates = (queue[0],)
+                for candidate in candidates:
+                    rating = candidate.rating
+                    if max(high, rating) - min(low, rating) > max(window, self.window(candidate, now)):
+                        break
+                    low, high = min(low, rating), max(high, rating)
+                    partners.append(candidate)
+                    if character is not None:
+                        taken.add(character)
+                    if len(partners) == needed:
+                        return self._form(ticket, partners, now)
+        return None
+
+    # Take the tickets out of the queue, give players who take any character
+    # the characters nobody chose, and return the Match, players in the order
+    # they queued.
+    def _form(self, ticket, partners, now):
+        tickets = sorted(partners + [ticket], key=lambda other: other.enqueued)
+        for other in tickets:
+            other.active = False
+            self._prune(other.bucket, other.character)
+        chosen = {other.character for other in tickets}
+        free = (character for character in self.characters if character not in chosen)
+        for other in tickets:
+            if other.character is None:
+                other.character = next(free)
+        self.waiting -= len(partners)
+        self.matched += 1
+        return Match(tickets, now)
+
+    # Drop inactive tickets from the head of a deque, and the deque and its
+    # bucket once they are empty.
+    def _prune(self, bucket, character):
+        by_character = self.buckets.get(bucket)
+        queue = by_character.get(character) if by_character is not None else None
+        if queue is None:
+            return
+        while queue and not queue[0].active:
+            queue.popleft()
+        if not queue:
+            del by_character[character]
+            if not by_character:
+                del self.buckets[bucket]
+
+# Queues players by their current rating, plays the battles the matchmaker
+# forms and rates the results. Each player's battles are played by the policy
+# spec in `policies` (see Simulation.make_policy), or by `policy` if they have
+# none; the n-th battle is played with seed + n.
+class MatchmakingService:
+    def __init__(self, matchmaker=None, ratings=None, policy="random", policies=None, seed=0,
+                 max_turns=DEFAULT_MAX_TURNS):
+        self.matchmaker = matchmaker if matchmaker is not None else Matchmaker()
+        self.ratings = ratings if ratings is not None else Ratings()
+        self.policy = policy
+        self.policies = policies if policies is not None else {}
+        self.seed = seed
+        self.max_turns = max_turns
+        self.played = 0
+
+    # Queue a player; returns the Match if one formed straight away.
+    def queue(self, player, character=None, now=0.0):
+        return self.matchmaker.enqueue(player, self.ratings.rating(player), character, now)[1]
+
+    def poll(self, now):
+        return self.matchmaker.poll(now)
+
+    # Play a formed match, update its players' ratings and return the MatchResult.
+    def play(self, match):
+        players = match.players()
+        characters = match.characters()
+        result = run_match(characters, [self.policies.get(player, self.policy) for player in players],
+                           self.seed + self.played, self.max_turns)
+        self.played += 1
+        winner = players[characters.index(result.winner)] if result.winner is not None else None
+        self.ratings.update(players, winner)
+        return result
+
+def percentile(values, percent):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))] if ordered else 0.0
+
+# Simulated population: half the players are played by the greedy policy and
+# half by the random one; most have a favourite character, a fifth take any.
+# Idle players queue at random times and go back to idle after their battle.
+def main(players=300, battles=3000, seed=0):
+    rng = random.Random(seed)
+    names = CharacterFactory.character_names()
+    policies = {f"player{index}": "greedy" if index % 2 else "random" for index in range(players)}
+    favourites = {player: rng.choice(names) if rng.random() < 0.8 else None for player in policies}
+    service = MatchmakingService(policies=policies, seed=seed)
+    idle = list(policies)
+    rng.shuffle(idle)
+    now = 0.0
+    waits = []
+    spreads = []
+    while service.played < battles:
+        now += rng.expovariate(players / 10)  # Each idle player queues about every ten seconds.
+        matches = service.poll(now)
+        if idle:
+            player = idle.pop(rng.randrange(len(idle)))
+            match = service.queue(player, favourites[player], now)
+            if match is not None:
+                matches.append(match)
+        for match in matches:
+            service.play(match)
+            waits.extend(match.waits())
+            spreads.append(match.spread())
+            idle.extend(match.players())
+    ratings = service.ratings
+    for policy in ("greedy", "random"):
+        rated = [ratings.rating(player) for player, spec in policies.items() if spec == policy]
+        print(f"{policy:6} players: mean rating {sum(rated) / len(rated):7.1f}")
+    print(f"{battles} battles: wait p50 {percentile(waits, 50):.1f}s, p99 {percentile(waits, 99):.1f}s, "
+          f"mean rating spread {sum(spreads) / len(spreads):.0f}")
+    for player, rating in ratings.leaderboard(5):
+        print(f"{player:12} {policies[player]:6} {rating:7.1f}")
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:3]])
@@ -0,0 +1,136 @@
+import random
+from Rng import uniform
+from Display import flush
+
+# Action choices shared by every policy.
+ATTACK = 1
+DEFEND = 2
+SPECIAL = 3
+
+# Rng lanes used by RandomPolicy for its two decisions each turn.
+ACTION_LANE = 0
+TARGET_LANE = 1
+
+# Base class for decision policies used by BattleManager.
+# A policy picks an action (1, 2 or 3) and a target from the candidates list.
+class Policy:
+    __slots__ = ()
+
+    def choose_action(self, battle, player):
+        raise NotImplementedError
+
+    def choose_target(self, battle, player, candidates):
+        raise NotImplementedError
+
+    # Actions the player is currently allowed to take.
+    @staticmethod
+    def legal_actions(player):
+        if player.special_move_cooldown == 0:
+            return [ATTACK, DEFEND, SPECIAL]
+        return [ATTACK, DEFEND]
+
+# Interactive policy: reads choices from the terminal with input().
+class HumanPolicy(Policy):
+    __slots__ = ()
+
+    def choose_action(self, battle, player):
+        flush()  # Show the turn so far before the menu.
+        print("\nChoose an action:")
+        print("[1] Attack")
+        print("[2] Defend")
+        if player.special_move_cooldown == 0:
+            print("[3] Special Move")
+        else:
+            print(f"[3] Special Move (Cooldown: {player.special_move_cooldown} turns)")
+        while True:
+            try:
+                choice = int(input("Enter action (1, 2, or 3): ").strip())
+                if choice == SPECIAL and player.special_move_cooldown > 0:
+                    print(f"{player.name}'s special move is on cooldown!")
+                    continue
+                if choice in [ATTACK, DEFEND, SPECIAL]:
+                    return choice
+                else:
+                    print("Invalid choice. Please enter 1, 2, or 3.")
+            except ValueError:
+                print("Invalid input. Please enter a number.")
+
+    def choose_target(self, battle, player, candidates):
+        print("\nSelect a target:")
+        for idx, opponent in enumerate(candidates):
+            print(f"[{idx+1}] {opponent.name} - HP: {opponent.health}")
+        while True:
+            try:
+                choice = int(input("Enter target number: ")) - 1
+                if 0 <= choice < len(candidates):
+                    return candidates[choice]
+            except ValueError:
+                pass
+            print("Invalid selection, try again.")
+
+# Uniformly random legal action and target, reproducible from a seed.
+# Draws are keyed by the battle's turn number rather than a generator state,
+# so BattleKernel can make exactly the same choices for the same seed.
+class RandomPolicy(Policy):
+    __slots__ = ("seed",)
+
+    def __init__(self, seed=None):
+        self.seed = seed if seed is not None else random.getrandbits(64)
+
+    def choose_action(self, battle, player):
+        options = self.legal_actions(player)
+        return options[int(uniform(self.seed, battle.turn, ACTION_LANE) * len(options))]
+
+    def choose_target(self, battle, player, candidates):
+        return candidates[int(uniform(self.seed, battle.turn, TARGET_LANE) * len(candidates))]
+
+# Uses the special move whenever it is ready, otherwise attacks.
+# Always targets the opponent with the lowest health.
+class GreedyPolicy(Policy):
+    __slots__ = ()
+
+    def choose_action(self, battle, player):
+        if player.special_move_cooldown == 0:
+            return SPECIAL
+        return ATTACK
+
+    def choose_target(self, battle, player, candidates):
+        return min(candidates, key=lambda p: p.health)
+
+# Replays a fixed list of (action, target) steps for one player.
+# The target is an index into the candidates or a character name; once the
+# script runs out the fallback policy takes over.
+class ScriptedPolicy(Policy):
+    __slots__ = ("script", "position", "fallback", "_pending_target")
+
+    def __init__(self, script, fallback=None):
+        self.script = list(script)
+        self.position = 0
+        self.fallback = fallback if fallback is not None else GreedyPolicy()
+        self._pending_target = None
+
+    def choose_action(self, battle, player):
+        if self.position >= len(self.script):
+            self._pending_target = None
+            return self.fallback.choose_action(battle, player)
+        step = self.script[self.position]
+        self.position += 1
+        if isinstance(step, int):
+            action, target = step, None
+        else:
+            action, target = step
+        if action not in self.legal_actions(player):
+            raise ValueError(f"Scripted action {action} is not legal for {player.name}")
+        self._pending_target = target
+        return action
+
+    def choose_target(self, battle, player, candidates):
+        target, self._pending_target = self._pending_target, None
+        if target is None:
+            return self.fallback.choose_target(battle, player, candidates)
+        if isinstance(target, str):
+            for candidate in candidates:
+                if candidate.name.replace(" (Defending) ", "") == target:
+                    return candidate
+            raise ValueError(f"Scripted target {target} is not available")
+        return candidates[target]
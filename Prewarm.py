@@ -0,0 +1,20 @@
+from BattleManager import BattleManager
+from CharacterFactory import CharacterFactory
+from Display import muted
+from Policy import RandomPolicy
+import Simulation  # Loaded here so workers find run_match imported.
+
+# Imported for its side effect: it warms the importing process up for battles.
+# Simulation.worker_pool(..., start_method="forkserver") preloads this module in
+# the fork server, so every worker forked from it starts with the game imported,
+# the default ruleset loaded and every default character and move resolved.
+
+# Resolve every default character and play one turn, so the code paths the
+# first real turn takes are already loaded.
+def warm():
+    players = [CharacterFactory.create_character(name) for name in CharacterFactory.character_names()]
+    battle = BattleManager(players, policy=RandomPolicy(0), delay=0, max_turns=1)
+    with muted():
+        battle.start_battle()
+
+warm()
@@ -0,0 +1,97 @@
+# Counter-based random numbers: every draw is a pure function of
+# (seed, counter, lane), so the object engine and the vectorized kernel can
+# reproduce each other's decisions without sharing generator state.
+MASK64 = (1 << 64) - 1
+GOLDEN_GAMMA = 0x9E3779B97F4A7C15
+LANES = 16  # Independent streams per counter value.
+TO_UNIT = 1.0 / (1 << 53)
+
+# SplitMix64 finalizer.
+def mix64(x):
+    x = (x + GOLDEN_GAMMA) & MASK64
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & MASK64
+    return x ^ (x >> 31)
+
+# Uniform float in [0, 1) for one (seed, counter, lane) triple.
+def uniform(seed, counter, lane=0):
+    x = mix64((mix64(seed & MASK64) + counter * LANES + lane) & MASK64)
+    return (x >> 11) * TO_UNIT
+
+# NumPy version of mix64 for uint64 arrays.
+def mix64_array(x):
+    import numpy as np
+    return _mix64_in_place(x + np.uint64(GOLDEN_GAMMA))
+
+# The rest of mix64_array, overwriting x, which already includes GOLDEN_GAMMA.
+def _mix64_in_place(x):
+    import numpy as np
+    shifted = x >> np.uint64(30)
+    x ^= shifted
+    x *= np.uint64(0xBF58476D1CE4E5B9)
+    x ^= np.right_shift(x, np.uint64(27), out=shifted)
+    x *= np.uint64(0x94D049BB133111EB)
+    x ^= np.right_shift(x, np.uint64(31), out=shifted)
+    return x
+
+# NumPy version of uniform for arrays of seeds and counters.
+def uniform_array(seeds, counters, lane=0):
+    import numpy as np
+    return uniform_keyed_array(mix64_array(np.asarray(seeds, dtype=np.uint64)), counters, lane)
+
+# uniform_array for seeds already mixed by mix64_array, for callers that draw
+# from the same seeds many times. `out` is an optional float64 array shaped
+# like keys that receives the draws, for callers that reuse one buffer.
+def uniform_keyed_array(keys, counters, lane=0, out=None):
+    import numpy as np
+    offset = np.asarray(counters, dtype=np.uint64) * np.uint64(LANES) + np.uint64(lane + GOLDEN_GAMMA)
+    x = _mix64_in_place(np.add(keys, offset, out=None if out is None else out.view(np.uint64)))
+    x >>= np.uint64(11)
+    return np.multiply(x, TO_UNIT, out=x.view(np.float64))
+
+COMBAT_LANE = LANES - 1  # Combat rolls; policies use the low lanes.
+NUMPY_BATCH = 32  # Batches at least this large are drawn with NumPy when it is installed.
+
+# Per-battle random numbers for combat rolls (hit, critical hit, damage
+# variance). Draw n of a battle is uniform(seed, n, COMBAT_LANE), so the rolls
+# depend only on the battle's seed and how many were drawn before: the same in
+# any process or worker, and rolled back by restoring the counter.
+class BattleRng:
+    __slots__ = ("seed", "counter", "_key")
+
+    def __init__(self, seed, counter=0):
+        self.seed = seed
+        self.counter = counter  # Draws taken so far.
+        self._key = (mix64(seed & MASK64) + COMBAT_LANE) & MASK64
+
+    # Next uniform float in [0, 1).
+    def random(self):
+        counter = self.counter
+        self.counter = counter + 1
+        x = (self._key + counter * LANES + GOLDEN_GAMMA) & MASK64
+        x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+        x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & MASK64
+        return ((x ^ (x >> 31)) >> 11) * TO_UNIT
+
+    # The next `count` draws as a list, in one call for hot loops.
+    def batch(self, count):
+        start = self.counter
+        self.counter = start + count
+        if count >= NUMPY_BATCH:
+            try:
+                import numpy as np
+            except ImportError:
+                pass
+            else:
+                counters = np.arange(start, start + count, dtype=np.uint64)
+                x = mix64_array(np.uint64(self._key) + counters * np.uint64(LANES))
+                return ((x >> np.uint64(11)).astype(np.float64) * TO_UNIT).tolist()
+        first = self._key + start * LANES + GOLDEN_GAMMA
+        draws = []
+        append = draws.append
+        for x in range(first, first + count * LANES, LANES):
+            x &= MASK64
+            x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+            x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & MASK64
+            append(((x ^ (x >> 31)) >> 11) * TO_UNIT)
+        return draws
@@ -0,0 +1,179 @@
+import hashlib
+import os
+import pickle
+from collections import namedtuple
+from Action import AttackAction, CombatRules, SpecialMoveAction
+from StatusEffect import EFFECT_TYPES
+
+# Declarative character and move definitions (rulesets/*.json) compiled once
+# into flat tables: moves are indexed by id, every character points at its
+# move id, and the damage coefficients sit in per-field tuples that vectorized
+# code can turn straight into arrays. Compiled rulesets are pickled next to the
+# source file, keyed by its hash, so later processes skip parsing and compiling.
+RULESET_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rulesets")
+DEFAULT_PATH = os.path.join(RULESET_DIR, "default.json")
+COMPILER_VERSION = 3  # Bump when the compiled layout changes to invalidate cached rulesets.
+CharacterSpec = namedtuple("CharacterSpec", "name health abilities spec_move attack_power defense move dodge",
+                           defaults=(0.0,))
+
+# A compiled ruleset.
+class Ruleset:
+    def __init__(self, digest, moves, move_ids, characters, combat=None):
+        self.digest = digest  # SHA-256 of the source file.
+        self.moves = moves  # Tuple of SpecialMoveAction, indexed by move id.
+        self.move_ids = move_ids  # Move name -> move id.
+        self.characters = characters  # Character name -> CharacterSpec.
+        self.combat = combat  # CombatRules, or None if combat has no rolls.
+        self.attack_action = None if combat is None else AttackAction(combat)  # None: the shared plain attack.
+        # Coefficient tables indexed by move id.
+        self.multipliers = tuple(move.multiplier for move in moves)
+        self.defense_factors = tuple(move.defense_factor for move in moves)
+        self.minimums = tuple(move.minimum for move in moves)
+        self.cooldowns = tuple(move.cooldown for move in moves)
+        self.deals_damage = tuple(move.deals_damage for move in moves)
+        self.needs_target = tuple(move.needs_target for move in moves)
+
+    # The shared action for a move name.
+    def move(self, name):
+        return self.moves[self.move_ids[name]]
+
+    # The shared special move action of a character.
+    def move_for(self, character_name):
+        return self.moves[self.characters[character_name].move]
+
+    def character_names(self):
+        return list(self.characters)
+
+# Build one move action from its definition.
+def compile_move(name, spec, combat=None):
+    damage = spec.get("damage")
+    target = spec.get("target", "enemy")
+    if target not in ("enemy", "enemies", "self"):
+        raise ValueError(f"Move {name}: target must be 'enemy', 'enemies' or 'self', not {target!r}")
+    if damage is not None and target == "self":
+        raise ValueError(f"Move {name}: a move that targets its user cannot deal damage")
+    effect = spec.get("effect")
+    effect_type = None
+    if effect is not None:
+        if effect["type"] not in EFFECT_TYPES:
+            raise ValueError(f"Move {name}: unknown effect type {effect['type']!r}")
+        effect_type = EFFECT_TYPES[effect["type"]]
+    damage = damage or {}
+    return SpecialMoveAction(
+        name=name,
+        multiplier=float(damage.get("multiplier", 0.0)),
+        defense_factor=float(damage.get("defense_factor", 0.0)),
+        minimum=damage.get("minimum", 0),
+        cooldown=int(spec.get("cooldown", 3)),
+        deals_damage="damage" in spec,
+        needs_target=target == "enemy",
+        effect=effect_type,
+        effect_args=dict(effect.get("args", {})) if effect else None,
+        effect_on_self=target == "self",
+        announce=bool(effect.get("announce", False)) if effect else False,
+        message=spec.get("message", "{attacker} uses {move} on {target} for {damage:.1f} damage!"),
+        area=target == "enemies",
+        rules=combat if "damage" in spec else None,
+    )
+
+# Combat rules from the "combat" section, or None if nothing is left to chance.
+# Rolls are on as soon as the section exists or a character can dodge.
+def compile_combat(data):
+    spec = data.get("combat")
+    dodging = any(character.get("dodge", 0) for character in data.get("characters", {}).values())
+    if spec is None and not dodging:
+        return None
+    try:
+        rules = CombatRules(**(spec or {}))
+    except TypeError as error:
+        raise ValueError(f"Invalid combat section: {error}") from None
+    for field in ("accuracy", "crit_chance"):
+        if not 0 <= getattr(rules, field) <= 1:
+            raise ValueError(f"Combat {field} must be between 0 and 1")
+    return rules
+
+# Compile parsed ruleset data.
+def compile_ruleset(data, digest=None):
+    combat = compile_combat(data)
+    move_ids = {}
+    moves = []
+    for name, spec in data.get("moves", {}).items():
+        move_ids[name] = len(moves)
+        moves.append(compile_move(name, spec, combat))
+    characters = {}
+    for name, spec in data.get("characters", {}).items():
+        if spec["move"] not in move_ids:
+            raise ValueError(f"Character {name}: unknown move {spec['move']!r}")
+        characters[name] = CharacterSpec(name, spec["health"], spec.get("abilities", ""), spec["move"],
+                                         spec["attack_power"], spec["defense"], move_ids[spec["move"]],
+                                         float(spec.get("dodge", 0.0)))
+    if not characters:
+        raise ValueError("A ruleset needs at least one character")
+    return Ruleset(digest, tuple(moves), move_ids, characters, combat)
+
+# Where the compiled form of a ruleset file with this digest is cached.
+def cache_path(path, digest):
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(os.path.dirname(path), "__pycache__", f"{stem}.{digest[:16]}.v{COMPILER_VERSION}.pickle")
+
+_loaded = {}  # Digest -> Ruleset, for repeated loads in one process.
+
+# Load a ruleset file, using the on-disk cache when the file is unchanged.
+def load(path=DEFAULT_PATH, use_cache=True):
+    with open(path, "rb") as source:
+        data = source.read()
+    digest = hashlib.sha256(data).hexdigest()
+    if digest in _loaded:
+        return _loaded[digest]
+    cached = cache_path(path, digest)
+    ruleset = None
+    if use_cache:
+        try:
+            with open(cached, "rb") as cache:
+                ruleset = pickle.load(cache)
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+            ruleset = None  # Missing, stale or unreadable; recompile.
+    if ruleset is None:
+        import json  # Deferred: a cached ruleset needs no parsing.
+        ruleset = compile_ruleset(json.loads(data), digest)
+        if use_cache:
+            try:
+                os.makedirs(os.path.dirname(cached), exist_ok=True)
+                temporary = f"{cached}.{os.getpid()}.tmp"
+                with open(temporary, "wb") as cache:
+                    pickle.dump(ruleset, cache, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(temporary, cached)  # Atomic, so concurrent workers never read a partial file.
+            except OSError:
+                pass  # Read-only checkout: run uncached.
+    _loaded[digest] = ruleset
+    return ruleset
+
+# Load a ruleset shipped in rulesets/ by name, e.g. "raid".
+def load_named(name):
+    return load(os.path.join(RULESET_DIR, f"{name}.json"))
+
+# A ruleset by the digest of its source file: one already loaded, or one
+# shipped in rulesets/.
+def by_digest(digest):
+    if digest in _loaded:
+        return _loaded[digest]
+    for name in sorted(os.listdir(RULESET_DIR)):
+        path = os.path.join(RULESET_DIR, name)
+        if name.endswith(".json"):
+            with open(path, "rb") as source:
+                if hashlib.sha256(source.read()).hexdigest() == digest:
+                    return load(path)
+    raise ValueError(f"Unknown ruleset {digest[:16]}: load it first or pass it explicitly")
+
+_default = None
+
+# The ruleset shipped with the game.
+def default_ruleset():
+    global _default
+    if _default is None:
+        _default = load(DEFAULT_PATH)
+    return _default
+
+# The default ruleset if something has loaded it already, else None.
+def loaded_default_ruleset():
+    return _default
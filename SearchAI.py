@@ -0,0 +1,241 @@
+import math
+import random
+import time
+from collections import OrderedDict
+from Display import muted
+from Policy import Policy
+
+# Game-tree search for computer players: Monte Carlo tree search over the real
+# battle rules. Every player is assumed to play for themselves, so each node
+# picks moves by UCT from the point of view of the player about to act (max^n).
+# Nodes live in a transposition table keyed by a hash of the battle state, so
+# positions reached through different move orders share statistics and the
+# table is reused from one turn to the next.
+DEFAULT_TIME_BUDGET = 0.005  # Seconds of search per move.
+DEFAULT_TABLE_SIZE = 100000  # Nodes kept in the transposition table.
+EXPLORATION = 1.4
+ROLLOUT_DEPTH = 30  # Turns played at random before a position is scored by health.
+
+# One battle position during search: a cloned BattleManager and the player
+# whose turn it is (their status effects have already been processed).
+class SearchState:
+    __slots__ = ("battle", "actor")
+
+    def __init__(self, battle, actor):
+        self.battle = battle
+        self.actor = actor
+
+    # Start from a live battle where `player` is about to choose.
+    @classmethod
+    def from_battle(cls, battle, player):
+        twin = battle.clone()
+        return cls(twin, twin.turn_order[battle.slots[player]])
+
+    def clone(self):
+        twin = self.battle.clone()
+        return SearchState(twin, twin.turn_order[self.battle.slots[self.actor]])
+
+    # Hash of the position: whose turn it is and every character's state.
+    def key(self):
+        battle = self.battle
+        return hash((battle.slots[self.actor], tuple(player.state_key() for player in battle.turn_order)))
+
+    def terminal(self):
+        return self.actor is None
+
+    # Legal (action, target slot) pairs for the acting player.
+    def moves(self):
+        battle = self.battle
+        player = self.actor
+        moves = []
+        for action in Policy.legal_actions(player):
+            if battle.needs_target(player, action):
+                moves.extend((action, battle.slots[target]) for target in battle.targets_for(player))
+            else:
+                moves.append((action, None))
+        return moves
+
+    # Play a move for the acting player, then begin the next playable turn.
+    def play(self, move):
+        battle = self.battle
+        action, target = move
+        player = self.actor
+        battle.perform_action(player, action, None if target is None else battle.turn_order[target])
+        battle.end_turn()
+        self.advance(battle.slots[player])
+
+    # Walk the turn order from a slot the same way BattleManager.turns() does,
+    # skipping dead and stunned players, until someone can act or the battle ends.
+    def advance(self, slot):
+        battle = self.battle
+        order = battle.turn_order
+        while len(battle.get_alive_players()) > 1 and not battle.turn_limit_reached():
+            slot = (slot + 1) % len(order)
+            player = order[slot]
+            if player.health > 0 and battle.begin_turn(player):
+                self.actor = player
+                return
+        self.actor = None
+
+    # Score per slot: 1 for the winner, otherwise each player's share of the remaining health.
+    def rewards(self):
+        healths = [max(player.health, 0) for player in self.battle.turn_order]
+        total = sum(healths)
+        if total <= 0:
+            return [0.0] * len(healths)
+        return [health / total for health in healths]
+
+# Visit statistics for one position.
+class Node:
+    __slots__ = ("visits", "moves", "counts", "totals")
+
+    def __init__(self, moves):
+        self.visits = 0
+        self.moves = moves
+        self.counts = [0] * len(moves)
+        self.totals = [0.0] * len(moves)  # Summed reward of the player choosing here.
+
+    # Index of the next move to try: each untried move first, then UCT.
+    def select(self, exploration):
+        counts = self.counts
+        for index, count in enumerate(counts):
+            if count == 0:
+                return index
+        scale = exploration * math.sqrt(math.log(self.visits))
+        totals = self.totals
+        best, best_score = 0, -1.0
+        for index, count in enumerate(counts):
+            score = totals[index] / count + scale / math.sqrt(count)
+            if score > best_score:
+                best, best_score = index, score
+        return best
+
+    # Most visited move.
+    def best_move(self):
+        return self.moves[max(range(len(self.moves)), key=self.counts.__getitem__)]
+
+# Bounded map from state hash to Node that evicts the least recently used entry.
+class TranspositionTable:
+    def __init__(self, capacity=DEFAULT_TABLE_SIZE):
+        self.capacity = capacity
+        self.nodes = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def get(self, key):
+        node = self.nodes.get(key)
+        if node is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.nodes.move_to_end(key)
+        return node
+
+    def put(self, key, node):
+        self.nodes[key] = node
+        self.nodes.move_to_end(key)
+        if len(self.nodes) > self.capacity:
+            self.nodes.popitem(last=False)
+            self.evictions += 1
+
+# Policy that searches for each move within a time budget.
+# iterations caps the number of playouts instead (or as well), which makes the
+# choice reproducible for a given seed.
+class SearchPolicy(Policy):
+    __slots__ = ("time_budget", "iterations", "exploration", "rollout_depth", "table", "rng", "nodes",
+                 "playouts", "_pending_target")
+
+    def __init__(self, time_budget=DEFAULT_TIME_BUDGET, iterations=None, table_size=DEFAULT_TABLE_SIZE,
+                 exploration=EXPLORATION, rollout_depth=ROLLOUT_DEPTH, seed=None):
+        if time_budget is None and iterations is None:
+            raise ValueError("Need a time budget or an iteration limit")
+        self.time_budget = time_budget
+        self.iterations = iterations
+        self.exploration = exploration
+        self.rollout_depth = rollout_depth
+        self.table = TranspositionTable(table_size)
+        self.rng = random.Random(seed)
+        self.nodes = 0  # Moves played during search, in the tree and in rollouts.
+        self.playouts = 0
+        self._pending_target = None
+
+    def choose_action(self, battle, player):
+        action, target = self.search(battle, player)
+        self._pending_target = target
+        return action
+
+    def choose_target(self, battle, player, candidates):
+        target = self._pending_target
+        self._pending_target = None
+        if target is not None:
+            chosen = battle.turn_order[target]
+            if chosen in candidates:
+                return chosen
+        return min(candidates, key=lambda candidate: candidate.health)
+
+    # Best (action, target slot) for `player`, who is about to choose in `battle`.
+    def search(self, battle, player):
+        root = SearchState.from_battle(battle, player)
+        root_key = root.key()
+        start = root.battle.snapshot()  # Every playout rolls the one copy back to here.
+        deadline = None if self.time_budget is None else time.perf_counter() + self.time_budget
+        playouts = 0
+        with muted():
+            while True:
+                root.battle.restore(start)
+                self.playout(SearchState(root.battle, root.actor), root_key, deadline)
+                playouts += 1
+                if self.iterations is not None and playouts >= self.iterations:
+                    break
+                if deadline is not None and time.perf_counter() >= deadline:
+                    break
+        self.playouts += playouts
+        node = self.table.get(root_key)
+        if node is None:  # Evicted by a table smaller than one playout.
+            return root.moves()[0]
+        return node.best_move()
+
+    # One selection, expansion, rollout and backup pass from the root.
+    # Selection stops at a position already on the path: positions can repeat
+    # (players who only defend), and visit counts only change in backup, so
+    # UCT would pick the same moves around the cycle forever. It also stops
+    # at the deadline, so one playout cannot overrun the move's time budget.
+    def playout(self, state, key, deadline=None):
+        table = self.table
+        path = []
+        seen = set()
+        while not state.terminal() and key not in seen:
+            if path and deadline is not None and time.perf_counter() >= deadline:
+                break
+            seen.add(key)
+            node = table.get(key)
+            expanded = node is None
+            if expanded:
+                node = Node(state.moves())
+                table.put(key, node)
+            index = node.select(self.exploration) if node.visits else 0
+            path.append((node, index, state.battle.slots[state.actor]))
+            state.play(node.moves[index])
+            self.nodes += 1
+            if expanded or state.terminal():
+                break
+            key = state.key()
+        rewards = self.rollout(state, deadline)
+        for node, index, slot in path:
+            node.visits += 1
+            node.counts[index] += 1
+            node.totals[index] += rewards[slot]
+
+    # Random play to the end of the battle, the depth limit or the deadline.
+    def rollout(self, state, deadline=None):
+        rng = self.rng
+        for _ in range(self.rollout_depth):
+            if state.terminal() or deadline is not None and time.perf_counter() >= deadline:
+                break
+            state.play(rng.choice(state.moves()))
+            self.nodes += 1
+        return state.rewards()
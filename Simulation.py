@@ -0,0 +1,60 @@
+from BattleManager import BattleManager
+from CharacterFactory import CharacterFactory
+from Display import muted
+from Policy import Policy, RandomPolicy, GreedyPolicy
+
+# Headless battles: no input(), no sleeps and no game text.
+DEFAULT_MAX_TURNS = 500  # Safety limit so two defensive policies cannot stall forever.
+
+# Named policies that can be built from a seed.
+POLICY_TYPES = {
+    "random": lambda seed: RandomPolicy(seed),
+    "greedy": lambda seed: GreedyPolicy(),
+}
+
+# Build a policy from a name, a Policy instance or a callable taking a seed.
+def make_policy(spec, seed=None):
+    if isinstance(spec, Policy):
+        return spec
+    if isinstance(spec, str):
+        if spec not in POLICY_TYPES:
+            raise ValueError(f"Invalid policy type: {spec}")
+        return POLICY_TYPES[spec](seed)
+    return spec(seed)
+
+# Run one battle between the named characters and return its MatchResult.
+# policy is a single spec for every player or a list with one spec per player.
+# recorder is an optional BattleLog.BattleRecorder, given the same ruleset so
+# its log names it; instrumentation an optional Instrumentation.Instrumentation
+# that accumulates phase timings across matches.
+# seed also keys the combat rolls of rulesets that have them; ruleset defaults to the shipped one.
+def run_match(character_names, policy="random", seed=None, max_turns=DEFAULT_MAX_TURNS, recorder=None,
+              instrumentation=None, ruleset=None):
+    players = [CharacterFactory.create_character(name, ruleset) for name in character_names]
+    if isinstance(policy, (list, tuple)):
+        policies = [make_policy(spec, seed) for spec in policy]
+    else:
+        policies = make_policy(policy, seed)
+    battle = BattleManager(players, policy=policies, delay=0, max_turns=max_turns, recorder=recorder,
+                           instrumentation=instrumentation, seed=seed)
+    with muted():
+        return battle.start_battle()
+
+# Process pool for match workers. start_method is None for the platform's
+# default, or a multiprocessing start method. With "forkserver" every worker is
+# forked from a server process that imported Prewarm, so workers start with the
+# game imported and the default characters resolved instead of paying for it
+# each time a pool starts.
+def worker_pool(workers=None, start_method=None):
+    import multiprocessing  # Deferred: single matches never need it.
+    context = multiprocessing.get_context(start_method)
+    if start_method == "forkserver":
+        context.set_forkserver_preload(["Prewarm"])
+    return context.Pool(workers)
+
+# Run count battles with consecutive seeds, yielding each MatchResult.
+def run_matches(character_names, count, policy="random", seed=0, max_turns=DEFAULT_MAX_TURNS, instrumentation=None,
+                ruleset=None):
+    for index in range(count):
+        yield run_match(character_names, policy, seed + index, max_turns, instrumentation=instrumentation,
+                        ruleset=ruleset)
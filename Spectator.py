@@ -0,0 +1,131 @@
+from collections import deque
+from BattleLog import BattleLogReader, BattleRecorder, MAGIC
+
+# Spectator fan-out: one feed per battle, read by any number of subscribers.
+#
+# A SpectatorFeed is a BattleRecorder (see BattleLog.py), so its frames use the
+# battle log encoding. It publishes a frame after each phase of a turn (the
+# status effect ticks at its start, then the action), holding only what changed
+# (health, attack power, defense, cooldowns, status effects) plus the turn and action
+# records, usually 5-20 bytes. Every keyframe_interval turns it also keeps a
+# keyframe: the log header and a full snapshot.
+#
+# Frames go into one shared ring buffer. The game loop only ever appends to it,
+# and each subscriber is just a cursor into it, so publishing costs the same
+# for one spectator or ten thousand and a slow spectator holds back nobody. A
+# subscriber that falls further behind than the ring holds, or that joins late,
+# is resynced: it gets the latest keyframe and the frames after it. Whatever a
+# subscriber receives, concatenated from its latest keyframe, is a valid battle
+# log, which SpectatorView decodes.
+DEFAULT_CAPACITY = 256  # Frames kept in the ring.
+DEFAULT_KEYFRAME_INTERVAL = 16  # Turns between keyframes.
+FRAMES_PER_TURN = 2
+
+# Records a battle as frames in a ring buffer shared by its subscribers.
+# Pass it to BattleManager as the recorder.
+class SpectatorFeed(BattleRecorder):
+    def __init__(self, capacity=DEFAULT_CAPACITY, keyframe_interval=DEFAULT_KEYFRAME_INTERVAL, ruleset=None):
+        if capacity < 2 * FRAMES_PER_TURN * keyframe_interval:
+            raise ValueError("The ring must hold the frames of at least two keyframe intervals")
+        super().__init__(stream=None, snapshot_interval=keyframe_interval, ruleset=ruleset)
+        self.capacity = capacity
+        self.frames = [None] * capacity
+        self.head = 0  # Sequence number of the next frame.
+        self.header = b""  # Log header: magic, version and roster.
+        self.keyframes = deque()  # (sequence number of the next frame, snapshot record) still in the ring.
+        self.ended = False
+        self.published_bytes = 0
+
+    # Oldest sequence number still in the ring.
+    def tail(self):
+        return max(0, self.head - self.capacity)
+
+    def started(self, battle):
+        super().started(battle)
+        self.header = bytes(self.buffer)  # The initial snapshot went to the keyframes.
+        self.buffer = bytearray()
+
+    # Snapshots become keyframes instead of part of the frame being written.
+    def _snapshot(self, battle, completed):
+        frame, self.buffer = self.buffer, bytearray()
+        super()._snapshot(battle, completed)
+        self.keyframes.append((self.head, bytes(self.buffer)))
+        self.buffer = frame
+        while len(self.keyframes) > 1 and self.keyframes[0][0] < self.tail():
+            self.keyframes.popleft()
+
+    # Each phase of a turn ends by recording its changes; publish them.
+    def record_changes(self, battle, before):
+        super().record_changes(battle, before)
+        self._flush()
+
+    def finished(self, battle, result):
+        super().finished(battle, result)
+        self.ended = True
+
+    # Publish everything written since the last frame as the next frame.
+    def _flush(self):
+        if not self.buffer:
+            return
+        frame = bytes(self.buffer)
+        self.buffer = bytearray()
+        self.frames[self.head % self.capacity] = frame
+        self.head += 1
+        self.published_bytes += len(frame)
+
+    def subscribe(self):
+        return Subscriber(self)
+
+# One spectator's position in a feed.
+class Subscriber:
+    __slots__ = ("feed", "cursor", "resyncs")
+
+    def __init__(self, feed):
+        self.feed = feed
+        self.cursor = None  # Next sequence number to read; None until the first keyframe is sent.
+        self.resyncs = 0  # Times the subscriber fell out of the ring and restarted from a keyframe.
+
+    # Frames published since the last poll, at most `limit` of them. After
+    # joining or falling out of the ring, the first frame is a keyframe.
+    def poll(self, limit=None):
+        feed = self.feed
+        frames = []
+        if self.cursor is None or self.cursor < feed.tail():
+            if not feed.keyframes:
+                return frames  # The battle has not started.
+            if self.cursor is not None:
+                self.resyncs += 1
+            self.cursor, snapshot = feed.keyframes[-1]
+            frames.append(feed.header + snapshot)
+        end = feed.head if limit is None else min(feed.head, self.cursor + limit)
+        ring = feed.frames
+        capacity = feed.capacity
+        frames.extend(ring[sequence % capacity] for sequence in range(self.cursor, end))
+        self.cursor = end
+        return frames
+
+    # True once every frame of a finished battle has been read.
+    def done(self):
+        return self.feed.ended and self.cursor == self.feed.head
+
+# A spectator's copy of the battle, rebuilt from received frames.
+class SpectatorView:
+    def __init__(self):
+        self.data = bytearray()  # Latest keyframe and the frames after it.
+        self.frames = 0
+        self.bytes = 0
+
+    def apply(self, frame):
+        if frame[:len(MAGIC)] == MAGIC:
+            self.data = bytearray(frame)
+        elif self.data:
+            self.data += frame
+        self.frames += 1
+        self.bytes += len(frame)
+
+    # The latest BattleLog.BattleState seen, or None before the first keyframe.
+    def state(self):
+        if not self.data:
+            return None
+        reader = BattleLogReader(self.data)
+        return reader.state_at(reader.turns())
@@ -1,67 +1,614 @@
-# Base class for status effects.
-class StatusEffects:
-    # Initialize status effect with name and duration.
-    def __init__(self, name, lasting):
-        self.name = name  # Name of the effect.
-        self.lasting = lasting  # Duration in turns.
-
-    # Execute the status effect on the character.
-    def exec_status_effect(self, character):
-        pass
-
-    # Called when the effect is removed.
-    def remove_status_effect(self, character):
-        pass
-
-    # Execute effect logic for one turn and decrement duration.
-    def exec_turn(self, character):
-        self.exec_status_effect(character)
-        self.lasting -= 1
-        if self.lasting <= 0:
-            self.remove_status_effect(character)
-            return False  # Effect expired.
-        return True  # Effect still active.
-
-# Poison effect: damages the character each turn.
-class Poison(StatusEffects):
-    def __init__(self, damage, duration=3):
-        super().__init__("Poison", lasting=duration)
-        self.damage = damage
-
-    def exec_status_effect(self, character):
-        print(f"{character.name} is poisoned! Losing {self.damage} HP this turn.")
-        character.health -= self.damage
-
-    def remove_status_effect(self, character):
-        if any(isinstance(effect, Poison) for effect in character.status_effects):
-            return 
-        print(f"{character.name} is no longer poisoned.")
-
-# Stun effect: prevents the character from acting.
-class Stun(StatusEffects):
-    def __init__(self, duration=2):
-        super().__init__("Stun", lasting=duration)
-
-    def exec_status_effect(self, character):
-        character.is_stunned = True
-        print(f"{character.name} is stunned and cannot act!")
-
-    def remove_status_effect(self, character):
-        pass  # No removal message to avoid duplicate output.
-
-# Extra Defense effect: temporarily increases defense.
-class ExtraDefense(StatusEffects):
-    def __init__(self, defense_boost, duration=3):
-        super().__init__("Extra Defense", lasting=duration)
-        self.defense_boost = defense_boost
-
-    def exec_status_effect(self, character):
-        if self not in character.status_effects:
-            character.defense += self.defense_boost
-            print(f"{character.name} gains +{self.defense_boost} defense for {self.lasting} turns!")
-
-    def remove_status_effect(self, character):
-        if any(isinstance(effect, ExtraDefense) for effect in character.status_effects):
-            return 
-        character.defense -= self.defense_boost
-        print(f"{character.name}'s extra defense has worn off.")
+import copy
+import heapq
+import math
+from collections import namedtuple
+from operator import attrgetter
+from Display import show, enabled, ACTION
+
+# Stat change declared by an effect type: while an effect of the type is
+# active, `stat` gets `amount` added (ADD) or is multiplied by it (MUL). The
+# amount is a number or the name of an attribute of the effect, e.g. "defense_boost".
+Modifier = namedtuple("Modifier", "stat op amount")
+ADD, MUL = "add", "mul"
+MODIFIABLE_STATS = ("attack_power", "defense")
+INDEX_SIZE = 8  # Effects a store keeps in a plain list; beyond this it builds its indexes.
+EXPIRY_ORDER = attrgetter("_lasting", "_order")
+
+# Base class for status effects.
+# Effects are small fixed-size records: all attributes live in __slots__, and
+# nothing but the duration changes once an effect is active (snapshots rely on it).
+#
+# An effect type is declared by its hooks and class attributes:
+#   on_apply(character)          when the effect starts, after its modifiers apply
+#   on_tick(character, rng)      on every tick of the character's effects
+#   on_damage(character, damage) when an action is about to damage the character;
+#                                returns the damage to deal
+#   on_expire(character)         when the effect runs out, while still active
+#   modifiers                    Modifier records applied while the effect is active
+#   blocks_action                True if the character loses its turns meanwhile
+# The store holding the effect calls the hooks and keeps the modifier stack, and
+# whether a type ticks or guards against damage is derived from the hooks it overrides.
+class StatusEffects:
+    __slots__ = ("name", "_lasting", "_store", "_order")
+    stacking = "ignore"  # What apply() does when an effect of the same type is already active.
+    modifiers = ()
+    blocks_action = False
+    # Derived in __init_subclass__.
+    ticks = False  # Overrides on_tick, so ticks must run it.
+    guards = False  # Overrides on_damage.
+    modified_stats = ()  # Stats named by the modifiers.
+    tracked = False  # Blocks actions, guards or modifies stats, so the store must account for it.
+    ancestors = ()  # Effect types this type derives from, below StatusEffects.
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        for modifier in cls.modifiers:
+            if modifier.stat not in MODIFIABLE_STATS or modifier.op not in (ADD, MUL):
+                raise ValueError(f"{cls.__name__}: unsupported modifier {modifier}")
+        cls.ticks = cls.on_tick is not StatusEffects.on_tick
+        cls.guards = cls.on_damage is not StatusEffects.on_damage
+        cls.modified_stats = tuple(dict.fromkeys(modifier.stat for modifier in cls.modifiers))
+        cls.tracked = bool(cls.blocks_action or cls.guards or cls.modifiers)
+        cls.ancestors = tuple(base for base in cls.__mro__[1:]
+                              if issubclass(base, StatusEffects) and base is not StatusEffects)
+
+    # Initialize status effect with name and duration.
+    def __init__(self, name, lasting):
+        self.name = name  # Name of the effect.
+        self._store = None  # Store holding the effect, if any.
+        self._lasting = lasting  # Duration in turns, or the expiry tick while in a store.
+        self._order = 0  # When the store last scheduled the effect, to order effects expiring on the same tick.
+
+    # Remaining duration in turns.
+    @property
+    def lasting(self):
+        store = self._store
+        return self._lasting if store is None else self._lasting - store.clock
+
+    @lasting.setter
+    def lasting(self, value):
+        store = self._store
+        if store is None:
+            self._lasting = value
+        else:
+            self._lasting = value + store.clock
+            store._schedule(self)
+
+    def on_apply(self, character):
+        pass
+
+    # rng is the battle's Rng.BattleRng, or None outside a battle.
+    def on_tick(self, character, rng=None):
+        pass
+
+    def on_damage(self, character, damage):
+        return damage
+
+    def on_expire(self, character):
+        pass
+
+    # Run on_tick for many effects of this type, as (effect, character) pairs,
+    # in one call; tick_all() uses it. Types can override it to batch their work.
+    @classmethod
+    def tick_many(cls, pairs, rng=None):
+        for effect, character in pairs:
+            effect.on_tick(character, rng)
+
+    # Hashable summary of the effect's state, used to key search positions.
+    def state_key(self):
+        return (type(self), self.lasting)
+
+    # Execute effect logic for one turn and decrement duration.
+    def exec_turn(self, character):
+        self.on_tick(character)
+        self.lasting -= 1
+        if self.lasting <= 0:
+            self.on_expire(character)
+            return False  # Effect expired.
+        return True  # Effect still active.
+
+# Active status effects of one character, indexed by effect type.
+# Iteration keeps insertion order like the list it replaces. Every character
+# has a store but most have no effects and the rest only a few, so up to
+# INDEX_SIZE effects are kept in a plain list that lookups and ticks scan.
+# Past that the store builds its indexes: an insertion-ordered set of the
+# effects, one per effect type and one of ticking effects, counts per ancestor
+# type, and a heap of expiry ticks, so presence checks are O(1) and a tick
+# only runs effects that act every turn plus those that expire. How apply() treats an effect type that is already present is set by
+# the type's `stacking` attribute:
+#   "stack"   add another instance
+#   "ignore"  keep the existing effect, drop the new one
+#   "refresh" keep the existing effect and reset its duration to the new one's
+#   "replace" remove the existing effects and add the new one
+#
+# The store also keeps the owner's stat modifier stack. The owner's stat
+# attributes always hold the effective values, so combat code reads them
+# directly; when the first modifier of a stat arrives, the stat's base value is
+# saved, and the effective value is recomputed as (base + added) * multiplied
+# only when a modifier comes or goes. blocking and guarded count the active
+# effects that block actions and that have an on_damage hook.
+#
+# snapshot() returns an immutable (clock, effects, base stats) triple. Effects
+# keep absolute expiry ticks, so a tick that expires nothing changes only the
+# clock, and consecutive snapshots share one cached effects tuple until an
+# effect is added, removed or rescheduled.
+class StatusEffectStore:
+    __slots__ = ("owner", "clock", "blocking", "guarded", "_effects", "_by_type", "_ticking", "_guards", "_expiry",
+                 "_due", "_scheduled", "_cached", "_modified", "_base", "_kinds")
+
+    # owner is the character whose stats the effects modify; stores without
+    # one hold effects that have no modifiers.
+    def __init__(self, effects=(), owner=None):
+        self.owner = owner
+        self.clock = 0  # Ticks processed so far.
+        self.blocking = 0  # Active effects that block actions.
+        self.guarded = 0  # Active effects with an on_damage hook.
+        self._scheduled = 0  # Expiries scheduled so far, the source of effects' _order.
+        self._cached = ()  # Effects tuple of the last snapshot, None once the effects change.
+        # Active effects in order of application: empty, a list, or an
+        # insertion-ordered set once the indexes are built (see _build_index).
+        self._effects = ()
+        self._by_type = None  # Effect type -> insertion-ordered set of effects.
+        self._ticking = None  # Insertion-ordered set of effects whose type ticks.
+        self._kinds = None  # Ancestor type -> number of active effects of its subtypes.
+        self._expiry = None  # Heap of (expiry tick, order, effect).
+        self._due = math.inf  # Without the heap: no listed effect expires before this tick.
+        # Created on first use, as few characters ever have them:
+        self._guards = None  # Insertion-ordered set of effects with an on_damage hook.
+        self._modified = None  # Stat -> insertion-ordered set of effects modifying it.
+        self._base = None  # Stat -> value without modifiers, for modified stats.
+        for effect in effects:
+            self.append(effect)
+
+    def __len__(self):
+        return len(self._effects)
+
+    def __iter__(self):
+        return iter(self._effects)
+
+    def __contains__(self, effect):
+        return effect in self._effects
+
+    def __repr__(self):
+        return f"StatusEffectStore({list(self._effects)!r})"
+
+    # True if an effect of this type (or a subclass) is active.
+    def has(self, effect_type):
+        by_type = self._by_type
+        if by_type is None:
+            return any(type(effect) is effect_type or effect_type in effect.ancestors for effect in self._effects)
+        return effect_type in by_type or effect_type in self._kinds
+
+    # Number of active effects of exactly this type.
+    def count(self, effect_type):
+        if self._by_type is None:
+            return sum(type(effect) is effect_type for effect in self._effects)
+        return len(self._by_type.get(effect_type, ()))
+
+    # Active effects of exactly this type, oldest first.
+    def of_type(self, effect_type):
+        if self._by_type is None:
+            return [effect for effect in self._effects if type(effect) is effect_type]
+        return list(self._by_type.get(effect_type, ()))
+
+    # Active effects whose type ticks, oldest first.
+    def ticking(self):
+        if self._ticking is None:
+            return [effect for effect in self._effects if effect.ticks]
+        return list(self._ticking)
+
+    # Add an effect unconditionally (stacking), like list.append, and run its on_apply hook.
+    def append(self, effect):
+        if effect._store is not None:
+            raise ValueError(f"{effect.name} is already active on a character")
+        effect._lasting += self.clock
+        self._insert(effect)
+        effect.on_apply(self.owner)
+
+    # Index an effect whose _lasting already holds its expiry tick. fresh is
+    # False when the owner's stats already include the effect's modifiers.
+    def _insert(self, effect, fresh=True):
+        self._schedule(effect)
+        self._index(effect)
+        if effect.tracked:
+            self._track(effect, 1, fresh)
+
+    # Add an effect to the active effects, building the indexes once the list
+    # would grow past INDEX_SIZE.
+    def _index(self, effect):
+        effect._store = self
+        effects = self._effects
+        if self._by_type is None:
+            if not effects:
+                self._effects = [effect]
+            elif len(effects) < INDEX_SIZE:
+                effects.append(effect)
+            else:
+                self._build_index(effects + [effect])
+            return
+        effects[effect] = None
+        self._by_type.setdefault(type(effect), {})[effect] = None
+        if effect.ticks:
+            self._ticking[effect] = None
+        kinds = self._kinds
+        for kind in effect.ancestors:
+            kinds[kind] = kinds.get(kind, 0) + 1
+
+    # Replace the list of active effects with the indexes and expiry heap.
+    def _build_index(self, effects):
+        self._effects = dict.fromkeys(effects)
+        by_type = self._by_type = {}
+        ticking = self._ticking = {}
+        kinds = self._kinds = {}
+        for effect in effects:
+            by_type.setdefault(type(effect), {})[effect] = None
+            if effect.ticks:
+                ticking[effect] = None
+            for kind in effect.ancestors:
+                kinds[kind] = kinds.get(kind, 0) + 1
+        self._expiry = [(effect._lasting, effect._order, effect) for effect in effects]
+        heapq.heapify(self._expiry)
+
+    # Back to the empty layout, dropping the indexes.
+    def _clear(self):
+        self._effects = ()
+        self._by_type = self._ticking = self._kinds = self._expiry = None
+        self._due = math.inf
+
+    # Count an effect coming (step 1) or going (step -1) and push or pop its
+    # modifiers, recomputing the stats they change when `recompute` is set.
+    def _track(self, effect, step, recompute=True):
+        self.blocking += step * effect.blocks_action
+        if effect.guards:
+            if self._guards is None:
+                self._guards = {}
+            if step > 0:
+                self._guards[effect] = None
+            else:
+                del self._guards[effect]
+            self.guarded = len(self._guards)
+        if effect.modifiers and self._modified is None:
+            self._modified = {}
+            self._base = self._base or {}
+        for stat in effect.modified_stats:
+            modified = self._modified.get(stat)
+            if step > 0:
+                if modified is None:
+                    if self.owner is None:
+                        raise ValueError(f"{effect.name} modifies {stat} but the store has no owner")
+                    modified = self._modified[stat] = {}
+                    if recompute:
+                        self._base[stat] = getattr(self.owner, stat)
+                modified[effect] = None
+            else:
+                del modified[effect]
+            if recompute:
+                self._recompute(stat)
+
+    # Write a stat's effective value to the owner: (base + added) * multiplied
+    # over the active modifiers, or the base value once none is left.
+    def _recompute(self, stat):
+        modified = self._modified.get(stat)
+        if not modified:
+            self._modified.pop(stat, None)
+            setattr(self.owner, stat, self._base.pop(stat))
+            return
+        added, multiplied = self._totals(stat)
+        setattr(self.owner, stat, (self._base[stat] + added) * multiplied)
+
+    # (added, multiplied) over the active modifiers of a stat.
+    def _totals(self, stat):
+        added, multiplied = 0, 1
+        for effect in self._modified[stat]:
+            for modifier in effect.modifiers:
+                if modifier.stat == stat:
+                    amount = modifier.amount
+                    if isinstance(amount, str):
+                        amount = getattr(effect, amount)
+                    if modifier.op == ADD:
+                        added += amount
+                    else:
+                        multiplied *= amount
+        return added, multiplied
+
+    # Add effects whose modifiers the owner's stats already include, e.g. when
+    # rebuilding a character from recorded stats. No on_apply hooks run, and
+    # the base of each modified stat is worked back out from its modifiers,
+    # rounded off when the rounded base gives the same effective value.
+    def extend_applied(self, effects):
+        for effect in effects:
+            if effect._store is not None:
+                raise ValueError(f"{effect.name} is already active on a character")
+            effect._lasting += self.clock
+            self._insert(effect, fresh=False)
+        for stat in self._modified or ():
+            if stat not in self._base:
+                added, multiplied = self._totals(stat)
+                effective = getattr(self.owner, stat)
+                base = effective / multiplied - added
+                rounded = round(base, 9)
+                self._base[stat] = rounded if (rounded + added) * multiplied == effective else base
+
+    # Multiply one of the owner's stats outside the effect system, e.g. Defend
+    # doubling defense. A modified stat has its base scaled instead, so the
+    # modifiers come off exactly when they end.
+    def scale(self, stat, factor):
+        base = self._base
+        if base and stat in base:
+            base[stat] *= factor
+            self._recompute(stat)
+        else:
+            owner = self.owner
+            setattr(owner, stat, getattr(owner, stat) * factor)
+
+    # Independent copy with copies of every effect, for search and what-if play.
+    # owner is the character the copy belongs to, whose stats already match.
+    def clone(self, owner=None):
+        other = StatusEffectStore(owner=owner)
+        other.clock = self.clock
+        if self._base:
+            other._base = dict(self._base)
+        for effect in self._effects:
+            twin = copy.copy(effect)
+            other._insert(twin, fresh=False)
+        return other
+
+    # Add an effect following its type's stacking policy; return True if it was added.
+    def apply(self, effect):
+        existing = self.of_type(type(effect))
+        if existing:
+            policy = effect.stacking
+            if policy == "ignore":
+                return False
+            if policy == "refresh":
+                for active in existing:
+                    active.lasting = effect.lasting
+                return False
+            if policy == "replace":
+                for active in existing:
+                    self.remove(active)
+            elif policy != "stack":
+                raise ValueError(f"Unknown stacking policy: {policy}")
+        self.append(effect)
+        return True
+
+    # Remove an effect without calling its on_expire hook; its modifiers come off.
+    def remove(self, effect):
+        if self._by_type is None:
+            self._effects.remove(effect)
+        else:
+            del self._effects[effect]
+            bucket = self._by_type[type(effect)]
+            del bucket[effect]
+            if not bucket:
+                del self._by_type[type(effect)]
+            if effect.ticks:
+                del self._ticking[effect]
+            kinds = self._kinds
+            for kind in effect.ancestors:
+                kinds[kind] -= 1
+                if not kinds[kind]:
+                    del kinds[kind]
+        if not self._effects:
+            self._clear()
+        effect._lasting -= self.clock
+        effect._store = None
+        self._cached = None
+        if effect.tracked:
+            self._track(effect, -1)
+
+    # Immutable (clock, ((effect, expiry tick), ...), ((stat, base), ...)) state for restore().
+    def snapshot(self):
+        effects = self._cached
+        if effects is None:
+            effects = self._cached = tuple((effect, effect._lasting) for effect in self._effects)
+        return (self.clock, effects, tuple(self._base.items()) if self._base else ())
+
+    # Return to a state taken by snapshot() on this store. The owner's stats
+    # are restored by the owner.
+    def restore(self, snapshot):
+        clock, effects, base = snapshot
+        self.clock = clock
+        if base or self._base:
+            self._base = dict(base)
+        if effects is self._cached:
+            return  # Same effects, only time moved.
+        for effect in self._effects:
+            effect._lasting -= clock
+            effect._store = None
+        self._clear()
+        self._guards = self._modified = None
+        self.blocking = self.guarded = 0
+        for effect, expires in effects:
+            effect._lasting = expires
+            self._schedule(effect)
+            self._index(effect)
+            if effect.tracked:
+                self._track(effect, 1, recompute=False)
+        self._cached = effects
+
+    # (Re)schedule an effect's expiry; outdated heap entries are skipped when popped.
+    def _schedule(self, effect):
+        self._cached = None
+        self._scheduled += 1
+        effect._order = self._scheduled
+        if self._expiry is not None:
+            heapq.heappush(self._expiry, (effect._lasting, effect._order, effect))
+        elif effect._lasting < self._due:
+            self._due = effect._lasting
+
+    # Run one tick for the character: execute effects of ticking types in
+    # order of application, then advance(). Returns the effects that expired.
+    def tick(self, character, rng=None):
+        if self._effects:
+            for effect in self.ticking():
+                effect.on_tick(character, rng)
+        return self.advance(character)
+
+    # Advance the clock, then run on_expire hooks and drop expired effects, in
+    # order of expiry tick and then of scheduling. Returns the effects that expired.
+    def advance(self, character):
+        self.clock += 1
+        clock = self.clock
+        expiry = self._expiry
+        if expiry is None:
+            if clock < self._due:
+                return []
+            expired = [effect for effect in self._effects if effect._lasting <= clock]
+            expired.sort(key=EXPIRY_ORDER)
+            for effect in expired:
+                effect.on_expire(character)  # Still present, as in the list version.
+            for effect in expired:
+                self.remove(effect)
+            if self._expiry is None and self._effects:
+                self._due = min(effect._lasting for effect in self._effects)
+            return expired
+        else:
+            expired = []
+            while expiry and expiry[0][0] <= clock:
+                _, order, effect = heapq.heappop(expiry)
+                if effect._store is not self or effect._order != order:
+                    continue  # Removed or rescheduled since this entry was pushed.
+                effect.on_expire(character)
+                expired.append(effect)
+        for effect in expired:
+            self.remove(effect)
+        return expired
+
+    # Pass action damage against the character through the on_damage hooks of
+    # active effects, oldest first; returns the damage left to deal.
+    def absorb(self, character, damage):
+        for effect in list(self._guards):
+            damage = effect.on_damage(character, damage)
+        return damage
+
+# Tick the effects of many characters in one batched pass, e.g. every player
+# once per round: the ticking effects of all characters are gathered first and
+# each effect type runs its instances through one tick_many() call, then every
+# store advances. Returns (character, expired effects) for each character that
+# lost effects.
+def tick_all(characters, rng=None):
+    groups = {}
+    for character in characters:
+        for effect in character.status_effects.ticking():
+            groups.setdefault(type(effect), []).append((effect, character))
+    for effect_type, pairs in groups.items():
+        effect_type.tick_many(pairs, rng)
+    ended = []
+    for character in characters:
+        expired = character.status_effects.advance(character)
+        if expired:
+            ended.append((character, expired))
+    return ended
+
+# Poison effect: damages the character each turn.
+# With a spread, each tick in a battle deals damage +/- spread, rolled uniformly.
+class Poison(StatusEffects):
+    __slots__ = ("damage", "spread")
+    stacking = "stack"
+
+    def __init__(self, damage, duration=3, spread=0):
+        super().__init__("Poison", lasting=duration)
+        self.damage = damage
+        self.spread = spread
+
+    def state_key(self):
+        return (Poison, self.lasting, self.damage, self.spread)
+
+    def on_tick(self, character, rng=None):
+        damage = self.damage
+        if self.spread and rng is not None:
+            damage = round(damage + self.spread * (2 * rng.random() - 1), 1)
+        show("poisoned", character.name, damage)
+        character.health -= damage
+
+    # With no text to show, stacks without spread skip the per-effect call.
+    @classmethod
+    def tick_many(cls, pairs, rng=None):
+        if enabled(ACTION):
+            return super().tick_many(pairs, rng)
+        for effect, character in pairs:
+            if effect.spread and rng is not None:
+                effect.on_tick(character, rng)
+            else:
+                character.health -= effect.damage
+
+# Stun effect: the character loses its turns while stunned.
+class Stun(StatusEffects):
+    __slots__ = ()
+    blocks_action = True
+
+    def __init__(self, duration=2):
+        super().__init__("Stun", lasting=duration)
+
+    def on_tick(self, character, rng=None):
+        show("stunned", character.name)
+
+# Extra Defense effect (Iron Fortress). Its boost was only ever added when the
+# effect was not yet active, which never happens in battle, so it changes no
+# stats; balance data and BattleKernel depend on that, so it declares no
+# modifier. Fortify is the effect that raises defense.
+class ExtraDefense(StatusEffects):
+    __slots__ = ("defense_boost",)
+    stacking = "stack"
+
+    def __init__(self, defense_boost, duration=3):
+        super().__init__("Extra Defense", lasting=duration)
+        self.defense_boost = defense_boost
+
+    def state_key(self):
+        return (ExtraDefense, self.lasting, self.defense_boost)
+
+# Fortify effect: raises defense by defense_boost while active.
+class Fortify(StatusEffects):
+    __slots__ = ("defense_boost",)
+    stacking = "stack"
+    modifiers = (Modifier("defense", ADD, "defense_boost"),)
+
+    def __init__(self, defense_boost, duration=3):
+        super().__init__("Fortify", lasting=duration)
+        self.defense_boost = defense_boost
+
+    def state_key(self):
+        return (Fortify, self.lasting, self.defense_boost)
+
+    def on_apply(self, character):
+        show("defense_up", character.name, self.defense_boost, self.lasting)
+
+    def on_expire(self, character):
+        show("defense_ended", character.name)
+
+# Weaken effect: multiplies attack power by factor while active.
+class Weaken(StatusEffects):
+    __slots__ = ("factor",)
+    stacking = "refresh"
+    modifiers = (Modifier("attack_power", MUL, "factor"),)
+
+    def __init__(self, factor=0.5, duration=2):
+        super().__init__("Weaken", lasting=duration)
+        self.factor = factor
+
+    def state_key(self):
+        return (Weaken, self.lasting, self.factor)
+
+# Ward effect: every hit from an action deals `amount` less damage while active.
+class Ward(StatusEffects):
+    __slots__ = ("amount",)
+    stacking = "refresh"
+
+    def __init__(self, amount, duration=2):
+        super().__init__("Ward", lasting=duration)
+        self.amount = amount
+
+    def state_key(self):
+        return (Ward, self.lasting, self.amount)
+
+    def on_damage(self, character, damage):
+        blocked = min(self.amount, damage)
+        if blocked > 0:
+            show("warded", character.name, self.name, blocked)
+        return damage - blocked
+
+# Effect types by the name rulesets use for them.
+EFFECT_TYPES = {"Poison": Poison, "Stun": Stun, "ExtraDefense": ExtraDefense, "Fortify": Fortify, "Weaken": Weaken,
+                "Ward": Ward}
@@ -0,0 +1,132 @@
+import io
+import json
+import pytest
+import Ruleset
+from BattleLog import BattleRecorder, BattleLogReader
+from BattleManager import BattleManager
+from CharacterFactory import CharacterFactory
+from Display import muted
+from Policy import RandomPolicy
+from Simulation import run_match
+
+ROSTER = ["Voidcaster", "Nightstalker", "Stoneguard"]
+# Built-in characters with moves that apply Fortify, Weaken and Ward.
+MODIFIER_RULES = {
+    "moves": {
+        "Bulwark": {"target": "self", "cooldown": 2,
+                    "effect": {"type": "Fortify", "args": {"defense_boost": 6, "duration": 3}}},
+        "Hex": {"damage": {"multiplier": 1.0, "defense_factor": 0.5}, "cooldown": 2,
+                "effect": {"type": "Weaken", "args": {"factor": 0.7, "duration": 2}}},
+        "Aegis": {"target": "self", "cooldown": 3, "effect": {"type": "Ward", "args": {"amount": 8, "duration": 2}}},
+    },
+    "characters": {
+        "Voidcaster": {"health": 85, "move": "Hex", "attack_power": 28, "defense": 8},
+        "Nightstalker": {"health": 80, "move": "Bulwark", "attack_power": 30, "defense": 7},
+        "Stoneguard": {"health": 120, "move": "Aegis", "attack_power": 18, "defense": 15},
+    },
+}
+
+# Play a seeded battle, optionally stopping early, and return its players.
+def play(seed, max_turns, recorder=None, rules=None):
+    players = [CharacterFactory.create_character(name, rules) for name in ROSTER]
+    battle = BattleManager(players, policy=RandomPolicy(seed), delay=0, max_turns=max_turns, recorder=recorder,
+                           seed=seed)
+    with muted():
+        battle.start_battle()
+    return players
+
+def describe(character):
+    return (character.name, character.health, character.attack_power, character.defense, character.special_move_cooldown,
+            [e.state_key() for e in character.status_effects])
+
+#Test that replaying to any turn gives the same state as playing to that turn
+@pytest.mark.parametrize("seed", [1, 2, 3, 4])
+def test_replay_matches_live_state(seed):
+    stream = io.BytesIO()
+    play(seed, 200, BattleRecorder(stream, snapshot_interval=4))
+    reader = BattleLogReader(stream.getvalue())
+    assert reader.names == ROSTER
+    for turn in range(reader.turns() + 1):
+        replayed = reader.state_at(turn).to_characters()
+        live = play(seed, turn)
+        assert [describe(c) for c in replayed] == [describe(c) for c in live]
+
+#Test that the log contains the expected event types and snapshots
+def test_log_events_and_snapshots():
+    stream = io.BytesIO()
+    result = run_match(ROSTER, "greedy", recorder=BattleRecorder(stream, snapshot_interval=2))
+    reader = BattleLogReader(stream.getvalue())
+    names = [name for name, _ in reader.events()]
+    assert names[0] == "snapshot"
+    assert names[-1] == "end"
+    assert {"turn_start", "action", "health", "status_applied", "eliminated"} <= set(names)
+    assert names.count("turn_start") == result.turns
+    assert reader.snapshot_turns == list(range(0, result.turns, 2))
+
+#Test that the log is written to the stream as the battle is played, not only at the end
+def test_flushes_during_play():
+    writes = []
+    class Stream(io.BytesIO):
+        def write(self, data):
+            writes.append(len(data))
+            return super().write(data)
+    stream = Stream()
+    play(1, 200, BattleRecorder(stream, snapshot_interval=4))
+    reader = BattleLogReader(stream.getvalue())
+    assert len(writes) == len(reader.snapshot_turns), "One write per later snapshot, plus one at the end"
+    writes.clear()
+    play(1, 200, BattleRecorder(Stream(), snapshot_interval=1000, flush_size=1))
+    assert len(writes) == reader.turns() + 1
+
+#Test replaying battles whose effects change attack power and defense or absorb damage
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_replay_modifier_effects(tmp_path, seed):
+    path = tmp_path / "modifiers.json"
+    path.write_text(json.dumps(MODIFIER_RULES))
+    rules = Ruleset.load(str(path))
+    stream = io.BytesIO()
+    play(seed, 200, BattleRecorder(stream, snapshot_interval=4), rules)
+    reader = BattleLogReader(stream.getvalue())
+    names = {name for name, _ in reader.events()}
+    assert {"attack_power", "status_applied"} <= names
+    kinds = {effect[0] for turn in range(reader.turns() + 1) for player in reader.state_at(turn).players
+             for effect in player.effects}
+    assert {3, 4, 5} <= kinds, "Fortify, Weaken and Ward are all recorded"
+    for turn in range(reader.turns() + 1):
+        replayed = reader.state_at(turn).to_characters()
+        live = play(seed, turn, rules=rules)
+        assert [describe(c) for c in replayed] == [describe(c) for c in live]
+        with muted():
+            for character in replayed + live:
+                for _ in range(3):
+                    character.process_status_effects()
+        assert [describe(c) for c in replayed] == [describe(c) for c in live], "Modifiers come off the same way"
+
+#Test replayed poison keeps its spread, as in the live ruleset
+def test_replay_poison_spread():
+    rules = Ruleset.load_named("live")
+    stream = io.BytesIO()
+    play(3, 200, BattleRecorder(stream, snapshot_interval=4), rules)
+    reader = BattleLogReader(stream.getvalue())
+    spreads = {effect[3] for turn in range(reader.turns() + 1) for player in reader.state_at(turn).players
+               for effect in player.effects if effect[0] == 0}
+    assert spreads == {1}
+    for turn in range(reader.turns() + 1):
+        replayed = reader.state_at(turn).to_characters()
+        assert [describe(c) for c in replayed] == [describe(c) for c in play(3, turn, rules=rules)]
+
+#Test replaying a battle with ruleset-only characters finds the ruleset the log names
+def test_replay_ruleset_characters():
+    rules = Ruleset.load_named("raid")
+    players = [CharacterFactory.create_character(name, rules) for name in ("Colossus", "Gladiator", "Voidcaster")]
+    stream = io.BytesIO()
+    battle = BattleManager(players, policy=RandomPolicy(2), delay=0, max_turns=40, seed=2,
+                           recorder=BattleRecorder(stream, ruleset=rules))
+    with muted():
+        battle.start_battle()
+    reader = BattleLogReader(stream.getvalue())
+    assert reader.ruleset_digest == rules.digest
+    Ruleset._loaded.pop(rules.digest)
+    replayed = reader.state_at(reader.turns()).to_characters()
+    assert [describe(c) for c in replayed] == [describe(c) for c in players]
+    assert type(replayed[0]).__name__ == "Colossus" and replayed[0].special_action.name == players[0].special_action.name
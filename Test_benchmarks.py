@@ -0,0 +1,133 @@
+import json
+import os
+import platform
+import tracemalloc
+from itertools import combinations
+import pytest
+from Action import ATTACK_ACTION
+from BattleManager import BattleManager
+from CharacterFactory import CharacterFactory
+from Display import muted
+from Policy import RandomPolicy
+from Simulation import run_match
+from StatusEffect import Fortify, Poison, Stun, Ward
+
+pytest.importorskip("pytest_benchmark")
+
+# Performance suite for the battle engine, run with pytest-benchmark:
+#
+#   python -m pytest Test_benchmarks.py                  # compare with the baseline
+#   BENCH_SAVE=1 python -m pytest Test_benchmarks.py     # record a new baseline
+#
+# Each workload's median round (and the memory workload's bytes) is kept in a
+# local baseline file. The first run on a machine records it; later runs fail
+# any workload that got more than BENCH_THRESHOLD (default 20%) slower or
+# bigger. Baselines depend on the machine and Python version, so they are not
+# committed, and a file from another environment is replaced.
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".benchmarks", "engine_baseline.json")
+THRESHOLD = float(os.environ.get("BENCH_THRESHOLD", "0.2"))
+SAVE = os.environ.get("BENCH_SAVE") == "1"
+ENVIRONMENT = f"{platform.python_implementation()} {platform.python_version()} {platform.machine()} {platform.node()}"
+
+ROSTERS = list(combinations(CharacterFactory.character_names(), 3))
+MATCHES_PER_ROUND = 20
+CALLS_PER_ROUND = 100  # Special moves per round, on fresh characters.
+LONG = 10 ** 6  # Effect duration that outlasts the benchmark.
+
+# Rounds of at least 0.2 ms keep timer resolution out of the microsecond workloads.
+pytestmark = pytest.mark.benchmark(max_time=0.5, min_rounds=5, min_time=0.0002)
+
+# Baseline values by workload name, written back when the module finishes if any changed.
+@pytest.fixture(scope="module")
+def baseline():
+    values = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH) as handle:
+            stored = json.load(handle)
+        if stored.get("environment") == ENVIRONMENT:
+            values = stored["values"]
+    recorded = dict(values)
+    yield recorded
+    if recorded != values:
+        os.makedirs(os.path.dirname(BASELINE_PATH), exist_ok=True)
+        temporary = BASELINE_PATH + ".tmp"
+        with open(temporary, "w") as handle:
+            json.dump({"environment": ENVIRONMENT, "values": recorded}, handle, indent=1, sort_keys=True)
+        os.replace(temporary, BASELINE_PATH)
+
+# Compare a measurement with its baseline, recording it if there is none yet (or BENCH_SAVE=1).
+def check(baseline, name, value, unit):
+    stored = baseline.get(name)
+    if stored is None or SAVE:
+        baseline[name] = value
+        return
+    assert value <= stored * (1 + THRESHOLD), \
+        f"{name}: {value:.4g} {unit}, baseline {stored:.4g} {unit} (+{THRESHOLD:.0%} allowed)"
+
+# Median seconds per round of a finished benchmark, divided by the calls each round made.
+def per_call(benchmark, calls=1):
+    if benchmark.stats is None:
+        pytest.skip("benchmarks are disabled")
+    return benchmark.stats.stats.median / calls
+
+#Benchmark one normal attack
+def test_attack_latency(benchmark, baseline):
+    gladiator = CharacterFactory.create_character("Gladiator")
+    stoneguard = CharacterFactory.create_character("Stoneguard")
+    with muted():
+        benchmark(ATTACK_ACTION.execute, gladiator, stoneguard)
+    check(baseline, "attack", per_call(benchmark), "s")
+
+#Benchmark each character's special move on a fresh attacker and target
+@pytest.mark.parametrize("name", CharacterFactory.character_names())
+def test_special_move_latency(benchmark, baseline, name):
+    def fresh():
+        pairs = [(CharacterFactory.create_character(name), CharacterFactory.create_character("Gladiator"))
+                 for _ in range(CALLS_PER_ROUND)]
+        return (pairs,), {}
+
+    def specials(pairs):
+        for attacker, target in pairs:
+            attacker.special_action.execute(attacker, target)
+
+    with muted():
+        benchmark.pedantic(specials, setup=fresh, rounds=100)
+    check(baseline, f"special[{name}]", per_call(benchmark, CALLS_PER_ROUND), "s")
+
+#Benchmark ticking many stacked effects
+@pytest.mark.parametrize("stacks", [1, 12, 48])
+def test_status_effect_ticks(benchmark, baseline, stacks):
+    character = CharacterFactory.create_character("Stoneguard")
+    kinds = [lambda: Poison(0, duration=LONG), lambda: Fortify(0, duration=LONG), lambda: Ward(0, duration=LONG)]
+    for index in range(stacks):
+        character.status_effects.append(kinds[index % len(kinds)]())
+    with muted():
+        benchmark(character.process_status_effects)
+    check(baseline, f"effects[{stacks}]", per_call(benchmark), "s")
+
+#Benchmark full headless matches for every roster
+@pytest.mark.parametrize("roster", ROSTERS, ids="-".join)
+def test_match_throughput(benchmark, baseline, roster):
+    def play():
+        for seed in range(MATCHES_PER_ROUND):
+            run_match(roster, "random", seed)
+
+    benchmark(play)
+    seconds = per_call(benchmark, MATCHES_PER_ROUND)
+    benchmark.extra_info["matches_per_second"] = 1 / seconds
+    check(baseline, f"match[{'-'.join(roster)}]", seconds, "s")
+
+#Measure bytes per live battle
+def test_memory_per_battle(baseline):
+    def battle(seed):
+        players = [CharacterFactory.create_character(name) for name in ROSTERS[0]]
+        players[0].status_effects.append(Poison(3))
+        players[1].status_effects.append(Stun(2))
+        return BattleManager(players, policy=RandomPolicy(seed), delay=0)
+
+    tracemalloc.start()
+    start, _ = tracemalloc.get_traced_memory()
+    live = [battle(seed) for seed in range(2000)]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    check(baseline, "memory", (current - start) / len(live), "bytes")
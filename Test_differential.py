@@ -0,0 +1,37 @@
+from BattleLog import BattleLogReader
+from BattleManager import BattleManager
+from Differential import DifferentialTester, Variant, reference, replay, shrink, write_log
+from Policy import ATTACK
+
+# Attacks deal one extra point of damage to badly hurt targets.
+class SloppyBattle(BattleManager):
+    __slots__ = ()
+
+    def perform_action(self, player, choice, target=None):
+        super().perform_action(player, choice, target)
+        if choice == ATTACK and 0 < target.health < 40:
+            target.health -= 1
+
+def play_sloppy(case):
+    return reference(case, SloppyBattle)
+
+#Test every shipped variant agrees with the reference on generated cases
+def test_variants_agree():
+    report = DifferentialTester(seed=3, workers=1, chunk_size=20, max_turns=80).run(cases=60)
+    assert report.cases == 60 and report.divergences == []
+    assert all(report.turns[name] > 0 for name in ("rollback", "clone", "log", "per_target"))
+
+#Test a faulty variant is caught, shrunk and saved as a replayable log
+def test_divergence_shrinks_to_log(tmp_path):
+    sloppy = Variant("sloppy", play_sloppy)
+    report = DifferentialTester([sloppy], seed=2, workers=1, chunk_size=10).run(cases=30)
+    assert report.divergences
+    found = report.divergences[0]
+    small = shrink(found, [sloppy])
+    assert small.turn <= found.turn and len(small.case.roster) <= len(found.case.roster)
+    assert small.case.max_turns == small.turn and small.case.policy == "scripted"
+    path = str(tmp_path / "sloppy.battlelog")
+    write_log(small, path)
+    with open(path, "rb") as handle:
+        assert BattleLogReader(handle.read()).turns() == small.turn
+    assert replay(path, [sloppy]) == small
@@ -0,0 +1,59 @@
+import io
+from BattleManager import BattleManager
+from CharacterFactory import CharacterFactory
+from Display import (BufferedRenderer, Renderer, StructuredRenderer, TerminalRenderer, RESULT, format_event,
+                     rendering)
+from Policy import RandomPolicy
+
+ROSTER = ["Gladiator", "Voidcaster", "Nightstalker"]
+
+def play(renderer, seed=4):
+    players = [CharacterFactory.create_character(name) for name in ROSTER]
+    with rendering(renderer):
+        return BattleManager(players, policy=RandomPolicy(seed), delay=0, max_turns=300).start_battle()
+
+# Stream that counts write calls.
+class CountingStream(io.StringIO):
+    writes = 0
+
+    def write(self, text):
+        self.writes += 1
+        return super().write(text)
+
+#Test the buffered renderer prints the same text in one write per turn
+def test_buffered_matches_terminal():
+    direct = io.StringIO()
+    result = play(TerminalRenderer(stream=direct))
+    buffered = CountingStream()
+    play(BufferedRenderer(stream=buffered))
+    assert buffered.getvalue() == direct.getvalue()
+    assert "LET THE BATTLE COMMENCE!" in direct.getvalue()
+    assert buffered.writes <= result.turns + 2
+
+#Test structured events reach the sink turn by turn
+def test_structured_events():
+    turns = []
+    result = play(StructuredRenderer(sink=turns.append))
+    events = [event for turn in turns for event in turn]
+    assert events[0] == {"event": "battle_start"}
+    assert events[-1] == {"event": "winner", "winner": result.winner}
+    assert sum(event["event"] == "turn" for event in events) == result.turns
+    special = next(event for event in events if event["event"] == "special")
+    assert set(special) == {"event", "message", "attacker", "target", "count", "move", "damage"}
+    values = [special[name] for name in ("message", "attacker", "target", "count", "move", "damage")]
+    assert format_event("special", values) == special["message"].format(**special)
+
+#Test events above the renderer's level are never delivered
+def test_level_gating():
+    class Recorder(Renderer):
+        def __init__(self):
+            self.level = RESULT
+            self.kinds = []
+
+        def event(self, kind, values):
+            self.kinds.append(kind)
+
+    renderer = Recorder()
+    play(renderer)
+    assert renderer.kinds[0] == "battle_start" and renderer.kinds[-1] in ("winner", "draw")
+    assert len(renderer.kinds) == 2
@@ -0,0 +1,67 @@
+from Action import ATTACK_ACTION, DEFEND_ACTION
+from BattleManager import BattleManager
+from CharacterFactory import CharacterFactory
+from Display import muted
+from Policy import RandomPolicy
+from StatusEffect import Fortify, Poison, Stun, Ward, Weaken
+
+ROSTER = ["Gladiator", "Voidcaster", "Nightstalker"]
+
+def make_players():
+    return [CharacterFactory.create_character(name) for name in ROSTER]
+
+#Test stat modifiers stack, survive Defend and come off exactly
+def test_modifier_stack():
+    gladiator = make_players()[0]
+    with muted():
+        gladiator.apply_status_effect(Fortify(5, duration=1))
+        gladiator.apply_status_effect(Weaken(0.5, duration=2))
+        assert gladiator.defense == 17 and gladiator.attack_power == 12.5
+        snapshot = gladiator.snapshot()
+        twin = gladiator.clone()
+        DEFEND_ACTION.execute(gladiator)
+        assert gladiator.defense == 29, "Defend doubles the base, modifiers stay on top"
+        gladiator.process_status_effects()
+        assert gladiator.defense == 24 and gladiator.attack_power == 12.5
+        gladiator.status_effects.scale("defense", 0.5)
+        gladiator.process_status_effects()
+        assert (gladiator.defense, gladiator.attack_power) == (12, 25)
+        gladiator.restore(snapshot)
+        assert gladiator.defense == 17 and gladiator.attack_power == 12.5
+        twin.process_status_effects()
+        twin.process_status_effects()
+        assert (twin.defense, twin.attack_power) == (12, 25)
+
+#Test on_damage hooks reduce hits and blocking effects stun
+def test_ward_and_stun():
+    gladiator, voidcaster, _ = make_players()
+    with muted():
+        voidcaster.apply_status_effect(Ward(10))
+        ATTACK_ACTION.execute(gladiator, voidcaster)
+        assert voidcaster.health == 85 - (25 - 4 - 10)
+        assert not voidcaster.is_stunned
+        voidcaster.apply_status_effect(Stun(1))
+        assert voidcaster.is_stunned
+        voidcaster.process_status_effects()
+        assert not voidcaster.is_stunned and voidcaster.status_effects.guarded == 1
+
+#Test round timing ticks every player's effects once per round
+def test_round_timing():
+    players = make_players()
+    for player in players:
+        player.status_effects.append(Poison(2))
+    battle = BattleManager(players, policy=RandomPolicy(5), delay=0, max_turns=300, effect_timing="round")
+    with muted():
+        turns = battle.turns()
+        battle.process_turn(next(turns))
+        assert [player.status_effects.clock for player in players] == [1, 1, 1]
+        battle.process_turn(next(turns))
+        assert [player.status_effects.clock for player in players] == [1, 1, 1]
+        assert battle.damage_taken[2] >= 2
+        result = battle.start_battle()
+    assert result.turns == battle.turn and (result.winner is None) == (len(battle.get_alive_players()) > 1)
+
+#Test poison state keys tell apart poisons that differ only in spread
+def test_poison_state_key():
+    assert Poison(3, 3).state_key() == Poison(3, 3, spread=0).state_key()
+    assert Poison(3, 3).state_key() != Poison(3, 3, spread=2).state_key()
@@ -0,0 +1,34 @@
+import json
+from Instrumentation import Instrumentation
+from Simulation import run_match
+
+ROSTER = ["Gladiator", "Voidcaster", "Nightstalker"]
+
+#Test phase timers and counters agree with the battle
+def test_instrumented_match_counts():
+    probe = Instrumentation()
+    plain = run_match(ROSTER, seed=7)
+    result = run_match(ROSTER, seed=7, instrumentation=probe)
+    assert result == plain, "Instrumentation must not change the outcome"
+    snapshot = probe.snapshot()
+    phases = snapshot["phases"]
+    counters = snapshot["counters"]
+    assert counters["turns"] == result.turns and counters["battles"] == 1
+    assert phases["status_effects"]["calls"] == result.turns
+    actions = sum(counters.get(name, 0) for name in ("action.attack", "action.defend", "action.special"))
+    assert actions == phases["choose_action"]["calls"] == result.turns - counters.get("stunned_turns", 0)
+    assert phases["choose_target"]["turns_per_second"] > 0
+
+#Test exports and merging snapshots from several workers
+def test_instrumentation_exports(tmp_path):
+    probe = Instrumentation()
+    run_match(ROSTER, seed=1, instrumentation=probe)
+    total = Instrumentation()
+    total.merge(probe.snapshot())
+    total.merge(json.loads(probe.to_json()))
+    assert total.counters["turns"] == 2 * probe.counters["turns"]
+    path = tmp_path / "metrics.prom"
+    total.write(str(path))
+    text = path.read_text()
+    assert "# TYPE battle_phase_seconds_total counter" in text
+    assert f'battle_events_total{{event="turns"}} {total.counters["turns"]}' in text
@@ -0,0 +1,31 @@
+import pytest
+from itertools import permutations
+from CharacterFactory import CharacterFactory
+from Simulation import run_match
+
+np = pytest.importorskip("numpy")
+from BattleKernel import BattleKernel
+
+ROSTERS = list(permutations(CharacterFactory.character_names(), 3))
+
+#Test that the kernel reproduces the object engine for every roster order
+@pytest.mark.parametrize("policy", ["random", "greedy"])
+def test_kernel_matches_object_engine(policy):
+    rosters = [ROSTERS[i % len(ROSTERS)] for i in range(180)]
+    seeds = list(range(1000, 1180))
+    results = BattleKernel(rosters, seeds, policy).run().results()
+    for roster, seed, result in zip(rosters, seeds, results):
+        assert result == run_match(roster, policy, seed)
+
+#Test that the turn limit produces the same draws
+def test_kernel_turn_limit():
+    roster = ["Gladiator", "Stoneguard", "Stormstriker"]
+    results = BattleKernel(roster, range(50), "random", max_turns=6).run().results()
+    for seed, result in enumerate(results):
+        assert result == run_match(roster, "random", seed, max_turns=6)
+        assert result.turns <= 6
+
+#Test that unsupported policies are rejected
+def test_kernel_rejects_scripted_policy():
+    with pytest.raises(ValueError):
+        BattleKernel(["Gladiator", "Voidcaster", "Stoneguard"], [0], "scripted")
@@ -0,0 +1,36 @@
+from BattleManager import MatchResult
+from MatchStore import MatchStore
+
+ROSTER = ("Nightstalker", "Stoneguard", "Gladiator")
+
+def result(winner, turns):
+    return MatchResult(winner, turns, {name: 10.0 for name in ROSTER}, {name: 5.0 for name in ROSTER})
+
+#Test queries answered from the outcome counts agree with the stored rows
+def test_queries_match_rows(tmp_path):
+    path = str(tmp_path / "history.db")
+    with MatchStore(path, batch_size=7) as store:
+        store.simulate(list(ROSTER), 60, seed=4)
+        store.simulate(["Voidcaster", "Stoneguard", "Stormstriker"], 30, seed=4)
+    store = MatchStore(path)
+    rows = store.matches(limit=1000)
+    assert len(rows) == store.count() == 90
+    nightstalker = [row for row in rows if "Nightstalker" in row[1]]
+    early = [row for row in nightstalker if row[4] is not None and row[4] < 3]
+    rate = store.win_rate("Nightstalker", against=["Stoneguard"], poisoned_before=3)
+    assert rate.matches == len(early) and rate.wins == sum(row[2] == "Nightstalker" for row in early)
+    assert store.count(["Stoneguard"], min_turns=10, max_turns=20) == sum(10 <= row[3] <= 20 for row in rows)
+    assert sum(store.turn_histogram(["Nightstalker"]).values()) == len(nightstalker)
+    store.close()
+
+#Test buffered matches, draws and per-player rows
+def test_add_and_participants():
+    store = MatchStore(":memory:", batch_size=100)
+    store.add(ROSTER, result("Stoneguard", 12), poisoned=[None, 2, None], seed=1)
+    store.add(ROSTER, result(None, 500))
+    assert store.count() == 2, "Queries flush the buffer first"
+    assert store.win_rate("Stoneguard", against=["Nightstalker"]) == (1, 2, 0.5)
+    assert store.count(poisoned_before=3) == 1 and store.count(poisoned_before=2) == 0
+    assert store.matches(winner="Stoneguard") == [(1, ROSTER, "Stoneguard", 12, 2, 1)]
+    assert store.participants(1)[1] == (1, "Stoneguard", 10.0, 5.0, 2)
+    assert store.count(["Voidcaster"]) == 0
@@ -0,0 +1,54 @@
+import random
+from CharacterFactory import CharacterFactory
+from Matchmaking import Matchmaker, MatchmakingService, Ratings
+
+#Test a win moves ratings by the pairwise Elo expectation and conserves the total
+def test_rating_update():
+    ratings = Ratings()
+    assert ratings.update(["a", "b", "c"], "a") == [32.0, -16.0, -16.0]
+    changes = ratings.update(["a", "b", "c"], None)
+    assert changes[0] < 0 < changes[1] == changes[2], "A draw favours the lower-rated players"
+    assert abs(sum(ratings.rating(player) for player in "abc") - 4500.0) < 1e-9
+
+#Test matches have distinct characters, keep their spread within the oldest window and widen with waiting
+def test_queue_windows_and_characters():
+    matchmaker = Matchmaker()
+    rng = random.Random(0)
+    names = CharacterFactory.character_names()
+    matches = []
+    for index in range(3000):
+        character = rng.choice(names + [None])
+        ticket, match = matchmaker.enqueue(index, rng.gauss(1500, 300), character, now=index / 100)
+        if index == 0:
+            matchmaker.cancel(ticket)
+        matches += [match] if match is not None else []
+        matches += matchmaker.poll(index / 100)
+    assert 3 * len(matches) + matchmaker.waiting + 1 == 3000
+    for match in matches:
+        assert len(set(match.characters())) == 3 and None not in match.characters()
+        assert 0 not in match.players()
+        assert match.spread() <= matchmaker.window(match.tickets[0], match.formed)
+    far = Matchmaker()
+    far.enqueue("low", 1000, "Gladiator")
+    far.enqueue("mid", 1050, "Voidcaster", now=1.0)
+    assert far.enqueue("high", 1400, "Stoneguard", now=2.0)[1] is None
+    assert far.poll(5.0) == []
+    match, = far.poll(14.0)
+    assert match.players() == ["low", "mid", "high"] and far.waiting == 0
+
+#Test ratings from played matches rank greedy players above random ones
+def test_service_ratings():
+    policies = {f"p{index}": "greedy" if index % 2 else "random" for index in range(30)}
+    service = MatchmakingService(policies=policies, seed=1)
+    idle = list(policies)
+    now = 0.0
+    while service.played < 400:
+        now += 0.1
+        matches = service.poll(now)
+        match = service.queue(idle.pop(0), None, now) if idle else None
+        for match in matches + ([match] if match is not None else []):
+            service.play(match)
+            idle.extend(match.players())
+    mean = {spec: sum(service.ratings.rating(p) for p in policies if policies[p] == spec) / 15
+            for spec in ("greedy", "random")}
+    assert mean["greedy"] > mean["random"] + 60
@@ -0,0 +1,57 @@
+import Ruleset
+from BattleManager import BattleManager
+from CharacterFactory import CharacterFactory
+from Display import muted
+from Policy import GreedyPolicy, ATTACK
+from Rng import BattleRng, COMBAT_LANE, uniform
+from Simulation import run_match, run_matches
+
+ROSTER = ["Gladiator", "Voidcaster", "Nightstalker"]
+LIVE = Ruleset.load_named("live")
+
+def combat_ruleset(**combat):
+    return Ruleset.compile_ruleset({
+        "combat": combat,
+        "moves": {"Smash": {"damage": {"multiplier": 2.0, "minimum": 10}}},
+        "characters": {"Brute": {"health": 100, "move": "Smash", "attack_power": 20, "defense": 10}},
+    }, digest=f"combat-{sorted(combat.items())}")
+
+#Test single and batched draws are the same counter-keyed stream
+def test_battle_rng_stream():
+    rng = BattleRng(42)
+    draws = [rng.random() for _ in range(5)] + rng.batch(3) + rng.batch(100) + [rng.random()]
+    assert draws == [uniform(42, counter, COMBAT_LANE) for counter in range(109)]
+    assert rng.counter == 109 and all(0 <= draw < 1 for draw in draws)
+
+#Test combat rolls are reproducible per seed and absent from the default ruleset
+def test_rolls_reproducible():
+    first = list(run_matches(ROSTER, 10, seed=5, ruleset=LIVE))
+    assert first == list(run_matches(ROSTER, 10, seed=5, ruleset=LIVE))
+    assert first != list(run_matches(ROSTER, 10, seed=50, ruleset=LIVE))
+    assert run_match(ROSTER, seed=5, ruleset=LIVE) == first[0]
+    players = [CharacterFactory.create_character(name) for name in ROSTER]
+    battle = BattleManager(players, policy=GreedyPolicy(), delay=0, max_turns=200, seed=1)
+    with muted():
+        battle.start_battle()
+    assert battle.rng.counter == 0, "Deterministic rulesets draw nothing"
+
+#Test accuracy and critical hits change attack damage
+def test_hit_and_crit_rolls():
+    for combat, expected in (({"accuracy": 0.0}, 100), ({"crit_chance": 1.0, "crit_multiplier": 3.0}, 55)):
+        rules = combat_ruleset(**combat)
+        attacker, target = (CharacterFactory.create_character("Brute", rules) for _ in range(2))
+        battle = BattleManager([attacker, target], policy=GreedyPolicy(), delay=0, seed=3)
+        with muted():
+            battle.perform_action(attacker, ATTACK, target)
+        assert target.health == expected
+        assert battle.rng.counter == 3
+
+#Test restoring a snapshot replays the same rolls
+def test_rolls_roll_back():
+    players = [CharacterFactory.create_character(name, LIVE) for name in ROSTER]
+    battle = BattleManager(players, policy=GreedyPolicy(), delay=0, max_turns=300, seed=9)
+    snapshot = battle.snapshot()
+    with muted():
+        first = battle.start_battle()
+        battle.restore(snapshot)
+        assert battle.start_battle() == first
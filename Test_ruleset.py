@@ -0,0 +1,68 @@
+import json
+import os
+import pytest
+import Ruleset
+from BattleManager import BattleManager
+from Character import Gladiator, RulesetCharacter
+from CharacterFactory import CharacterFactory
+from Policy import GreedyPolicy
+from StatusEffect import Poison
+
+MODDED = {
+    "moves": {
+        "Titan Smash": {"damage": {"multiplier": 3.0, "defense_factor": 1.0, "minimum": 10}, "cooldown": 3},
+        "Venom Bite": {"damage": {"multiplier": 1.0, "minimum": 5}, "cooldown": 2,
+                       "effect": {"type": "Poison", "args": {"damage": 4}}},
+    },
+    "characters": {
+        "Gladiator": {"health": 100, "move": "Titan Smash", "attack_power": 25, "defense": 12},
+        "Viper": {"health": 70, "abilities": "Venom", "move": "Venom Bite", "attack_power": 20, "defense": 5},
+    },
+}
+
+@pytest.fixture
+def modded_path(tmp_path):
+    path = tmp_path / "modded.json"
+    path.write_text(json.dumps(MODDED))
+    return str(path)
+
+#Test the default ruleset matches the built-in characters
+def test_default_ruleset_tables():
+    rules = Ruleset.default_ruleset()
+    assert CharacterFactory.character_names() == ["Gladiator", "Voidcaster", "Stormstriker", "Nightstalker", "Stoneguard"]
+    assert Gladiator.special_action is rules.move_for("Gladiator")
+    assert rules.cooldowns == (3, 4, 2, 3, 3)
+    assert rules.needs_target == (True, True, True, True, False)
+
+#Test a new class needs no code change
+def test_ruleset_adds_character(modded_path):
+    rules = Ruleset.load(modded_path)
+    viper = CharacterFactory.create_character("Viper", rules)
+    gladiator = CharacterFactory.create_character("Gladiator", rules)
+    assert isinstance(viper, RulesetCharacter) and isinstance(gladiator, Gladiator)
+    assert gladiator.special_action is not Gladiator.special_action
+    viper.do_special_moves(gladiator)
+    assert gladiator.health == 100 - max(5, 20 * 1.0)
+    assert gladiator.status_effects.count(Poison) == 1 and viper.special_move_cooldown == 2
+    gladiator.do_special_moves(viper)
+    assert viper.health == 70 - (25 * 3.0 - 5)
+    result = BattleManager([viper, gladiator], policy=GreedyPolicy(), delay=0, max_turns=200).start_battle()
+    assert result.winner in ("Viper", "Gladiator")
+
+#Test compiled rulesets are cached by file hash
+def test_ruleset_cache(modded_path):
+    Ruleset._loaded.clear()
+    rules = Ruleset.load(modded_path)
+    cached = Ruleset.cache_path(modded_path, rules.digest)
+    assert os.path.exists(cached)
+    Ruleset._loaded.pop(rules.digest)
+    reloaded = Ruleset.load(modded_path)
+    assert reloaded is not rules and reloaded.move_ids == rules.move_ids
+    assert reloaded.multipliers == rules.multipliers
+
+#Test invalid definitions are rejected
+def test_ruleset_rejects_unknown_move(tmp_path):
+    path = tmp_path / "broken.json"
+    path.write_text(json.dumps({"moves": {}, "characters": {"Ghost": {"health": 1, "move": "Boo", "attack_power": 1, "defense": 1}}}))
+    with pytest.raises(ValueError):
+        Ruleset.load(str(path))
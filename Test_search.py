@@ -0,0 +1,63 @@
+import time
+from BattleManager import BattleManager
+from CharacterFactory import CharacterFactory
+from Policy import GreedyPolicy, ATTACK, SPECIAL
+from SearchAI import SearchPolicy, SearchState, TranspositionTable, Node
+from StatusEffect import Poison
+
+ROSTER = ["Gladiator", "Voidcaster", "Nightstalker"]
+
+def new_battle(policy):
+    players = [CharacterFactory.create_character(name) for name in ROSTER]
+    return BattleManager(players, policy=policy, delay=0, max_turns=200)
+
+#Test cloned battles are independent of the original
+def test_battle_clone_is_independent():
+    battle = new_battle(GreedyPolicy())
+    gladiator, voidcaster, _ = battle.turn_order
+    voidcaster.status_effects.append(Poison(3))
+    twin = battle.clone()
+    twin_gladiator, twin_voidcaster, _ = twin.turn_order
+    twin.perform_action(twin_gladiator, SPECIAL, twin_voidcaster)
+    twin_voidcaster.process_status_effects()
+    assert voidcaster.health == 85 and gladiator.special_move_cooldown == 0
+    assert next(iter(voidcaster.status_effects)).lasting == 3
+    assert next(iter(twin_voidcaster.status_effects)).lasting == 2
+    assert SearchState(battle, gladiator).key() != SearchState(twin, twin_gladiator).key()
+
+#Test the transposition table evicts the least recently used node
+def test_transposition_table_lru():
+    table = TranspositionTable(capacity=2)
+    table.put(1, Node([]))
+    table.put(2, Node([]))
+    table.get(1)
+    table.put(3, Node([]))
+    assert table.get(2) is None and table.get(1) is not None and table.evictions == 1
+
+#Test the search finishes off the last opponent instead of defending
+def test_search_takes_the_kill():
+    battle = new_battle(GreedyPolicy())
+    gladiator, voidcaster, nightstalker = battle.turn_order
+    voidcaster.health = 0
+    nightstalker.health = 5
+    search = SearchPolicy(time_budget=None, iterations=200, seed=1)
+    battle.begin_turn(gladiator)
+    assert search.choose_action(battle, gladiator) in (ATTACK, SPECIAL)
+    assert search.choose_target(battle, gladiator, battle.targets_for(gladiator)) is nightstalker
+    assert search.playouts == 200 and len(search.table) > 1
+
+#Test a full battle with searching players
+def test_search_plays_full_battle():
+    search = SearchPolicy(time_budget=0.002, seed=0)
+    result = new_battle([search, GreedyPolicy(), GreedyPolicy()]).start_battle()
+    assert result.turns > 0 and search.playouts > 0
+
+#Test repeating positions without a turn limit end each search within its budget
+def test_search_handles_repeated_positions():
+    players = [CharacterFactory.create_character("Stoneguard") for _ in range(2)]
+    for search in (SearchPolicy(time_budget=0.02, seed=0), SearchPolicy(time_budget=None, iterations=100, seed=0)):
+        battle = BattleManager(players, policy=search, delay=0, max_turns=None)
+        player = next(battle.turns())
+        started = time.perf_counter()
+        search.choose_action(battle, player)
+        assert time.perf_counter() - started < 1.0 and search.playouts > 0
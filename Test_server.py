@@ -0,0 +1,51 @@
+import asyncio
+import json
+from BattleServer import BattleServer, encode
+from Display import muted
+
+# Connect a client that plays greedily, or never answers when idle is set.
+async def play(port, character, idle=False):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(encode({"type": "join", "name": character, "character": character}))
+    messages = []
+    while True:
+        line = await reader.readline()
+        if not line:
+            break
+        message = json.loads(line)
+        messages.append(message)
+        if message["type"] == "choose" and not idle:
+            reply = {"type": "action", "turn": message["turn"], "action": max(message["actions"])}
+            if message["targets"]:
+                reply["target"] = message["targets"][0]
+            writer.write(encode(reply))
+    writer.close()
+    return messages
+
+async def run_session(idle=False, turn_timeout=5.0):
+    server = await BattleServer(port=0, turn_timeout=turn_timeout, max_turns=30).start()
+    results = await asyncio.gather(
+        play(server.port, "Gladiator"),
+        play(server.port, "Voidcaster", idle=idle),
+        play(server.port, "Nightstalker"),
+    )
+    await server.stop()
+    return server, results
+
+#Test that three clients are matched and play a battle to the end
+def test_session_plays_to_completion():
+    with muted():
+        server, results = asyncio.run(run_session())
+    assert server.completed == 1
+    for messages in results:
+        assert messages[0]["type"] == "start"
+        assert messages[-1]["type"] == "end"
+    assert len(server.turn_latencies) == results[0][-1]["turns"]
+
+#Test that a silent player defends on timeout without stalling the session
+def test_turn_timeout_defends():
+    with muted():
+        server, results = asyncio.run(run_session(idle=True, turn_timeout=0.01))
+    assert server.completed == 1
+    assert results[1][-1]["type"] == "end"
+    assert results[1][-1]["winner"] != "Voidcaster"
@@ -0,0 +1,41 @@
+import pytest
+from BattleManager import BattleManager
+from CharacterFactory import CharacterFactory
+from Policy import RandomPolicy, ScriptedPolicy, ATTACK, DEFEND, SPECIAL
+from Simulation import run_match, run_matches
+from Display import muted
+
+ROSTER = ["Gladiator", "Voidcaster", "Nightstalker"]
+
+#Test that a headless match finishes with a single winner and no console output
+def test_headless_match_has_winner(capsys):
+    result = run_match(ROSTER, policy="greedy")
+    assert result.winner in ROSTER
+    assert result.turns > 0
+    assert capsys.readouterr().out == ""
+
+#Test that the same seed gives the same result
+def test_random_policy_is_reproducible():
+    first = list(run_matches(ROSTER, 20, policy="random", seed=7))
+    second = list(run_matches(ROSTER, 20, policy="random", seed=7))
+    assert first == second
+
+#Test that damage taken matches the health lost
+def test_damage_tracking():
+    players = [CharacterFactory.create_character(name) for name in ROSTER]
+    start = [p.health for p in players]
+    battle = BattleManager(players, policy=RandomPolicy(3), delay=0, max_turns=200)
+    with muted():
+        result = battle.start_battle()
+    for name, p, health in zip(ROSTER, players, start):
+        assert result.damage_taken[name] == pytest.approx(health - p.health)
+    assert sum(result.damage_dealt.values()) <= sum(result.damage_taken.values())
+
+#Test scripted policies drive actions and targets by name
+def test_scripted_policy():
+    script = [ScriptedPolicy([(SPECIAL, "Voidcaster")]), ScriptedPolicy([DEFEND]), ScriptedPolicy([(ATTACK, 0)])]
+    result = run_match(ROSTER, policy=script, max_turns=3)
+    assert result.turns == 3
+    assert result.winner is None
+    assert result.damage_dealt["Gladiator"] == max(10, 25 * 2.0 - 8)
+    assert result.damage_dealt["Voidcaster"] == 0
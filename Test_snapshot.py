@@ -0,0 +1,79 @@
+import copy
+import pickle
+from BattleManager import BattleManager
+from CharacterFactory import CharacterFactory
+from Display import muted
+from Policy import GreedyPolicy, RandomPolicy, DEFEND
+from StatusEffect import Poison, Stun, ExtraDefense
+
+ROSTER = ["Gladiator", "Voidcaster", "Nightstalker"]
+
+def make_battle(policy):
+    players = [CharacterFactory.create_character(name) for name in ROSTER]
+    return BattleManager(players, policy=policy, delay=0, max_turns=300)
+
+# Play the battle to the end from wherever it stands.
+def play_out(battle):
+    with muted():
+        for player in battle.turns():
+            battle.process_turn(player)
+    return battle.result()
+
+#Test restoring a mid-battle snapshot replays the same ending
+def test_rollback_replays_battle():
+    for policy in (RandomPolicy(3), GreedyPolicy()):
+        battle = make_battle(policy)
+        turns = battle.turns()
+        with muted():
+            for _ in range(7):
+                battle.process_turn(next(turns))
+        snapshot = battle.snapshot()
+        states = [player.state_key() for player in battle.turn_order]
+        alive = list(battle.get_alive_players())
+        first = play_out(battle)
+        battle.restore(snapshot)
+        assert [player.state_key() for player in battle.turn_order] == states
+        assert list(battle.get_alive_players()) == alive
+        assert play_out(battle) == first
+
+#Test restore undoes Defend and status effect changes
+def test_restore_character_state():
+    battle = make_battle(GreedyPolicy())
+    player = battle.turn_order[0]
+    player.status_effects.append(Poison(3))
+    snapshot = battle.snapshot()
+    with muted():
+        battle.perform_action(player, DEFEND)
+        player.apply_status_effect(Stun(2))
+        player.status_effects.append(ExtraDefense(2))
+        player.process_status_effects()
+    assert "(Defending)" in player.name and player.defense == 24
+    battle.restore(snapshot)
+    assert player.name == "Gladiator" and player.defense == 12 and player.health == 100
+    assert [type(effect) for effect in player.status_effects] == [Poison]
+    assert player.status_effects.of_type(Poison)[0].lasting == 3
+    with muted():
+        player.process_status_effects()
+    assert player.health == 97
+
+#Test unchanged effects are shared between snapshots
+def test_snapshots_share_effects():
+    battle = make_battle(GreedyPolicy())
+    store = battle.turn_order[0].status_effects
+    store.append(Poison(5))
+    first = store.snapshot()
+    with muted():
+        battle.turn_order[0].process_status_effects()
+    second = store.snapshot()
+    assert second[0] == first[0] + 1 and second[1] is first[1]
+    store.append(Stun(2))
+    assert store.snapshot()[1] is not first[1]
+    store.restore(first)
+    assert len(store) == 1 and store.snapshot() == first
+
+#Test deepcopy and pickle of battles whose players have no effects yet, as Bench_snapshot copies them
+def test_copy_fresh_battle():
+    for make in (copy.deepcopy, lambda battle: pickle.loads(pickle.dumps(battle))):
+        battle = make_battle(RandomPolicy(5))
+        copied = make(battle)
+        assert play_out(copied) == play_out(battle)
@@ -0,0 +1,76 @@
+import asyncio
+import json
+from BattleManager import BattleManager
+from BattleServer import BattleServer, FRAME_LENGTH, encode
+from CharacterFactory import CharacterFactory
+from Display import muted
+from Policy import GreedyPolicy
+from Spectator import SpectatorFeed, SpectatorView
+from Test_server import play
+
+ROSTER = ["Stoneguard", "Stoneguard", "Gladiator", "Voidcaster"]
+
+def healths(players):
+    return [player.health for player in players]
+
+#Test fast, slow and late subscribers all end with the battle's final state
+def test_fanout_and_resync():
+    players = [CharacterFactory.create_character(name) for name in ROSTER]
+    feed = SpectatorFeed(capacity=24, keyframe_interval=4)
+    battle = BattleManager(players, policy=GreedyPolicy(), delay=0, max_turns=120, recorder=feed)
+    fast, slow = feed.subscribe(), feed.subscribe()
+    views = {"fast": SpectatorView(), "slow": SpectatorView(), "late": SpectatorView()}
+    late = None
+    with muted():
+        for player in battle.turns():
+            battle.process_turn(player)
+            for frame in fast.poll():
+                views["fast"].apply(frame)
+            assert views["fast"].state().turn == battle.turn
+            if battle.turn % 40 == 0:
+                for frame in slow.poll():
+                    views["slow"].apply(frame)
+            if battle.turn == 30:
+                late = feed.subscribe()
+        battle.finish()
+    for subscriber, view in ((fast, views["fast"]), (slow, views["slow"]), (late, views["late"])):
+        for frame in subscriber.poll():
+            view.apply(frame)
+        assert subscriber.done()
+        assert healths(view.state().players) == healths(battle.turn_order)
+    assert fast.resyncs == 0 and slow.resyncs > 0
+    assert views["fast"].bytes < 40 * battle.turn, "Deltas, not full states"
+
+async def watch(port, read=True):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(encode({"type": "watch"}))
+    header = json.loads(await reader.readline())
+    view = SpectatorView()
+    while read:
+        prefix = await reader.read(FRAME_LENGTH.size)
+        if not prefix:
+            break
+        prefix += await reader.readexactly(FRAME_LENGTH.size - len(prefix))
+        view.apply(await reader.readexactly(FRAME_LENGTH.unpack(prefix)[0]))
+    writer.close()
+    return header, view
+
+async def watched_session():
+    server = await BattleServer(port=0, max_turns=30).start()
+    players = [asyncio.create_task(play(server.port, name)) for name in ("Gladiator", "Voidcaster", "Nightstalker")]
+    while not server.watchable:
+        await asyncio.sleep(0.001)
+    spectators = await asyncio.gather(watch(server.port), watch(server.port))
+    results = await asyncio.gather(*players)
+    await server.stop()
+    return results, spectators
+
+#Test spectators connected to the server see every turn of the session
+def test_server_spectators():
+    with muted():
+        results, spectators = asyncio.run(watched_session())
+    states = [message for message in results[0] if message["type"] == "state"]
+    for header, view in spectators:
+        assert header == {"type": "watching", "session": 0, "players": ["Gladiator", "Voidcaster", "Nightstalker"]}
+        assert view.state().turn == results[0][-1]["turns"]
+        assert healths(view.state().players) == states[-1]["health"]
@@ -0,0 +1,37 @@
+import os
+import subprocess
+import sys
+from CharacterFactory import CharacterFactory
+from Simulation import run_match, worker_pool
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROSTER = ["Gladiator", "Voidcaster", "Nightstalker"]
+
+#Test importing the game loads no ruleset until a character is created
+def test_lazy_imports():
+    check = ("import sys, BattleManager; from CharacterFactory import CharacterFactory; "
+             "before = 'Ruleset' in sys.modules or 'dataclasses' in sys.modules; "
+             "CharacterFactory.create_character('Stoneguard'); "
+             "print(before, 'Ruleset' in sys.modules, sorted(CharacterFactory._default))")
+    output = subprocess.run([sys.executable, "-c", check], cwd=HERE, capture_output=True, text=True, check=True)
+    assert output.stdout.split(None, 2) == ["False", "True", "['Stoneguard']\n"]
+    assert sorted(CharacterFactory.classes_for()) == sorted(CharacterFactory.character_names())
+
+#Test creating characters from another ruleset does not load the default ruleset
+def test_other_ruleset_skips_default():
+    check = ("import Ruleset; from CharacterFactory import CharacterFactory; "
+             "players = [CharacterFactory.create_character(name, Ruleset.load_named('raid')) "
+             "for name in ('Gladiator', 'Colossus')]; "
+             "print(Ruleset.loaded_default_ruleset() is None, players[0].special_action.name)")
+    output = subprocess.run([sys.executable, "-c", check], cwd=HERE, capture_output=True, text=True, check=True)
+    assert output.stdout.split(None, 1)[0] == "True"
+
+#Test workers forked from the prewarmed fork server play the same matches
+def test_forkserver_pool():
+    pool = worker_pool(2, "forkserver")
+    try:
+        results = pool.starmap(run_match, [(ROSTER, "random", seed) for seed in range(4)])
+    finally:
+        pool.terminate()
+        pool.join()
+    assert results == [run_match(ROSTER, "random", seed) for seed in range(4)]
@@ -0,0 +1,63 @@
+import random
+import Ruleset
+from BattleManager import BattleManager
+from CharacterFactory import CharacterFactory
+from Display import muted
+from Policy import GreedyPolicy, RandomPolicy, SPECIAL
+from StatusEffect import Stun
+from TurnOrder import AliveIndex
+
+RAID = Ruleset.load_named("raid")
+
+def make(names, ruleset=None):
+    return [CharacterFactory.create_character(name, ruleset) for name in names]
+
+#Test enemy views skip teammates and follow turn order
+def test_enemy_view_matches_lists():
+    rng = random.Random(9)
+    players = make(["Gladiator", "Voidcaster", "Stormstriker", "Nightstalker", "Stoneguard"] * 6)
+    teams = [rng.choice("abc") for _ in players]
+    index = AliveIndex(players, teams)
+    for _ in range(200):
+        player = rng.choice(players)
+        player.health = rng.choice([0, 10])
+        index.update(player)
+        for team in "abc":
+            expected = [p for p, t in zip(players, teams) if p.health > 0 and t != team]
+            view = index.enemies(team)
+            assert len(view) == len(expected) and list(view) == expected
+            assert [view[k] for k in range(len(view))] == expected
+        assert index.teams_alive == len({t for p, t in zip(players, teams) if p.health > 0})
+
+#Test a 2 vs 2 battle ends when one team is left
+def test_team_battle():
+    players = make(["Gladiator", "Voidcaster", "Nightstalker", "Stoneguard"])
+    battle = BattleManager(players, policy=GreedyPolicy(), delay=0, max_turns=500, teams=["red", "blue", "red", "blue"])
+    assert list(battle.targets_for(players[0])) == [players[1], players[3]]
+    with muted():
+        result = battle.start_battle()
+    assert result.winner in ("red", "blue")
+    survivors = {battle.players.team_of(player) for player in battle.get_alive_players()}
+    assert survivors == {result.winner}
+
+#Test an area move hits every enemy once and is accounted for
+def test_area_move_hits_all_enemies():
+    players = make(["Voidcaster", "Gladiator", "Stormstriker", "Stoneguard"], RAID)
+    battle = BattleManager(players, policy=GreedyPolicy(), delay=0, teams=[1, 2, 2, 1])
+    voidcaster = players[0]
+    assert not battle.needs_target(voidcaster, SPECIAL)
+    with muted():
+        battle.perform_action(voidcaster, SPECIAL)
+    damage = max(12, 30 * 1.5)
+    assert players[1].health == 100 - damage and players[2].health == 90 - damage
+    assert players[3].health == 140, "Teammates are not hit"
+    assert all(p.status_effects.has(Stun) for p in players[1:3])
+    assert battle.damage_dealt[0] == 2 * damage
+
+#Test a 1 vs 20 raid runs to the end
+def test_raid():
+    players = make(["Colossus"] + ["Gladiator", "Voidcaster", "Stormstriker", "Nightstalker"] * 5, RAID)
+    battle = BattleManager(players, policy=RandomPolicy(2), delay=0, max_turns=5000, teams=["boss"] + ["heroes"] * 20)
+    with muted():
+        result = battle.start_battle()
+    assert result.winner in ("boss", "heroes")
@@ -0,0 +1,25 @@
+from Tournament import Tournament, wilson_interval
+
+#Test that the win matrix does not depend on the number of workers
+def test_same_table_for_any_worker_count():
+    serial = Tournament(seed=3, matches_per_roster=40, round_size=20, chunk_size=7, workers=1).run()
+    parallel = Tournament(seed=3, matches_per_roster=40, round_size=20, chunk_size=7, workers=2).run()
+    assert len(serial.rosters) == 10
+    assert serial.wins == parallel.wins
+    assert serial.win_matrix() == parallel.win_matrix()
+
+#Test that rosters stop early once the intervals are tight enough
+def test_early_stop_on_confidence():
+    tournament = Tournament(seed=1, matches_per_roster=10000, round_size=100, chunk_size=50, workers=1,
+                            target_half_width=0.2, characters=["Gladiator", "Voidcaster", "Stoneguard"])
+    rounds = list(tournament.stream())
+    table = rounds[-1]
+    roster = ("Gladiator", "Voidcaster", "Stoneguard")
+    assert table.matches[roster] < 10000
+    assert table.half_width(roster) <= 0.2
+
+#Test the Wilson interval brackets the observed rate
+def test_wilson_interval():
+    low, high = wilson_interval(50, 100)
+    assert low < 0.5 < high
+    assert wilson_interval(0, 0) == (0.0, 1.0)
@@ -0,0 +1,38 @@
+from BalanceTuner import BalanceTuner
+
+CHARACTERS = ["Gladiator", "Voidcaster", "Stoneguard"]
+
+def make_tuner(**options):
+    return BalanceTuner(characters=CHARACTERS, matches_per_roster=12, population=4, seed=2, **options)
+
+#Test decoded values stay inside the bounds on each parameter's step
+def test_decode_rounds_and_clips():
+    tuner = make_tuner(workers=1)
+    assert tuner.decode(tuner.encode(tuner.base_values())) == tuner.base_values()
+    values = tuner.decode([1.7] * len(tuner.parameters))
+    assert values == tuple(parameter.high for parameter in tuner.parameters)
+    for parameter, value in zip(tuner.parameters, tuner.decode([0.333] * len(tuner.parameters))):
+        assert parameter.low <= value <= parameter.high
+        assert abs(value / parameter.step - round(value / parameter.step)) < 1e-6
+    assert all(parameter.path[-1] != "cooldown" for parameter in tuner.parameters), "Cooldowns never tick"
+
+#Test repeated vectors are simulated once and the cache warm-starts a new run
+def test_cache_and_warm_start(tmp_path):
+    path = str(tmp_path / "tuning.json")
+    tuner = make_tuner(workers=1, cache_path=path)
+    base = tuner.base_values()
+    first, again = tuner.evaluate([base, base])
+    assert first == again and tuner.simulated == 1
+    assert abs(sum(first.win_rates.values()) - 1) < 1e-9, "One winner per match of the only roster"
+    best = tuner.run(generations=2)
+    assert best.loss <= first.loss
+    resumed = make_tuner(workers=1, cache_path=path)
+    assert resumed.best() == best
+    next(resumed.stream(generations=1))
+    assert resumed.simulated <= resumed.population, "The warm start is served from the cache"
+
+#Test parallel evaluation matches serial evaluation
+def test_parallel_matches_serial():
+    serial = make_tuner(workers=1).run(generations=1)
+    parallel = make_tuner(workers=2).run(generations=1)
+    assert serial == parallel
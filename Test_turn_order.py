@@ -0,0 +1,60 @@
+import random
+from BattleManager import BattleManager
+from CharacterFactory import CharacterFactory
+from Display import muted
+from Policy import GreedyPolicy, RandomPolicy, ScriptedPolicy
+from TurnOrder import AliveIndex
+
+def make_players(count):
+    names = CharacterFactory.character_names()
+    return [CharacterFactory.create_character(names[index % len(names)]) for index in range(count)]
+
+#Test the alive index against plain list filtering under random eliminations and revivals
+def test_alive_index_matches_lists():
+    rng = random.Random(3)
+    players = make_players(37)
+    index = AliveIndex(players)
+    for _ in range(300):
+        player = rng.choice(players)
+        player.health = rng.choice([0, 10])
+        index.update(player)
+        alive = [p for p in players if p.health > 0]
+        assert list(index) == alive and len(index) == len(alive)
+        if alive:
+            k = rng.randrange(len(alive))
+            assert index[k] is alive[k] and index[-1] is alive[-1]
+            position = rng.randrange(-1, len(players))
+            following = [p for p in players[position + 1:] if p.health > 0] or alive
+            assert players[index.next_position(position)] is following[0]
+        view = index.view(exclude=player)
+        expected = [p for p in alive if p is not player]
+        assert len(view) == len(expected) and list(view) == expected
+        assert [view[i] for i in range(len(view))] == expected
+
+#Test initiative ordering keeps each player's policy
+def test_initiative_order():
+    players = make_players(3)
+    policies = [ScriptedPolicy([2]), GreedyPolicy(), RandomPolicy(1)]
+    battle = BattleManager(players, policy=policies, delay=0, max_turns=50, initiative=lambda p: -p.attack_power)
+    assert [p.attack_power for p in battle.turn_order] == sorted((p.attack_power for p in players), reverse=True)
+    for player, policy in zip(players, policies):
+        assert battle.policies[battle.slots[player]] is policy
+    assert next(battle.turns()) is battle.turn_order[0]
+
+#Test revival puts a player back in the rotation
+def test_revival_and_targets():
+    players = make_players(4)
+    battle = BattleManager(players, policy=GreedyPolicy(), delay=0)
+    players[1].health = 0
+    battle.update_alive(players[1])
+    assert list(battle.targets_for(players[0])) == [players[2], players[3]]
+    players[1].health = 20
+    battle.update_alive(players[1])
+    assert list(battle.targets_for(players[0])) == players[1:]
+
+#Test a large free-for-all runs to a single winner
+def test_large_free_for_all():
+    battle = BattleManager(make_players(200), policy=RandomPolicy(5), delay=0, max_turns=100000)
+    with muted():
+        result = battle.start_battle()
+    assert result.winner is not None and len(battle.get_alive_players()) == 1
@@ -0,0 +1,137 @@
+import math
+from collections import Counter
+from itertools import combinations
+from CharacterFactory import CharacterFactory
+from Simulation import run_match, worker_pool, DEFAULT_MAX_TURNS
+
+# z-scores for the supported two-sided confidence levels.
+Z_SCORES = {0.90: 1.6449, 0.95: 1.9600, 0.99: 2.5758}
+
+# Deterministic seed for one match, independent of which worker plays it.
+def match_seed(base_seed, combo_index, match_index):
+    return (base_seed << 40) ^ (combo_index << 24) ^ match_index
+
+# Wilson score interval for wins out of n matches.
+def wilson_interval(wins, n, confidence=0.95):
+    if n == 0:
+        return 0.0, 1.0
+    z = Z_SCORES[confidence]
+    p = wins / n
+    denominator = 1 + z * z / n
+    centre = (p + z * z / (2 * n)) / denominator
+    half_width = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denominator
+    return centre - half_width, centre + half_width
+
+# Worker entry point: play one chunk of matches for a roster and count the winners.
+def _play_chunk(task):
+    combo_index, roster, start, count, policy, base_seed, max_turns = task
+    wins = Counter()
+    for match_index in range(start, start + count):
+        result = run_match(roster, policy, match_seed(base_seed, combo_index, match_index), max_turns)
+        wins[result.winner] += 1  # Draws are counted under None.
+    return combo_index, count, wins
+
+# Win counts for every roster played so far.
+class TournamentTable:
+    def __init__(self, rosters, confidence=0.95):
+        self.rosters = rosters
+        self.confidence = confidence
+        self.matches = {roster: 0 for roster in rosters}
+        self.wins = {roster: Counter() for roster in rosters}
+
+    # Fold one chunk result into the table.
+    def add(self, roster, count, wins):
+        self.matches[roster] += count
+        self.wins[roster].update(wins)
+
+    # Fraction of matches in this roster won by the named character.
+    def win_rate(self, roster, name):
+        n = self.matches[roster]
+        return self.wins[roster][name] / n if n else 0.0
+
+    # Confidence interval for a character's win rate in a roster.
+    def interval(self, roster, name):
+        return wilson_interval(self.wins[roster][name], self.matches[roster], self.confidence)
+
+    # Widest confidence half-width across the characters of a roster.
+    def half_width(self, roster):
+        widths = []
+        for name in roster:
+            low, high = self.interval(roster, name)
+            widths.append((high - low) / 2)
+        return max(widths)
+
+    # Win-rate table as {roster: {name: rate}}.
+    def win_matrix(self):
+        return {roster: {name: self.win_rate(roster, name) for name in roster} for roster in self.rosters}
+
+# Plays seeded matches for every 3-character roster across a process pool.
+# Matches are dealt out in rounds of round_size per roster; the table is
+# streamed after each round and a roster stops receiving work once its
+# confidence intervals are narrower than target_half_width. Because every
+# match seed and every stopping decision depends only on completed rounds,
+# the table is identical for any number of workers.
+class Tournament:
+    def __init__(self, policy="random", seed=0, matches_per_roster=1000, round_size=250, chunk_size=50,
+                 workers=None, confidence=0.95, target_half_width=None, max_turns=DEFAULT_MAX_TURNS,
+                 characters=None, team_size=3, start_method=None):
+        if confidence not in Z_SCORES:
+            raise ValueError(f"Unsupported confidence level: {confidence}")
+        characters = characters if characters is not None else CharacterFactory.character_names()
+        self.rosters = list(combinations(characters, team_size))
+        self.policy = policy
+        self.seed = seed
+        self.matches_per_roster = matches_per_roster
+        self.round_size = round_size
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self.start_method = start_method  # See Simulation.worker_pool.
+        self.confidence = confidence
+        self.target_half_width = target_half_width
+        self.max_turns = max_turns
+
+    # True if a roster still needs matches.
+    def _active(self, table, roster):
+        if table.matches[roster] >= self.matches_per_roster:
+            return False
+        if self.target_half_width is not None and table.matches[roster] > 0:
+            return table.half_width(roster) > self.target_half_width
+        return True
+
+    # Chunks making up the next round of work.
+    def _round_tasks(self, table):
+        tasks = []
+        for combo_index, roster in enumerate(self.rosters):
+            if not self._active(table, roster):
+                continue
+            start = table.matches[roster]
+            end = min(start + self.round_size, self.matches_per_roster)
+            for chunk_start in range(start, end, self.chunk_size):
+                count = min(self.chunk_size, end - chunk_start)
+                tasks.append((combo_index, roster, chunk_start, count, self.policy, self.seed, self.max_turns))
+        return tasks
+
+    # Yield the table after every completed round.
+    def stream(self):
+        table = TournamentTable(self.rosters, self.confidence)
+        pool = worker_pool(self.workers, self.start_method) if self.workers != 1 else None
+        try:
+            while True:
+                tasks = self._round_tasks(table)
+                if not tasks:
+                    return
+                results = pool.imap_unordered(_play_chunk, tasks) if pool else map(_play_chunk, tasks)
+                for combo_index, count, wins in results:
+                    table.add(self.rosters[combo_index], count, wins)
+                yield table
+        finally:
+            if pool:
+                pool.terminate()
+                pool.join()
+
+    # Play the whole tournament and return the final table.
+    def run(self):
+        table = None
+        for table in self.stream():
+            pass
+        return table if table is not None else TournamentTable(self.rosters, self.confidence)
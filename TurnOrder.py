@@ -0,0 +1,226 @@
+# Incrementally maintained alive set over a fixed initiative order.
+#
+# Players keep the position they were given at the start of the battle. A
+# Fenwick tree over those positions holds 1 for every living player, so the
+# alive count, the next living player after a position and the k-th living
+# player are all O(log n). The index only changes on elimination or revival,
+# which makes large free-for-all battles linear in turns, not quadratic in players.
+#
+# In team battles every team also has its own tree over the same positions, so
+# "living players not on my team" can be counted and indexed in turn order by
+# subtracting one tree from the other.
+class AliveIndex:
+    __slots__ = ("order", "positions", "alive", "count", "teams", "team_counts", "teams_alive", "_tree",
+                 "_team_trees", "_top")
+
+    # order is the initiative order. Players with health above zero start alive.
+    # teams is None for free-for-all or one team label per player in order.
+    def __init__(self, order, teams=None):
+        self.order = list(order)
+        self.positions = {player: position for position, player in enumerate(self.order)}
+        size = len(self.order)
+        self.alive = [player.health > 0 for player in self.order]
+        self.count = sum(self.alive)
+        self._tree = fenwick(self.alive)
+        self._top = 1 << (size.bit_length() - 1) if size else 0  # Highest power of two <= size.
+        self.teams = None if teams is None else list(teams)
+        self.team_counts = {}
+        self._team_trees = {}
+        if self.teams is not None:
+            for team in self.teams:
+                if team not in self._team_trees:
+                    members = [alive and label == team for alive, label in zip(self.alive, self.teams)]
+                    self._team_trees[team] = fenwick(members)
+                    self.team_counts[team] = sum(members)
+            self.teams_alive = sum(1 for count in self.team_counts.values() if count)
+        else:
+            self.teams_alive = self.count  # Every player is their own side.
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        return (player for player, alive in zip(self.order, self.alive) if alive)
+
+    def __contains__(self, player):
+        position = self.positions.get(player)
+        return position is not None and self.alive[position]
+
+    # The k-th living player, so the index can stand in for a list of players.
+    def __getitem__(self, k):
+        return self.player_at(k + self.count if k < 0 else k)
+
+    # Number of living players before a position (only those on `team` if given).
+    def rank(self, position, team=None):
+        tree = self._tree if team is None else self._team_trees[team]
+        total = 0
+        while position > 0:
+            total += tree[position]
+            position -= position & -position
+        return total
+
+    # Position of the k-th living player (0-based), by descending the tree.
+    # With `outside`, counts only living players who are not on that team.
+    def select(self, k, outside=None):
+        limit = self.count if outside is None else self.count - self.team_counts[outside]
+        if not 0 <= k < limit:
+            raise IndexError("alive index out of range")
+        tree = self._tree
+        other = None if outside is None else self._team_trees[outside]
+        position = 0
+        step = self._top
+        while step:
+            probe = position + step
+            if probe < len(tree):
+                here = tree[probe] if other is None else tree[probe] - other[probe]
+                if here <= k:
+                    position = probe
+                    k -= here
+            step >>= 1
+        return position  # 1-based tree position of the predecessor == 0-based position.
+
+    # The k-th living player in initiative order.
+    def player_at(self, k):
+        return self.order[self.select(k)]
+
+    # Position of the first living player after a position, wrapping around; -1 starts from the top.
+    def next_position(self, position):
+        if not self.count:
+            return None
+        before = self.rank(position + 1)
+        return self.select(before if before < self.count else 0)
+
+    # Bring one player's alive flag in line with their health. Returns True if it changed.
+    def update(self, player):
+        position = self.positions[player]
+        alive = player.health > 0
+        if alive == self.alive[position]:
+            return False
+        self.alive[position] = alive
+        delta = 1 if alive else -1
+        self.count += delta
+        fenwick_add(self._tree, position, delta)
+        if self.teams is None:
+            self.teams_alive = self.count
+        else:
+            team = self.teams[position]
+            fenwick_add(self._team_trees[team], position, delta)
+            self.team_counts[team] += delta
+            if self.team_counts[team] == (1 if alive else 0):
+                self.teams_alive += delta  # The team just came back or was wiped out.
+        return True
+
+    # Team label of a player, or None in free-for-all.
+    def team_of(self, player):
+        return None if self.teams is None else self.teams[self.positions[player]]
+
+    # Resync every player, for code that changed health outside the battle flow.
+    def refresh(self):
+        for player in self.order:
+            self.update(player)
+
+    # Read-only sequence of living players in initiative order, optionally without one player.
+    def view(self, exclude=None):
+        return AliveView(self, exclude)
+
+    # Living players who are not on a team, in initiative order.
+    def enemies(self, team):
+        return EnemyView(self, team)
+
+# Fenwick tree (1-based) over a list of 0/1 values, built in O(n): each node adds itself to its parent.
+def fenwick(values):
+    size = len(values)
+    tree = [0] * (size + 1)
+    for position, value in enumerate(values, 1):
+        tree[position] += value
+        parent = position + (position & -position)
+        if parent <= size:
+            tree[parent] += tree[position]
+    return tree
+
+def fenwick_add(tree, position, delta):
+    position += 1
+    while position < len(tree):
+        tree[position] += delta
+        position += position & -position
+
+# Sequence view over an AliveIndex: len() and indexing are O(log n) and it
+# always reflects the current alive set. Used as the target candidates list.
+class AliveView:
+    __slots__ = ("index", "exclude")
+
+    def __init__(self, index, exclude=None):
+        self.index = index
+        self.exclude = exclude
+
+    # Rank of the excluded player among the living, or None if there is no living excluded player.
+    def _skip(self):
+        index = self.index
+        position = index.positions.get(self.exclude)
+        if position is None or not index.alive[position]:
+            return None
+        return index.rank(position)
+
+    def __len__(self):
+        return self.index.count - (self._skip() is not None)
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def __getitem__(self, k):
+        skip = self._skip()
+        length = self.index.count - (skip is not None)
+        if k < 0:
+            k += length
+        if not 0 <= k < length:
+            raise IndexError("alive view index out of range")
+        if skip is not None and k >= skip:
+            k += 1
+        return self.index.player_at(k)
+
+    def __iter__(self):
+        exclude = self.exclude
+        return (player for player in self.index if player is not exclude)
+
+    def __contains__(self, player):
+        return player is not self.exclude and player in self.index
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def __repr__(self):
+        return f"AliveView({list(self)!r})"
+
+# Sequence view of the living players outside one team, with O(log n) len() and indexing.
+class EnemyView:
+    __slots__ = ("index", "team")
+
+    def __init__(self, index, team):
+        self.index = index
+        self.team = team
+
+    def __len__(self):
+        return self.index.count - self.index.team_counts[self.team]
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def __getitem__(self, k):
+        if k < 0:
+            k += len(self)
+        index = self.index
+        return index.order[index.select(k, outside=self.team)]
+
+    def __iter__(self):
+        index = self.index
+        return (player for player, alive, team in zip(index.order, index.alive, index.teams)
+                if alive and team != self.team)
+
+    def __contains__(self, player):
+        return player in self.index and self.index.team_of(player) != self.team
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def __repr__(self):
+        return f"EnemyView({list(self)!r})"